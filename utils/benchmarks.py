@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmarks for the Utils Scripts
+Times hot paths of the quiz tooling on generated question banks
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from content_tester import ContentTester
+
+from data_validator import DataValidator, KeywordCountDifficultyRules
+from difficulty_classifier import DifficultyClassifier
+from difficulty_engine import DifficultyEngine, shared_engine
+from question_store import CompactQuestionStore, dict_bank_nbytes
+from quiz_generator import QuizQuestionGenerator
+
+# Bank sizes the hot-path suite runs at
+SUITE_SIZES = [1000, 100000, 1000000]
+
+# Questions timed one at a time for the per-question latency percentiles
+LATENCY_SAMPLE_SIZE = 10000
+
+# Fractional drop in throughput, or rise in p99 latency or peak RSS, reported as a regression
+DEFAULT_TOLERANCE = 0.2
+
+# Machine-readable suite results and the stored baseline they are compared against
+DEFAULT_RESULTS_PATH = "benchmark_results.json"
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+def legacy_standardize_medical_terminology(validator: DataValidator, question: Dict[str, Any]) -> Dict[str, Any]:
+    """The original per-abbreviation re.sub loop, kept as the benchmark baseline"""
+    enhanced_question = question.copy()
+
+    def standardize(text: str) -> str:
+        for category, terms in validator.standardization_map.items():
+            for abbrev, full_term in terms.items():
+                text = re.sub(rf'\b{re.escape(abbrev)}\b', full_term, text, flags=re.IGNORECASE)
+        return text
+
+    if "question" in enhanced_question:
+        enhanced_question["question"] = standardize(enhanced_question["question"])
+    if "explanation" in enhanced_question:
+        enhanced_question["explanation"] = standardize(enhanced_question["explanation"])
+    if "options" in enhanced_question:
+        enhanced_question["options"] = [standardize(option) for option in enhanced_question["options"]]
+
+    return enhanced_question
+
+def generate_bank(num_questions: int, seed: int) -> List[Dict[str, Any]]:
+    """Generate a reproducible question bank for benchmarking"""
+    generator = QuizQuestionGenerator()
+    return generator.generate_questions_bulk(num_questions, rng=random.Random(seed))
+
+def benchmark_standardization(questions: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Compare the single-pass terminology standardizer with the per-abbreviation loop"""
+    validator = DataValidator()
+
+    start = time.perf_counter()
+    legacy = [legacy_standardize_medical_terminology(validator, question) for question in questions]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single_pass = [validator.standardize_medical_terminology(question) for question in questions]
+    single_pass_seconds = time.perf_counter() - start
+
+    if legacy != single_pass:
+        raise AssertionError("Single-pass standardizer output differs from the per-abbreviation loop")
+
+    return {
+        "questions": len(questions),
+        "legacy_seconds": legacy_seconds,
+        "single_pass_seconds": single_pass_seconds,
+        "speedup": legacy_seconds / single_pass_seconds if single_pass_seconds else float("inf")
+    }
+
+def benchmark_classification(questions: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Compare batch difficulty classification with per-question analysis"""
+    classifier = DifficultyClassifier()
+
+    start = time.perf_counter()
+    per_question = [classifier.classify(question) for question in questions]
+    per_question_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = classifier.score_questions(questions)
+    scoring_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = classifier.classify_scores(scores)
+    thresholds_seconds = time.perf_counter() - start
+
+    if per_question != batch:
+        raise AssertionError("Batch classification differs from per-question analysis")
+
+    batch_seconds = scoring_seconds + thresholds_seconds
+    return {
+        "questions": len(questions),
+        "per_question_seconds": per_question_seconds,
+        "batch_scoring_seconds": scoring_seconds,
+        "batch_thresholds_seconds": thresholds_seconds,
+        "score_array_bytes": scores.itemsize * len(scores),
+        "speedup": per_question_seconds / batch_seconds if batch_seconds else float("inf")
+    }
+
+def benchmark_difficulty_memo(questions: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Time a cold and a warm pass of both difficulty rule sets through a fresh engine"""
+    engine = DifficultyEngine(max_entries=2 * len(questions))
+    engine.register(DifficultyClassifier())
+    engine.register(KeywordCountDifficultyRules())
+
+    start = time.perf_counter()
+    engine.compare(questions)
+    cold_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    comparison = engine.compare(questions)
+    warm_seconds = time.perf_counter() - start
+
+    return {
+        "questions": len(questions),
+        "cold_seconds": cold_seconds,
+        "warm_seconds": warm_seconds,
+        "agreement_rate": comparison["agreement_rate"],
+        "speedup": cold_seconds / warm_seconds if warm_seconds else float("inf")
+    }
+
+def benchmark_question_store(questions: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Compare the memory of a bank held as decoded dicts with the compact question store
+
+    Each question is round-tripped through JSON first, so the dicts hold
+    their own strings the way a bank loaded from disk does. Run with
+    --questions 1000000 for the 1M-question comparison.
+    """
+    start = time.perf_counter()
+    decoded = [json.loads(json.dumps(question)) for question in questions]
+    decode_seconds = time.perf_counter() - start
+    dict_bytes = dict_bank_nbytes(decoded)
+
+    start = time.perf_counter()
+    store = CompactQuestionStore(decoded)
+    build_seconds = time.perf_counter() - start
+    store_bytes = sum(store.nbytes().values())
+
+    start = time.perf_counter()
+    for question in store:
+        pass
+    iterate_seconds = time.perf_counter() - start
+
+    if any(store[i] != decoded[i] for i in range(0, len(decoded), max(1, len(decoded) // 1000))):
+        raise AssertionError("Compact store does not round-trip questions")
+
+    return {
+        "questions": len(questions),
+        "dict_bytes": dict_bytes,
+        "store_bytes": store_bytes,
+        "dict_bytes_per_question": dict_bytes / len(questions) if questions else 0.0,
+        "store_bytes_per_question": store_bytes / len(questions) if questions else 0.0,
+        "distinct_strings": len(store.strings),
+        "decode_seconds": decode_seconds,
+        "build_seconds": build_seconds,
+        "iterate_seconds": iterate_seconds,
+        "reduction": dict_bytes / store_bytes if store_bytes else float("inf")
+    }
+
+BENCHMARKS = {
+    "standardize": benchmark_standardization,
+    "classify": benchmark_classification,
+    "difficulty_memo": benchmark_difficulty_memo,
+    "question_store": benchmark_question_store
+}
+
+HotPath = Tuple[Iterable[Any], Callable[[Any], Any], Callable[[Any], Any]]
+
+def hot_path_generate_questions(num_questions: int, seed: int) -> HotPath:
+    generator = QuizQuestionGenerator()
+    random.seed(seed)
+    return (range(num_questions),
+            lambda items: generator.generate_questions(len(items)),
+            lambda item: generator.generate_questions(1))
+
+def hot_path_test_question_set(num_questions: int, seed: int) -> HotPath:
+    tester = ContentTester()
+    return generate_bank(num_questions, seed), tester.test_question_set, tester.test_question
+
+def hot_path_validate_quiz_questions(num_questions: int, seed: int) -> HotPath:
+    validator = DataValidator()
+    return generate_bank(num_questions, seed), validator.validate_quiz_questions, validator.validate_question
+
+def hot_path_standardize_medical_terminology(num_questions: int, seed: int) -> HotPath:
+    validator = DataValidator()
+    standardize = validator.standardize_medical_terminology
+    return generate_bank(num_questions, seed), lambda questions: [standardize(q) for q in questions], standardize
+
+def hot_path_classify_existing_questions(num_questions: int, seed: int) -> HotPath:
+    classifier = DifficultyClassifier()
+    return (generate_bank(num_questions, seed), classifier.classify_existing_questions,
+            lambda question: classifier.classify_existing_questions([question]))
+
+# Each hot path builds its input and returns it with a whole-bank call and a per-question call
+HOT_PATHS = {
+    "generate_questions": hot_path_generate_questions,
+    "test_question_set": hot_path_test_question_set,
+    "validate_quiz_questions": hot_path_validate_quiz_questions,
+    "standardize_medical_terminology": hot_path_standardize_medical_terminology,
+    "classify_existing_questions": hot_path_classify_existing_questions
+}
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(len(sorted_values) * fraction))
+    return sorted_values[rank - 1]
+
+def run_hot_path(name: str, num_questions: int, seed: int,
+                 latency_samples: int = LATENCY_SAMPLE_SIZE) -> Dict[str, Any]:
+    """Time one hot path on a generated bank
+
+    The whole bank goes through the batch call for throughput, then up to
+    latency_samples questions are timed one at a time for p50/p99 latency.
+    The shared difficulty memo is cleared before each phase so neither
+    starts warm. Output printed by the tools is discarded.
+    """
+    items, run_bank, run_question = HOT_PATHS[name](num_questions, seed)
+    input_rss = peak_rss_mb()
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        shared_engine.clear()
+        start = time.perf_counter()
+        run_bank(items)
+        seconds = time.perf_counter() - start
+
+        shared_engine.clear()
+        latencies = []
+        for item in itertools.islice(items, latency_samples):
+            start = time.perf_counter()
+            run_question(item)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    return {
+        "hot_path": name,
+        "questions": num_questions,
+        "seconds": seconds,
+        "throughput": num_questions / seconds if seconds else 0.0,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "latency_samples": len(latencies),
+        "input_rss_mb": input_rss,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def run_suite(paths: List[str], sizes: List[int], seed: int,
+              latency_samples: int = LATENCY_SAMPLE_SIZE) -> List[Dict[str, Any]]:
+    """Run every hot path at every size, each in a fresh interpreter so peak RSS is its own"""
+    results = []
+    for name in paths:
+        for size in sizes:
+            command = [sys.executable, os.path.abspath(__file__), "--hot-path", name,
+                       "--questions", str(size), "--seed", str(seed), "--latency-samples", str(latency_samples)]
+            completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+            if completed.returncode != 0:
+                error = (completed.stderr.strip().splitlines() or ["exited with status %d" % completed.returncode])[-1]
+                print(f"  {name} @ {size}: failed: {error}")
+                results.append({"hot_path": name, "questions": size, "error": error})
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            rss = result["peak_rss_mb"]
+            print(f"  {name} @ {size}: {result['throughput']:,.0f} questions/s, "
+                  f"p50 {result['p50_us']:.1f}us, p99 {result['p99_us']:.1f}us, "
+                  f"peak RSS {'n/a' if rss is None else f'{rss:.1f} MB'}")
+            results.append(result)
+    return results
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                        tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Describe every result that is worse than its baseline entry by more than tolerance
+
+    A hot path that fails where its baseline entry completed is a regression too.
+    """
+    previous = {(entry["hot_path"], entry["questions"]): entry for entry in baseline if "error" not in entry}
+    regressions = []
+    for result in results:
+        old = previous.get((result["hot_path"], result["questions"]))
+        if old is None:
+            continue
+        label = f"{result['hot_path']} @ {result['questions']}"
+        if "error" in result:
+            regressions.append(f"{label}: failed ({result['error']}) but completed in the baseline")
+            continue
+        if result["throughput"] < old["throughput"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {result['throughput']:,.0f}/s vs {old['throughput']:,.0f}/s")
+        for metric in ("p99_us", "peak_rss_mb"):
+            if result.get(metric) is not None and old.get(metric) is not None and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{label}: {metric} {result[metric]:.1f} vs {old[metric]:.1f}")
+    return regressions
+
+def suite_report(results: List[Dict[str, Any]], seed: int) -> Dict[str, Any]:
+    """Suite results with the environment they were measured in"""
+    return {
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        "results": results
+    }
+
+def main():
+    """Run the selected benchmarks, or the hot-path suite with --suite"""
+    parser = argparse.ArgumentParser(description="Benchmark hot paths of the quiz utils scripts")
+    parser.add_argument("benchmarks", nargs="*", default=sorted(BENCHMARKS),
+                        help=f"benchmarks to run (default: all of {', '.join(sorted(BENCHMARKS))})")
+    parser.add_argument("--questions", type=int, default=100000, help="size of the generated question bank")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the generated question bank")
+    parser.add_argument("--suite", action="store_true",
+                        help="time every utils hot path at each of --sizes instead of running the comparisons")
+    parser.add_argument("--paths", nargs="+", choices=list(HOT_PATHS), default=list(HOT_PATHS),
+                        help="hot paths the suite runs (default: all)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SUITE_SIZES,
+                        help=f"bank sizes the suite runs at (default: {' '.join(map(str, SUITE_SIZES))})")
+    parser.add_argument("--latency-samples", type=int, default=LATENCY_SAMPLE_SIZE,
+                        help="questions timed one at a time for latency percentiles")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_PATH, help="file the suite writes its results to")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="stored results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="fractional slowdown or memory growth reported as a regression")
+    parser.add_argument("--hot-path", choices=list(HOT_PATHS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hot_path:
+        print(json.dumps(run_hot_path(args.hot_path, args.questions, args.seed, args.latency_samples)))
+        return
+
+    if args.suite:
+        print(f"Running {len(args.paths)} hot paths at {', '.join(map(str, args.sizes))} questions")
+        report = suite_report(run_suite(args.paths, args.sizes, args.seed, args.latency_samples), args.seed)
+
+        regressions = []
+        if args.save_baseline:
+            with open(args.baseline, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Baseline saved to {args.baseline}")
+        elif os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            regressions = compare_to_baseline(report["results"], baseline["results"], args.tolerance)
+            report["baseline"] = args.baseline
+            report["regressions"] = regressions
+            print(f"\nCompared against {args.baseline}: {len(regressions)} regressions")
+            for regression in regressions:
+                print(f"  {regression}")
+        else:
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline to store one")
+
+        with open(args.results, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.results}")
+        failures = sum(1 for result in report["results"] if "error" in result)
+        if failures:
+            print(f"{failures} hot path runs failed")
+        if regressions or failures:
+            sys.exit(1)
+        return
+
+    questions = generate_bank(args.questions, args.seed)
+    print(f"Generated {len(questions)} questions")
+
+    for name in args.benchmarks:
+        result = BENCHMARKS[name](questions)
+        print(f"\n{name}:")
+        for key, value in result.items():
+            print(f"  {key}: {value:.3f}" if isinstance(value, float) else f"  {key}: {value}")
+
+if __name__ == "__main__":
+    main()
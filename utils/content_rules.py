@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Content Rule Registry
+Declares content checks as data and compiles them into a plan that normalizes each question once
+"""
+
+import re
+from typing import List, Dict, Any, Callable, Iterable
+
+# Text fields rules can search; each is lowercased and scanned once per question.
+# "answer" is the text of the correct option, or empty when correct is not a valid index.
+TEXT_FIELDS = ("question", "explanation", "answer")
+
+# ASCII punctuation and whitespace, mapped to spaces so text splits into words for index
+# lookups; hyphens are kept so names such as piperacillin-tazobactam stay whole
+TOKEN_SEPARATORS = str.maketrans({chr(c): " " for c in range(128) if not (chr(c).isalnum() or chr(c) == "-")})
+
+# A compiled rule appends its issues for one normalized question to a list
+Evaluator = Callable[["NormalizedQuestion", List[str]], None]
+
+# A rule kind compiles a declaration, calling need_terms(field, terms) for every term it looks up
+RuleCompiler = Callable[[Dict[str, Any], Callable[[str, Iterable[str]], None]], Evaluator]
+
+def build_trie_pattern(words: List[str]) -> str:
+    """Build a regex alternation for words with shared prefixes factored into a trie
+
+    At each position the pattern prefers the longest word, and Python's regex
+    engine can reject a position after a single character instead of trying
+    every alternative.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+
+    return render(trie)
+
+class TermMatcher:
+    """Finds which of a fixed set of terms occur anywhere in a text in a single pass
+
+    Equivalent to checking `term in text` for every term: the pattern reports
+    the longest term at each match, and any shorter terms contained in it are
+    added from a precomputed table. Terms that could start inside a match and
+    run past its end are few, and are checked directly when their match occurs.
+    """
+
+    def __init__(self, terms: List[str]):
+        unique_terms = sorted(set(terms))
+        self.pattern = re.compile(build_trie_pattern(unique_terms)) if unique_terms else None
+        self.contained_terms = {
+            term: [other for other in unique_terms if other != term and other in term]
+            for term in unique_terms
+        }
+        self.overlapping_terms = {
+            term: [other for other in unique_terms
+                   if other not in term and any(other.startswith(term[start:]) for start in range(1, len(term)))]
+            for term in unique_terms
+        }
+
+    def find(self, text: str) -> set:
+        """Return the set of terms that occur as substrings of text"""
+        found = set()
+        if self.pattern is None:
+            return found
+        for term in set(self.pattern.findall(text)):
+            found.add(term)
+            found.update(self.contained_terms[term])
+            for other in self.overlapping_terms[term]:
+                if other not in found and other in text:
+                    found.add(other)
+        return found
+
+class NormalizedQuestion:
+    """Everything rules read from one question, computed once and shared by every rule"""
+
+    __slots__ = ("record", "text", "words", "found", "options", "option_tokens")
+
+    def __init__(self, record: Dict[str, Any], matchers: Dict[str, TermMatcher]):
+        self.record = record
+        self.options = record.get("options", [])
+        correct = record.get("correct")
+        answer = ""
+        if type(correct) is int and 0 <= correct < len(self.options) and isinstance(self.options[correct], str):
+            answer = self.options[correct]
+        self.text = {
+            "question": record.get("question", "").lower(),
+            "explanation": record.get("explanation", "").lower(),
+            "answer": answer.lower()
+        }
+        self.words = {field: len(text.split()) for field, text in self.text.items()}
+        self.found = {
+            field: matchers[field].find(text) if field in matchers else set()
+            for field, text in self.text.items()
+        }
+        self.option_tokens = [set(option.lower().split()) for option in self.options]
+
+def compile_each_term(rule: Dict[str, Any], need_terms: Callable[[str, Iterable[str]], None]) -> Evaluator:
+    """One issue per listed term found in any of the fields, in declaration order
+
+    Nothing is reported when any unless_any term appears in unless_field.
+    """
+    terms = list(rule["terms"])
+    fields = rule.get("fields", ["question"])
+    unless = frozenset(rule.get("unless_any", []))
+    unless_field = rule.get("unless_field", "question")
+    message = rule["message"]
+    for field in fields:
+        need_terms(field, terms)
+    need_terms(unless_field, unless)
+
+    positions: Dict[str, List[int]] = {}
+    for position, term in enumerate(terms):
+        positions.setdefault(term, []).append(position)
+    term_set = frozenset(positions)
+
+    def evaluate(question: NormalizedQuestion, issues: List[str]):
+        found = set()
+        for field in fields:
+            found |= question.found[field] & term_set
+        if not found or not unless.isdisjoint(question.found[unless_field]):
+            return
+        for _, term in sorted((position, term) for term in found for position in positions[term]):
+            issues.append(message.format(term=term))
+
+    return evaluate
+
+def compile_terms(rule: Dict[str, Any], need_terms: Callable[[str, Iterable[str]], None]) -> Evaluator:
+    """One issue when every when_any group has a term in field and no unless_any term is in unless_field"""
+    field = rule.get("field", "question")
+    groups = [frozenset(group) for group in rule.get("when_any", [])]
+    unless = frozenset(rule.get("unless_any", []))
+    unless_field = rule.get("unless_field", field)
+    message = rule["message"]
+    for group in groups:
+        need_terms(field, group)
+    need_terms(unless_field, unless)
+
+    def evaluate(question: NormalizedQuestion, issues: List[str]):
+        found = question.found[field]
+        for group in groups:
+            if group.isdisjoint(found):
+                return
+        if unless and not unless.isdisjoint(question.found[unless_field]):
+            return
+        issues.append(message)
+
+    return evaluate
+
+def compile_word_count(rule: Dict[str, Any], need_terms: Callable[[str, Iterable[str]], None]) -> Evaluator:
+    """One issue when a field has fewer than min or more than max words"""
+    field = rule.get("field", "question")
+    low = rule.get("min")
+    high = rule.get("max")
+    message = rule["message"]
+
+    def evaluate(question: NormalizedQuestion, issues: List[str]):
+        count = question.words[field]
+        if (low is not None and count < low) or (high is not None and count > high):
+            issues.append(message)
+
+    return evaluate
+
+def compile_option_count(rule: Dict[str, Any], need_terms: Callable[[str, Iterable[str]], None]) -> Evaluator:
+    """One issue when there are fewer than min or more than max answer options"""
+    low = rule.get("min")
+    high = rule.get("max")
+    message = rule["message"]
+
+    def evaluate(question: NormalizedQuestion, issues: List[str]):
+        count = len(question.options)
+        if (low is not None and count < low) or (high is not None and count > high):
+            issues.append(message)
+
+    return evaluate
+
+def compile_similar_options(rule: Dict[str, Any], need_terms: Callable[[str, Iterable[str]], None]) -> Evaluator:
+    """One issue per pair of options whose word-set similarity exceeds threshold"""
+    threshold = rule.get("threshold", 0.8)
+    message = rule["message"]
+
+    def evaluate(question: NormalizedQuestion, issues: List[str]):
+        token_sets = question.option_tokens
+        for i, words1 in enumerate(token_sets):
+            for j in range(i + 1, len(token_sets)):
+                union = len(words1 | token_sets[j])
+                if union and len(words1 & token_sets[j]) / union > threshold:
+                    issues.append(message.format(first=i + 1, second=j + 1))
+
+    return evaluate
+
+def compile_dose_limit(rule: Dict[str, Any], need_terms: Callable[[str, Iterable[str]], None]) -> Evaluator:
+    """One issue when the first dose in a field exceeds the limit for its unit"""
+    field = rule.get("field", "question")
+    pattern = re.compile(rule["pattern"])
+    limits = rule["limits"]
+    message = rule["message"]
+
+    def evaluate(question: NormalizedQuestion, issues: List[str]):
+        match = pattern.search(question.text[field])
+        if match:
+            value = int(match.group(1))
+            unit = match.group(2)
+            if unit in limits and value > limits[unit]:
+                issues.append(message.format(value=value, unit=unit))
+
+    return evaluate
+
+def text_tokens(text: str) -> set:
+    """Lookup tokens of lowercased text: every word, hyphenated compound and compound part"""
+    tokens = set(text.translate(TOKEN_SEPARATORS).split())
+    if "-" in text:
+        for token in [token for token in tokens if "-" in token]:
+            tokens.update(part for part in token.split("-") if part)
+    return tokens
+
+def compile_term_index(rule: Dict[str, Any], need_terms: Callable[[str, Iterable[str]], None]) -> Evaluator:
+    """One issue per entry whose term and a trigger both appear, unless the question addresses it
+
+    Each entry of rule["entries"] has a term (e.g. a drug) that must appear
+    in term_scope, triggers of which one must appear in trigger_scope,
+    optional addressed_by wording that suppresses the issue when it appears
+    in the question, explanation or answer, and a message. A scope is "answer",
+    "question" or "any" (question or answer).
+
+    Entries are indexed by the first token of their term, so a question is
+    only checked against entries whose term it actually contains: the cost
+    per question follows the number of tokens in it, not the number of
+    entries.
+    """
+    index: Dict[str, Dict[str, List[int]]] = {"answer": {}, "question": {}, "any": {}}
+    compiled = []
+    for i, entry in enumerate(rule["entries"]):
+        term = entry["term"].lower()
+        tokens = term.translate(TOKEN_SEPARATORS).split()
+        term_scope = entry.get("term_scope", "any")
+        trigger_scope = entry.get("trigger_scope", "question")
+        if not tokens:
+            raise ValueError(f"Index entry needs a term with at least one word: {entry}")
+        if term_scope not in index or trigger_scope not in index:
+            raise ValueError(f"Index entry scopes must be one of {', '.join(index)}: {entry}")
+        index[term_scope].setdefault(tokens[0], []).append(i)
+        compiled.append((
+            term, len(tokens) > 1, term_scope,
+            [trigger.lower() for trigger in entry["triggers"]], trigger_scope,
+            [wording.lower() for wording in entry.get("addressed_by", [])], entry["message"]
+        ))
+    index_keys = {scope: frozenset(scope_index) for scope, scope_index in index.items()}
+
+    def evaluate(question: NormalizedQuestion, issues: List[str]):
+        texts = question.text
+        answer_tokens = text_tokens(texts["answer"]) if texts["answer"] else set()
+        question_tokens = text_tokens(texts["question"]) if index["question"] or index["any"] else set()
+        hits = set()
+        for scope, tokens in (("answer", answer_tokens), ("question", question_tokens),
+                              ("any", answer_tokens), ("any", question_tokens)):
+            # Intersecting with the key set walks the smaller side, i.e. the question's tokens
+            for token in tokens & index_keys[scope]:
+                hits.update(index[scope][token])
+        if not hits:
+            return
+
+        scope_texts = {
+            "answer": texts["answer"],
+            "question": texts["question"],
+            "any": texts["question"] + "\0" + texts["answer"]
+        }
+        for i in sorted(hits):
+            term, phrase, term_scope, triggers, trigger_scope, addressed_by, message = compiled[i]
+            if phrase and term not in scope_texts[term_scope]:
+                continue
+            trigger_text = scope_texts[trigger_scope]
+            if not any(trigger in trigger_text for trigger in triggers):
+                continue
+            if any(wording in texts["question"] or wording in texts["explanation"] or wording in texts["answer"]
+                   for wording in addressed_by):
+                continue
+            issues.append(message)
+
+    return evaluate
+
+# Built-in rule kinds; RuleRegistry.register_kind adds more
+RULE_KINDS: Dict[str, RuleCompiler] = {
+    "each_term": compile_each_term,
+    "terms": compile_terms,
+    "word_count": compile_word_count,
+    "option_count": compile_option_count,
+    "similar_options": compile_similar_options,
+    "dose_limit": compile_dose_limit,
+    "term_index": compile_term_index
+}
+
+def _guarded(where: Dict[str, Any], evaluate: Evaluator) -> Evaluator:
+    """Run a rule only on questions whose fields equal the where values"""
+    conditions = list(where.items())
+
+    def guarded(question: NormalizedQuestion, issues: List[str]):
+        record = question.record
+        for field, value in conditions:
+            if record.get(field) != value:
+                return
+        evaluate(question, issues)
+
+    return guarded
+
+class RuleRegistry:
+    """Ordered content rule declarations, grouped into named checks
+
+    A rule is a plain dict: the check it belongs to, its kind, the terms,
+    thresholds and message it uses and an optional where clause on question
+    fields, e.g.
+
+        {"check": "test_question_quality", "kind": "each_term", "terms": ["maybe"],
+         "message": "Ambiguous language detected: '{term}'"}
+
+    Issues are reported in check order and, within a check, in rule order.
+    Compilers for rule kinds must be module-level functions so registries and
+    plans can be sent to worker processes.
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]] = ()):
+        self.kinds: Dict[str, RuleCompiler] = dict(RULE_KINDS)
+        self.rules: List[Dict[str, Any]] = []
+        self.extend(rules)
+
+    def register_kind(self, kind: str, compiler: RuleCompiler):
+        """Make a new rule kind available to declarations"""
+        self.kinds[kind] = compiler
+
+    def add(self, rule: Dict[str, Any]):
+        """Declare one rule"""
+        if "check" not in rule or "kind" not in rule:
+            raise ValueError(f"Rule needs a check and a kind: {rule}")
+        if rule["kind"] not in self.kinds:
+            raise ValueError(f"Unknown rule kind '{rule['kind']}'")
+        self.rules.append(rule)
+
+    def extend(self, rules: Iterable[Dict[str, Any]]):
+        """Declare several rules"""
+        for rule in rules:
+            self.add(rule)
+
+    def checks(self) -> List[str]:
+        """Check names in the order they were first declared"""
+        return list(dict.fromkeys(rule["check"] for rule in self.rules))
+
+    def compile(self) -> "RulePlan":
+        """Compile the declared rules into an execution plan"""
+        return RulePlan(self)
+
+class RulePlan:
+    """Compiled rules sharing one normalization pass per question
+
+    Compiling collects every term any rule looks up into one TermMatcher per
+    text field, so a question's question and explanation are lowercased,
+    split and scanned once whatever the number of rules; rules then test
+    set membership instead of rescanning the text.
+    """
+
+    def __init__(self, registry: RuleRegistry):
+        self.registry = registry
+        terms: Dict[str, List[str]] = {}
+
+        def need_terms(field: str, words: Iterable[str]):
+            if field not in TEXT_FIELDS:
+                raise ValueError(f"Rules can only search {', '.join(TEXT_FIELDS)}, not '{field}'")
+            terms.setdefault(field, []).extend(words)
+
+        self.checks: Dict[str, List[Evaluator]] = {}
+        for rule in registry.rules:
+            evaluate = registry.kinds[rule["kind"]](rule, need_terms)
+            if rule.get("where"):
+                evaluate = _guarded(rule["where"], evaluate)
+            self.checks.setdefault(rule["check"], []).append(evaluate)
+        self.matchers = {field: TermMatcher(words) for field, words in terms.items() if words}
+
+    def __reduce__(self):
+        # Closures cannot be pickled; worker processes recompile from the declarations
+        return RulePlan, (self.registry,)
+
+    def normalize(self, question: Dict[str, Any]) -> NormalizedQuestion:
+        """Shared lowercased text, word counts, matched terms and option tokens of one question"""
+        return NormalizedQuestion(question, self.matchers)
+
+    def run_check(self, check: str, question: NormalizedQuestion) -> List[str]:
+        """Issues one check finds in a normalized question"""
+        issues = []
+        for evaluate in self.checks.get(check, ()):
+            evaluate(question, issues)
+        return issues
+
+    def run(self, question: Dict[str, Any]) -> List[str]:
+        """Issues every check finds in a question"""
+        normalized = self.normalize(question)
+        issues = []
+        for evaluators in self.checks.values():
+            for evaluate in evaluators:
+                evaluate(normalized, issues)
+        return issues
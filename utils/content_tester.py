@@ -4,12 +4,134 @@ Content Quality Testing Script
 Tests and validates generated quiz content for medical accuracy and quality
 """
 
+import argparse
+import asyncio
+import cProfile
+import io
 import json
-import re
+import os
+import pstats
+import random
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Callable, Iterable, Iterator, Optional
 import sys
 
+from content_rules import RuleRegistry
+from js_data_loader import load_js_array, add_cache_arguments, apply_cache_arguments
+from mapped_bank import iter_mapped_questions
+from question_io import STDIO_PATH, batched, expand_input_paths, is_jsonl_path, iter_question_file, jsonl_writer, status_to_stderr
+from result_cache import QuestionResultCache, default_result_cache_path
+
+# Bump when test logic changes so incremental result caches are invalidated
+CONTENT_RULES_VERSION = 2
+
+# Mersenne prime modulus for the MinHash universal hash family
+MINHASH_PRIME = (1 << 61) - 1
+
+class CheckStats:
+    """Cumulative calls, time, issues and flagged questions per question check"""
+    
+    __slots__ = ("counters",)
+    
+    def __init__(self):
+        self.counters: Dict[str, List[Any]] = {}
+    
+    def counter(self, name: str) -> List[Any]:
+        """Mutable [calls, seconds, issues, flagged] counters of one check"""
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = [0, 0.0, 0, 0]
+        return counter
+    
+    def merge(self, other: "CheckStats"):
+        """Add another run's counters, e.g. from a worker process"""
+        for name, counter in other.counters.items():
+            totals = self.counter(name)
+            for k, value in enumerate(counter):
+                totals[k] += value
+    
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Counters per check, with mean latency and share of total check time"""
+        total_seconds = sum(counter[1] for counter in self.counters.values())
+        return {
+            name: {
+                "calls": calls,
+                "seconds": seconds,
+                "mean_us": seconds / calls * 1e6 if calls else 0.0,
+                "time_share": seconds / total_seconds * 100 if total_seconds else 0.0,
+                "issues": issues,
+                "questions_flagged": flagged
+            }
+            for name, (calls, seconds, issues, flagged) in self.counters.items()
+        }
+
+class RunProfiler:
+    """Opt-in cProfile and tracemalloc capture around a block of work
+    
+    Only the current process is observed, so checks run in worker processes
+    show up in the per-check counters but not in the profile.
+    """
+    
+    def __init__(self, cprofile: bool = False, trace_memory: bool = False, top: int = 15):
+        self.profiler = cProfile.Profile() if cprofile else None
+        self.trace_memory = trace_memory
+        self.top = top
+        self.memory = None
+        self._baseline = None
+        self._started_tracing = False
+    
+    def __enter__(self) -> "RunProfiler":
+        if self.trace_memory:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.take_snapshot()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            growth = tracemalloc.take_snapshot().compare_to(self._baseline, "lineno")
+            if self._started_tracing:
+                tracemalloc.stop()
+            self.memory = {
+                "current_kb": current / 1024,
+                "peak_kb": peak / 1024,
+                "top_allocations": [
+                    {"location": str(stat.traceback), "size_kb": stat.size_diff / 1024, "count": stat.count_diff}
+                    for stat in growth[:self.top]
+                ]
+            }
+    
+    def summary(self) -> Dict[str, Any]:
+        """Top functions by cumulative time and memory figures, for results["summary"]"""
+        summary = {}
+        if self.profiler is not None:
+            stats = pstats.Stats(self.profiler)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+            summary["cprofile"] = [
+                {"function": f"{filename}:{line}({function})", "calls": calls, "total_seconds": total,
+                 "cumulative_seconds": cumulative}
+                for (filename, line, function), (_, calls, total, cumulative, _) in rows
+            ]
+        if self.memory is not None:
+            summary["tracemalloc"] = self.memory
+        return summary
+    
+    def dump_stats(self, filename: str):
+        """Write the cProfile stats for pstats or snakeviz"""
+        if self.profiler is not None:
+            self.profiler.dump_stats(filename)
+
 class ContentTester:
     def __init__(self):
         # Medical accuracy checks
@@ -78,137 +200,190 @@ class ContentTester:
                 "vre": ["vancomycin", "teicoplanin"]
             }
         }
+        
+        # How each common_errors table is enforced: where its drugs and its key
+        # (co-prescribed drug, condition or organism) must appear, wording that
+        # shows the question already deals with the problem, and the issue
+        self.common_error_checks = {
+            "drug_interactions": {
+                "drug_scope": "any",
+                "key_scope": "any",
+                "addressed_by": ["interaction", "inr", "level", "monitor", "toxicity"],
+                "message": "Interaction between {key} and {drug} not addressed"
+            },
+            "contraindications": {
+                "drug_scope": "answer",
+                "key_scope": "question",
+                "addressed_by": ["avoid", "contraindicat", "should not", "not recommended", "adjust", "monitor"],
+                "message": "Answer recommends {drug} despite {key}"
+            },
+            "resistance_patterns": {
+                "drug_scope": "answer",
+                "key_scope": "question",
+                "addressed_by": ["resistant to", "ineffective", "not effective", "inactive", "avoid",
+                                 "low suspicion", "low risk", "susceptible", "mssa"],
+                "message": "Answer recommends {drug}, which is ineffective against {key}"
+            }
+        }
+        
+        # Phrases that identify a common_errors key in question text; other keys
+        # are matched by their name with underscores as spaces
+        self.common_error_terms = {
+            "penicillin_allergy": ["penicillin allergy", "allergic to penicillin", "penicillin-allergic",
+                                   "penicillin allergic"],
+            "pregnancy": ["pregnan"],
+            "renal_impairment": ["renal impairment", "renal failure", "renal insufficiency",
+                                 "kidney injury", "kidney disease", "ckd"],
+            "mrsa": ["mrsa", "methicillin-resistant"],
+            "esbl": ["esbl", "extended-spectrum beta-lactamase"],
+            "vre": ["vre", "vancomycin-resistant"]
+        }
+        
+        # Checks declared as data over the tables above, compiled into one plan
+        self.rules = RuleRegistry(self.default_rules())
+        self.plan = self.rules.compile()
+    
+    def default_rules(self) -> List[Dict[str, Any]]:
+        """Rule declarations for the built-in checks, in the order issues are reported"""
+        clarity = self.quality_standards["question_clarity"]
+        return [
+            # Medical accuracy: terminology needs a matching clinical context in the question
+            {"check": "test_medical_accuracy", "kind": "each_term",
+             "terms": self.medical_checks["antibiotic_names"], "fields": ["question", "explanation"],
+             "unless_any": ["therapy", "treatment", "antibiotic"],
+             "message": "Antibiotic '{term}' mentioned without proper clinical context"},
+            {"check": "test_medical_accuracy", "kind": "each_term",
+             "terms": self.medical_checks["pathogen_names"], "fields": ["question", "explanation"],
+             "unless_any": ["pathogen", "bacteria", "organism", "infection"],
+             "message": "Pathogen '{term}' mentioned without proper clinical context"},
+            # Drug-bug mismatch
+            {"check": "test_medical_accuracy", "kind": "terms",
+             "when_any": [["mrsa"], ["penicillin", "amoxicillin", "cephalexin"]],
+             "message": "MRSA mentioned with beta-lactam antibiotics that would be ineffective"},
+            {"check": "test_medical_accuracy", "kind": "terms",
+             "when_any": [["esbl"], ["ceftriaxone", "ceftazidime"]],
+             "message": "ESBL mentioned with cephalosporins that would be ineffective"},
+            # Dosing errors
+            {"check": "test_medical_accuracy", "kind": "dose_limit",
+             "pattern": r"(\d+)\s*(mg|g|units)", "limits": {"g": 10, "mg": 5000},
+             "message": "Unusually high dose: {value}{unit}"},
+            
+            # Question quality
+            {"check": "test_question_quality", "kind": "word_count", "field": "question", "min": 10,
+             "message": "Question too short - may lack sufficient clinical context"},
+            {"check": "test_question_quality", "kind": "word_count", "field": "question", "max": 100,
+             "message": "Question too long - may be difficult to process"},
+            {"check": "test_question_quality", "kind": "each_term", "terms": clarity["avoid_ambiguous"],
+             "message": "Ambiguous language detected: '{term}'"},
+            {"check": "test_question_quality", "kind": "option_count", "min": 3,
+             "message": "Too few answer options - should have at least 3"},
+            {"check": "test_question_quality", "kind": "option_count", "max": 5,
+             "message": "Too many answer options - should have at most 5"},
+            {"check": "test_question_quality", "kind": "similar_options", "threshold": 0.8,
+             "message": "Options {first} and {second} are too similar"},
+            {"check": "test_question_quality", "kind": "word_count", "field": "explanation", "min": 15,
+             "message": "Explanation too short - should provide more detail"},
+            {"check": "test_question_quality", "kind": "terms", "field": "explanation",
+             "unless_any": ["because", "due to", "since", "as"],
+             "message": "Explanation lacks causal reasoning"},
+            
+            # Difficulty appropriateness
+            {"check": "test_difficulty_appropriateness", "kind": "each_term", "where": {"difficulty": "beginner"},
+             "terms": ["resistance", "mechanism", "pharmacokinetics", "bioavailability"],
+             "fields": ["question", "explanation"],
+             "message": "Beginner question contains advanced term: '{term}'"},
+            {"check": "test_difficulty_appropriateness", "kind": "terms", "where": {"difficulty": "advanced"},
+             "when_any": [["common", "typical", "standard", "usual"]],
+             "unless_any": ["resistance", "mechanism", "complicated", "multiple"],
+             "message": "Advanced question may be too simple"},
+            
+            # Resistance scenarios
+            {"check": "test_resistance_scenarios", "kind": "terms",
+             "where": {"category": "Antibiotic Resistance Scenarios"},
+             "when_any": [["mrsa"]], "unless_any": ["vancomycin", "linezolid"], "unless_field": "explanation",
+             "message": "MRSA scenario should mention appropriate anti-MRSA therapy"},
+            {"check": "test_resistance_scenarios", "kind": "terms",
+             "where": {"category": "Antibiotic Resistance Scenarios"},
+             "when_any": [["esbl"]], "unless_any": ["carbapenem", "meropenem"], "unless_field": "explanation",
+             "message": "ESBL scenario should mention carbapenem therapy"},
+            {"check": "test_resistance_scenarios", "kind": "terms",
+             "where": {"category": "Antibiotic Resistance Scenarios"},
+             "when_any": [["vre"]], "unless_any": ["linezolid", "daptomycin"], "unless_field": "explanation",
+             "message": "VRE scenario should mention appropriate anti-VRE therapy"},
+            
+            # Interactions, contraindications and resistance from common_errors
+            {"check": "test_common_errors", "kind": "term_index", "entries": self.common_error_entries()}
+        ]
+    
+    def common_error_entries(self) -> List[Dict[str, Any]]:
+        """Index entries for every (table, key, drug) in common_errors"""
+        entries = []
+        for table, rules in self.common_errors.items():
+            check = self.common_error_checks[table]
+            for key, drugs in rules.items():
+                name = key.replace("_", " ")
+                label = name.upper() if table == "resistance_patterns" else name
+                triggers = self.common_error_terms.get(key, [name])
+                for drug in drugs:
+                    entries.append({
+                        "term": drug,
+                        "term_scope": check["drug_scope"],
+                        "triggers": triggers,
+                        "trigger_scope": check["key_scope"],
+                        "addressed_by": check["addressed_by"],
+                        "message": check["message"].format(key=label, drug=drug)
+                    })
+        return entries
+    
+    def load_common_errors(self, filepath: str):
+        """Merge interaction, contraindication and resistance rules from a JSON file and recompile
+        
+        The file has the shape of common_errors, optionally with a "terms"
+        table in the shape of common_error_terms, e.g.
+        {"drug_interactions": {"methotrexate": ["trimethoprim-sulfamethoxazole"]},
+         "terms": {"methotrexate": ["methotrexate", "mtx"]}}
+        """
+        with open(filepath) as f:
+            loaded = json.load(f)
+        for key, phrases in loaded.pop("terms", {}).items():
+            known = self.common_error_terms.setdefault(key, [])
+            known.extend(phrase for phrase in phrases if phrase not in known)
+        for table, rules in loaded.items():
+            if table not in self.common_error_checks:
+                raise ValueError(f"Unknown common_errors table '{table}' in {filepath}")
+            for key, drugs in rules.items():
+                known = self.common_errors[table].setdefault(key, [])
+                known.extend(drug for drug in drugs if drug not in known)
+        
+        for rule in self.rules.rules:
+            if rule["check"] == "test_common_errors" and rule["kind"] == "term_index":
+                rule["entries"] = self.common_error_entries()
+        self.plan = self.rules.compile()
+    
+    def add_rules(self, rules: List[Dict[str, Any]]):
+        """Declare extra rules and recompile the plan"""
+        self.rules.extend(rules)
+        self.plan = self.rules.compile()
     
     def test_medical_accuracy(self, question: Dict[str, Any]) -> List[str]:
         """Test medical accuracy of a question"""
-        issues = []
-        
-        question_text = question.get("question", "").lower()
-        explanation = question.get("explanation", "").lower()
-        options = [opt.lower() for opt in question.get("options", [])]
-        
-        # Check for medical terminology accuracy
-        for category, terms in self.medical_checks.items():
-            for term in terms:
-                if term in question_text or term in explanation:
-                    # Verify proper usage context
-                    if category == "antibiotic_names":
-                        if not any(context in question_text for context in ["therapy", "treatment", "antibiotic"]):
-                            issues.append(f"Antibiotic '{term}' mentioned without proper clinical context")
-                    elif category == "pathogen_names":
-                        if not any(context in question_text for context in ["pathogen", "bacteria", "organism", "infection"]):
-                            issues.append(f"Pathogen '{term}' mentioned without proper clinical context")
-        
-        # Check for drug-bug mismatch
-        if "mrsa" in question_text and any(drug in question_text for drug in ["penicillin", "amoxicillin", "cephalexin"]):
-            issues.append("MRSA mentioned with beta-lactam antibiotics that would be ineffective")
-        
-        if "esbl" in question_text and any(drug in question_text for drug in ["ceftriaxone", "ceftazidime"]):
-            issues.append("ESBL mentioned with cephalosporins that would be ineffective")
-        
-        # Check for dosing errors
-        dosing_pattern = re.search(r'(\d+)\s*(mg|g|units)', question_text)
-        if dosing_pattern:
-            dose_value = int(dosing_pattern.group(1))
-            dose_unit = dosing_pattern.group(2)
-            if dose_unit == "g" and dose_value > 10:
-                issues.append(f"Unusually high dose: {dose_value}{dose_unit}")
-            elif dose_unit == "mg" and dose_value > 5000:
-                issues.append(f"Unusually high dose: {dose_value}{dose_unit}")
-        
-        return issues
+        return self.plan.run_check("test_medical_accuracy", self.plan.normalize(question))
     
     def test_question_quality(self, question: Dict[str, Any]) -> List[str]:
         """Test question quality and construction"""
-        issues = []
-        
-        question_text = question.get("question", "")
-        explanation = question.get("explanation", "")
-        options = question.get("options", [])
-        
-        # Check question clarity
-        if len(question_text.split()) < 10:
-            issues.append("Question too short - may lack sufficient clinical context")
-        
-        if len(question_text.split()) > 100:
-            issues.append("Question too long - may be difficult to process")
-        
-        # Check for ambiguous language
-        for ambiguous_word in self.quality_standards["question_clarity"]["avoid_ambiguous"]:
-            if ambiguous_word in question_text.lower():
-                issues.append(f"Ambiguous language detected: '{ambiguous_word}'")
-        
-        # Check answer options
-        if len(options) < 3:
-            issues.append("Too few answer options - should have at least 3")
-        
-        if len(options) > 5:
-            issues.append("Too many answer options - should have at most 5")
-        
-        # Check for option similarity
-        for i, option1 in enumerate(options):
-            for j, option2 in enumerate(options[i+1:], i+1):
-                similarity = self.calculate_similarity(option1, option2)
-                if similarity > 0.8:
-                    issues.append(f"Options {i+1} and {j+1} are too similar")
-        
-        # Check explanation quality
-        if len(explanation.split()) < 15:
-            issues.append("Explanation too short - should provide more detail")
-        
-        if not any(word in explanation.lower() for word in ["because", "due to", "since", "as"]):
-            issues.append("Explanation lacks causal reasoning")
-        
-        return issues
+        return self.plan.run_check("test_question_quality", self.plan.normalize(question))
     
     def test_difficulty_appropriateness(self, question: Dict[str, Any]) -> List[str]:
         """Test if difficulty level matches question complexity"""
-        issues = []
-        
-        difficulty = question.get("difficulty", "intermediate")
-        question_text = question.get("question", "").lower()
-        explanation = question.get("explanation", "").lower()
-        
-        # Beginner level checks
-        if difficulty == "beginner":
-            advanced_terms = ["resistance", "mechanism", "pharmacokinetics", "bioavailability"]
-            for term in advanced_terms:
-                if term in question_text or term in explanation:
-                    issues.append(f"Beginner question contains advanced term: '{term}'")
-        
-        # Advanced level checks
-        elif difficulty == "advanced":
-            basic_terms = ["common", "typical", "standard", "usual"]
-            advanced_indicators = ["resistance", "mechanism", "complicated", "multiple"]
-            
-            if any(term in question_text for term in basic_terms):
-                if not any(term in question_text for term in advanced_indicators):
-                    issues.append("Advanced question may be too simple")
-        
-        return issues
+        return self.plan.run_check("test_difficulty_appropriateness", self.plan.normalize(question))
     
     def test_resistance_scenarios(self, question: Dict[str, Any]) -> List[str]:
         """Test resistance scenario accuracy"""
-        issues = []
-        
-        if question.get("category") == "Antibiotic Resistance Scenarios":
-            question_text = question.get("question", "").lower()
-            explanation = question.get("explanation", "").lower()
-            
-            # Check for resistance pattern accuracy
-            if "mrsa" in question_text:
-                if "vancomycin" not in explanation and "linezolid" not in explanation:
-                    issues.append("MRSA scenario should mention appropriate anti-MRSA therapy")
-            
-            if "esbl" in question_text:
-                if "carbapenem" not in explanation and "meropenem" not in explanation:
-                    issues.append("ESBL scenario should mention carbapenem therapy")
-            
-            if "vre" in question_text:
-                if "linezolid" not in explanation and "daptomycin" not in explanation:
-                    issues.append("VRE scenario should mention appropriate anti-VRE therapy")
-        
-        return issues
+        return self.plan.run_check("test_resistance_scenarios", self.plan.normalize(question))
+    
+    def test_common_errors(self, question: Dict[str, Any]) -> List[str]:
+        """Test for drug interactions, contraindications and resistance listed in common_errors"""
+        return self.plan.run_check("test_common_errors", self.plan.normalize(question))
     
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two text strings"""
@@ -220,10 +395,163 @@ class ContentTester:
         
         return len(intersection) / len(union) if union else 0
     
-    def test_question_set(self, questions: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Test a complete set of questions"""
+    def find_near_duplicate_questions(self, questions: List[Dict[str, Any]], threshold: float = 0.8,
+                                      num_hashes: int = 64, bands: int = 16) -> List[List[int]]:
+        """Group near-duplicate questions across a whole bank using MinHash/LSH
+        
+        Each distinct question word set gets a MinHash signature; signatures are
+        split into bands and only sets sharing a band bucket are compared
+        exactly. Returns groups of 1-based question indices whose questions are
+        linked by word-set similarity of at least threshold.
+        """
+        rows = num_hashes // bands
+        rng = random.Random(0)
+        hash_params = [(rng.randrange(1, MINHASH_PRIME), rng.randrange(MINHASH_PRIME)) for _ in range(rows * bands)]
+        
+        # Collapse exact duplicates first; generated banks repeat word sets heavily
+        token_ids = {}
+        set_indices = {}
+        members = []
+        for index, question in enumerate(questions, 1):
+            tokens = frozenset(
+                token_ids.setdefault(token, len(token_ids))
+                for token in question.get("question", "").lower().split()
+            )
+            if not tokens:
+                continue  # No words to compare, as in calculate_similarity
+            if tokens not in set_indices:
+                set_indices[tokens] = len(members)
+                members.append([])
+            members[set_indices[tokens]].append(index)
+        token_sets = list(set_indices)
+        
+        token_hashes = {}
+        parent = list(range(len(token_sets)))
+        
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+        
+        # Each band bucket keeps one representative per cluster it has seen, so
+        # large families of near-duplicates cost one exact comparison per member
+        buckets = {}
+        for set_index, tokens in enumerate(token_sets):
+            for token in tokens:
+                if token not in token_hashes:
+                    token_hashes[token] = [(a * token + b) % MINHASH_PRIME for a, b in hash_params]
+            signature = [min(column) for column in zip(*(token_hashes[token] for token in tokens))]
+            for band in range(bands):
+                key = (band, tuple(signature[band * rows:(band + 1) * rows]))
+                representatives = buckets.setdefault(key, [])
+                linked = False
+                for other in representatives:
+                    if find(other) == find(set_index):
+                        linked = True
+                        break
+                    other_tokens = token_sets[other]
+                    if len(tokens & other_tokens) / len(tokens | other_tokens) >= threshold:
+                        parent[find(other)] = find(set_index)
+                        linked = True
+                        break
+                if not linked:
+                    representatives.append(set_index)
+        
+        groups = {}
+        for set_index, indices in enumerate(members):
+            groups.setdefault(find(set_index), []).extend(indices)
+        return sorted(sorted(indices) for indices in groups.values() if len(indices) > 1)
+    
+    def test_question(self, question: Dict[str, Any], check_stats: Optional[CheckStats] = None) -> List[str]:
+        """Run every per-question test on one question
+        
+        The question is normalized once and shared by every check. With
+        check_stats, normalization and each check are timed and their calls
+        and issues counted.
+        """
+        if check_stats is None:
+            return self.plan.run(question)
+        
+        start = time.perf_counter()
+        normalized = self.plan.normalize(question)
+        counter = check_stats.counter("normalize_question")
+        counter[0] += 1
+        counter[1] += time.perf_counter() - start
+        
+        question_issues = []
+        for name in self.plan.checks:
+            start = time.perf_counter()
+            issues = self.plan.run_check(name, normalized)
+            counter = check_stats.counter(name)
+            counter[0] += 1
+            counter[1] += time.perf_counter() - start
+            if issues:
+                counter[2] += len(issues)
+                counter[3] += 1
+                question_issues.extend(issues)
+        return question_issues
+    
+    def test_question_chunk(self, questions: List[Dict[str, Any]],
+                            check_stats: Optional[CheckStats] = None) -> List[List[str]]:
+        """Test a slice of a question set, returning one issue list per question"""
+        return [self.test_question(question, check_stats) for question in questions]
+    
+    def collect_question_issues(self, questions: List[Dict[str, Any]], workers: Optional[int] = None,
+                                chunk_size: int = 5000,
+                                check_stats: Optional[CheckStats] = None) -> List[List[str]]:
+        """Test questions serially or in a process pool, keeping question order"""
+        if not (workers and workers > 1 and len(questions) > chunk_size):
+            return self.test_question_chunk(questions, check_stats)
+        
+        question_issues = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as executor:
+            chunks = (questions[offset:offset + chunk_size] for offset in range(0, len(questions), chunk_size))
+            for chunk_issues, chunk_stats in executor.map(_test_chunk, chunks):
+                question_issues.extend(chunk_issues)
+                if check_stats is not None:
+                    check_stats.merge(chunk_stats)
+        return question_issues
+    
+    def cache_rules(self) -> Dict[str, Any]:
+        """Configuration that test results depend on, for result caches"""
+        return {
+            "version": CONTENT_RULES_VERSION,
+            "medical_checks": self.medical_checks,
+            "quality_standards": self.quality_standards,
+            "common_errors": self.common_errors,
+            "common_error_checks": self.common_error_checks,
+            "common_error_terms": self.common_error_terms,
+            "rules": self.rules.rules
+        }
+    
+    def test_question_set(self, questions: List[Dict[str, Any]], workers: Optional[int] = None,
+                          chunk_size: int = 5000,
+                          result_cache: Optional[QuestionResultCache] = None) -> Dict[str, Any]:
+        """Test a complete set of questions
+        
+        With workers > 1, chunks of questions are tested in a process pool and
+        the issues are merged back in question order. With a result_cache, only
+        questions that are new or changed since the cached run are tested. Either
+        way the results are identical to a plain serial run.
+        """
+        return self.test_question_stream(questions, max(len(questions), 1), workers, chunk_size, result_cache)
+    
+    def test_question_stream(self, questions: Iterable[Dict[str, Any]], batch_size: int = 5000,
+                             workers: Optional[int] = None, chunk_size: int = 5000,
+                             result_cache: Optional[QuestionResultCache] = None,
+                             issue_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             max_kept_issues: Optional[int] = None) -> Dict[str, Any]:
+        """Test questions from any iterable, batch_size questions at a time
+        
+        Each issue entry is passed to issue_sink as soon as its batch is tested.
+        max_kept_issues caps how many entries are kept in results["issues"], so
+        a long stream is tested in bounded memory; the counts still cover
+        every question. results["summary"]["checks"] holds per-check calls,
+        time and issues for the questions actually tested (not cache hits).
+        """
         results = {
-            "total_questions": len(questions),
+            "total_questions": 0,
             "passed": 0,
             "failed": 0,
             "issues": [],
@@ -231,42 +559,59 @@ class ContentTester:
             "recommendations": []
         }
         
-        for i, question in enumerate(questions):
-            question_issues = []
-            
-            # Run all tests
-            question_issues.extend(self.test_medical_accuracy(question))
-            question_issues.extend(self.test_question_quality(question))
-            question_issues.extend(self.test_difficulty_appropriateness(question))
-            question_issues.extend(self.test_resistance_scenarios(question))
-            
-            if question_issues:
-                results["failed"] += 1
-                results["issues"].append({
-                    "question_index": i + 1,
-                    "question": question.get("question", "")[:100] + "...",
-                    "issues": question_issues
-                })
-            else:
-                results["passed"] += 1
-        
-        # Generate summary statistics
         difficulty_dist = {}
         category_dist = {}
+        check_stats = CheckStats()
         
-        for question in questions:
-            difficulty = question.get("difficulty", "unknown")
-            category = question.get("category", "unknown")
+        for batch in batched(questions, batch_size):
+            if result_cache is None:
+                question_issues = self.collect_question_issues(batch, workers, chunk_size, check_stats)
+            else:
+                question_issues = []
+                missing = []
+                for i, question in enumerate(batch):
+                    key, cached_issues = result_cache.lookup(question)
+                    question_issues.append(cached_issues)
+                    if cached_issues is None:
+                        missing.append((i, key))
+                
+                computed = self.collect_question_issues([batch[i] for i, _ in missing], workers, chunk_size,
+                                                        check_stats)
+                for (i, key), issues in zip(missing, computed):
+                    question_issues[i] = issues
+                    result_cache.store(key, issues)
+            
+            for i, (question, issues) in enumerate(zip(batch, question_issues), results["total_questions"]):
+                # Generate summary statistics
+                difficulty = question.get("difficulty", "unknown")
+                category = question.get("category", "unknown")
+                
+                difficulty_dist[difficulty] = difficulty_dist.get(difficulty, 0) + 1
+                category_dist[category] = category_dist.get(category, 0) + 1
+                
+                if issues:
+                    entry = {
+                        "question_index": i + 1,
+                        "question": question.get("question", "")[:100] + "...",
+                        "issues": issues
+                    }
+                    results["failed"] += 1
+                    if max_kept_issues is None or len(results["issues"]) < max_kept_issues:
+                        results["issues"].append(entry)
+                    if issue_sink is not None:
+                        issue_sink(entry)
             
-            difficulty_dist[difficulty] = difficulty_dist.get(difficulty, 0) + 1
-            category_dist[category] = category_dist.get(category, 0) + 1
+            results["total_questions"] += len(batch)
+        
+        results["passed"] = results["total_questions"] - results["failed"]
         
         pass_rate = (results["passed"] / results["total_questions"]) * 100 if results["total_questions"] > 0 else 0
         
         results["summary"] = {
             "difficulty_distribution": difficulty_dist,
             "category_distribution": category_dist,
-            "pass_rate": pass_rate
+            "pass_rate": pass_rate,
+            "checks": check_stats.summary()
         }
         
         # Generate recommendations
@@ -281,23 +626,14 @@ class ContentTester:
         
         return results
     
-    def load_questions_from_file(self, filepath: str) -> List[Dict[str, Any]]:
-        """Load questions from JavaScript file"""
+    def load_questions_from_file(self, filepath: str, status: Callable[[str], None] = print) -> List[Dict[str, Any]]:
+        """Load questions from JavaScript file, or from a JSON Lines file"""
         try:
-            with open(filepath, 'r') as f:
-                content = f.read()
-            
-            # Extract JSON array
-            if "const " in content and " = " in content:
-                start_marker = content.find(" = [") + 3
-                end_marker = content.rfind("];")
-                json_content = content[start_marker:end_marker + 1]
-                return json.loads(json_content)
-            
-            return []
-            
+            if is_jsonl_path(filepath):
+                return list(iter_question_file(filepath))
+            return load_js_array(filepath)
         except Exception as e:
-            print(f"Error loading questions from {filepath}: {e}")
+            status(f"Error loading questions from {filepath}: {e}")
             return []
     
     def generate_test_report(self, results: Dict[str, Any]) -> str:
@@ -325,6 +661,26 @@ Failed: {results['failed']} ({100 - results['summary']['pass_rate']:.1f}%)
             percentage = (count / results['total_questions']) * 100
             report += f"{category}: {count} ({percentage:.1f}%)\n"
         
+        checks = results['summary'].get('checks')
+        if checks:
+            report += "\n=== CHECK PROFILE ===\n"
+            for name, check in sorted(checks.items(), key=lambda item: item[1]['seconds'], reverse=True):
+                report += (f"{name}: {check['calls']} calls, {check['seconds'] * 1000:.1f} ms "
+                           f"({check['time_share']:.1f}%), {check['mean_us']:.1f} us/call, "
+                           f"{check['issues']} issues in {check['questions_flagged']} questions\n")
+        
+        profile = results['summary'].get('profile', {})
+        if profile.get('cprofile'):
+            report += "\n=== CPROFILE (TOP FUNCTIONS BY CUMULATIVE TIME) ===\n"
+            for row in profile['cprofile']:
+                report += f"{row['cumulative_seconds']:.3f}s cumulative, {row['calls']} calls: {row['function']}\n"
+        if profile.get('tracemalloc'):
+            memory = profile['tracemalloc']
+            report += "\n=== TRACEMALLOC ===\n"
+            report += f"Peak traced memory: {memory['peak_kb']:.1f} KB\n"
+            for row in memory['top_allocations']:
+                report += f"{row['size_kb']:+.1f} KB ({row['count']:+d} blocks): {row['location']}\n"
+        
         report += "\n=== IDENTIFIED ISSUES ===\n"
         if results['issues']:
             for issue_set in results['issues'][:10]:  # Show top 10 issues
@@ -334,6 +690,18 @@ Failed: {results['failed']} ({100 - results['summary']['pass_rate']:.1f}%)
         else:
             report += "No issues found! All questions passed quality checks.\n"
         
+        if "near_duplicates" in results:
+            report += "\n=== NEAR-DUPLICATE QUESTIONS ===\n"
+            if results['near_duplicates']:
+                for group in results['near_duplicates'][:10]:  # Show top 10 groups
+                    members = group['question_indices']
+                    indices = ", ".join(str(index) for index in members[:10])
+                    if len(members) > 10:
+                        indices += f" and {len(members) - 10} more"
+                    report += f"\nQuestions {indices}: {group['question']}\n"
+            else:
+                report += "No near-duplicate questions found.\n"
+        
         report += "\n=== RECOMMENDATIONS ===\n"
         if results['recommendations']:
             for rec in results['recommendations']:
@@ -349,43 +717,221 @@ Failed: {results['failed']} ({100 - results['summary']['pass_rate']:.1f}%)
             json.dump(results, f, indent=2)
         print(f"Test results saved to {filename}")
 
-def main():
-    """Main testing function"""
-    tester = ContentTester()
+# Per-process tester used by test_question_set workers
+_worker_tester = None
+
+def _init_worker(tester: ContentTester):
+    """Install the parent's tester in a worker process"""
+    global _worker_tester
+    _worker_tester = tester
+
+def _test_chunk(questions: List[Dict[str, Any]]) -> Tuple[List[List[str]], CheckStats]:
+    """Test one chunk of questions in a worker process, with that chunk's check counters"""
+    check_stats = CheckStats()
+    return _worker_tester.test_question_chunk(questions, check_stats), check_stats
+
+def result_file_stem(filename: str) -> str:
+    """Name fragment for files written per input, e.g. test_results_<stem>.json"""
+    return "stdin" if filename == STDIO_PATH else filename.replace("/", "_").replace(".", "_")
+
+def _collect_question_texts(questions: Iterable[Dict[str, Any]],
+                            texts: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Pass questions through, keeping each one's question text for near-duplicate detection"""
+    for question in questions:
+        texts.append({"question": question.get("question", "")})
+        yield question
+
+def test_file(tester: ContentTester, filename: str, args: argparse.Namespace,
+              issue_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+              max_kept_issues: Optional[int] = None,
+              status: Callable[[str], None] = print) -> Optional[Dict[str, Any]]:
+    """Load and test one input file with main's options, returning None if no questions were loaded"""
+    status(f"\nTesting {filename}...")
     
-    # Test files to check
-    test_files = [
-        "new_quiz_questions.js",
-        "resistance_scenarios.js",
-        "src/data/quizQuestionsWithDifficulty.js"
-    ]
+    result_cache = None
+    if args.incremental:
+        result_cache = QuestionResultCache(default_result_cache_path("content_tester", filename),
+                                           tester.cache_rules())
     
-    all_results = {}
+    # Near-duplicate detection needs the whole bank; streamed inputs keep only the question texts
+    question_texts = [] if args.near_duplicates else None
     
-    for filename in test_files:
-        print(f"\nTesting {filename}...")
-        questions = tester.load_questions_from_file(filename)
-        
-        if questions:
-            results = tester.test_question_set(questions)
-            all_results[filename] = results
-            
-            print(f"  Loaded {len(questions)} questions")
-            print(f"  Pass rate: {results['summary']['pass_rate']:.1f}%")
-            print(f"  Issues found: {len(results['issues'])}")
+    profiler = RunProfiler(args.profile, args.trace_memory)
+    with profiler:
+        if is_jsonl_path(filename) or args.mmap:
+            # Test records as they arrive
+            mapped = args.mmap and filename != STDIO_PATH
+            questions = iter_mapped_questions(filename) if mapped else iter_question_file(filename)
+            if question_texts is not None:
+                questions = _collect_question_texts(questions, question_texts)
+            try:
+                results = tester.test_question_stream(
+                    questions,
+                    result_cache=result_cache, issue_sink=issue_sink, max_kept_issues=max_kept_issues
+                )
+            except Exception as e:
+                status(f"Error loading questions from {filename}: {e}")
+                return None
+            loaded = results["total_questions"]
         else:
-            print(f"  No questions found in {filename}")
+            questions = tester.load_questions_from_file(filename, status)
+            loaded = len(questions)
+            if questions:
+                results = tester.test_question_stream(questions, max(len(questions), 1),
+                                                      result_cache=result_cache, issue_sink=issue_sink)
+            if question_texts is not None:
+                question_texts = questions
     
-    # Generate comprehensive report
-    if all_results:
-        print("\n=== GENERATING COMPREHENSIVE REPORT ===")
-        
-        # Combine all results
-        total_questions = sum(r['total_questions'] for r in all_results.values())
-        total_passed = sum(r['passed'] for r in all_results.values())
-        total_failed = sum(r['failed'] for r in all_results.values())
-        
-        combined_report = f"""
+    if not loaded:
+        status(f"  No questions found in {filename}")
+        return None
+    
+    if args.profile or args.trace_memory:
+        results["summary"]["profile"] = profiler.summary()
+        if args.profile:
+            profile_path = f"profile_{result_file_stem(filename)}.prof"
+            profiler.dump_stats(profile_path)
+            status(f"Profile saved to {profile_path}")
+    
+    if question_texts is not None:
+        groups = tester.find_near_duplicate_questions(question_texts)
+        results["near_duplicates"] = [
+            {"question_indices": group, "question": question_texts[group[0] - 1].get("question", "")}
+            for group in groups
+        ]
+        results["summary"]["near_duplicate_groups"] = len(groups)
+    
+    status(f"  Loaded {loaded} questions")
+    if result_cache is not None:
+        result_cache.save()
+        status(f"  Incremental run: {result_cache.misses} questions tested, {result_cache.hits} reused")
+    status(f"  Pass rate: {results['summary']['pass_rate']:.1f}%")
+    status(f"  Issues found: {results['failed']}")
+    if question_texts is not None:
+        status(f"  Near-duplicate groups: {len(results['near_duplicates'])}")
+    return results
+
+def _test_file_job(filename: str, args: argparse.Namespace,
+                   tester: Optional[ContentTester] = None) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Test one file in an executor, returning its results and the status lines to print"""
+    lines = []
+    results = test_file(tester or _worker_tester, filename, args, status=lines.append)
+    return results, lines
+
+async def test_files_concurrently(tester: ContentTester, test_files: List[str], args: argparse.Namespace,
+                                  write_issue: Optional[Callable[[Dict[str, Any]], None]] = None
+                                  ) -> Dict[str, Dict[str, Any]]:
+    """Load and test every file at once, saving each file's results as soon as it finishes
+    
+    Files are loaded, parsed and tested in a process pool (or a thread pool
+    with --executor thread), up to --jobs at a time. As each file finishes its
+    status lines are printed, its issues are written to --output and its
+    results file is saved off the event loop. Returns results in input order.
+    """
+    loop = asyncio.get_running_loop()
+    if args.executor == "process":
+        executor = ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(tester,))
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.jobs)
+    
+    async def run(filename: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        if args.executor == "process" and filename != STDIO_PATH:
+            job = loop.run_in_executor(executor, _test_file_job, filename, args)
+        else:
+            # Threads share this process's tester, and only this process can read stdin
+            job = loop.run_in_executor(executor if args.executor == "thread" else None,
+                                       _test_file_job, filename, args, tester)
+        results, lines = await job
+        for line in lines:
+            print(line)
+        if results is not None:
+            if write_issue is not None:
+                for entry in results["issues"]:
+                    write_issue({"source": filename, **entry})
+            await loop.run_in_executor(None, tester.save_test_results, results,
+                                       f"test_results_{result_file_stem(filename)}.json")
+        return filename, results
+    
+    with executor:
+        finished = dict(await asyncio.gather(*(run(filename) for filename in test_files)))
+    return {filename: finished[filename] for filename in test_files if finished[filename] is not None}
+
+def main():
+    """Main testing function"""
+    parser = argparse.ArgumentParser(description="Test generated quiz content for medical accuracy and quality")
+    parser.add_argument("--input", action="append",
+                        help="file or glob of files to test (repeatable, ** included); .jsonl or - (stdin) "
+                             "streams JSON Lines. "
+                             "Defaults to the generated and classified question files")
+    parser.add_argument("--output",
+                        help="also write every issue entry as JSON Lines to this file, or - for stdout")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse cached results for questions unchanged since the last run")
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map input files and decode questions one at a time, for banks larger than RAM")
+    parser.add_argument("--common-errors", action="append", metavar="FILE",
+                        help="JSON file of extra interaction, contraindication and resistance rules (repeatable)")
+    parser.add_argument("--near-duplicates", action="store_true",
+                        help="also report groups of near-duplicate questions (word-set similarity of at least 0.8)")
+    parser.add_argument("--profile", action="store_true",
+                        help="run each file under cProfile, saving profile_<file>.prof and the top functions")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="trace allocations with tracemalloc while testing each file")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="load and test all input files at once, saving each file's results as it finishes")
+    parser.add_argument("--executor", choices=["process", "thread"], default="process",
+                        help="executor the concurrent mode tests files in (default: process)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="files tested at once in the concurrent mode (default: CPU count)")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    apply_cache_arguments(args)
+    if args.concurrent and args.executor == "thread" and args.trace_memory:
+        parser.error("--trace-memory traces the whole process; use --executor process with --concurrent")
+    if args.concurrent and args.executor == "thread" and args.profile:
+        parser.error("--profile allows one cProfile profiler per process; use --executor process with --concurrent")
+    
+    with status_to_stderr(args.output), ExitStack() as outputs:
+        write_issue = outputs.enter_context(jsonl_writer(args.output)) if args.output else None
+        tester = ContentTester()
+        for filepath in args.common_errors or []:
+            try:
+                tester.load_common_errors(filepath)
+            except (OSError, ValueError) as e:
+                parser.error(f"cannot load common errors from {filepath}: {e}")
+        
+        # Test files to check
+        test_files = expand_input_paths(args.input) if args.input else [
+            "new_quiz_questions.js",
+            "resistance_scenarios.js",
+            "src/data/quizQuestionsWithDifficulty.js"
+        ]
+        
+        if args.concurrent:
+            all_results = asyncio.run(test_files_concurrently(tester, test_files, args, write_issue))
+        else:
+            all_results = {}
+            for filename in test_files:
+                issue_sink = None
+                if write_issue is not None:
+                    def issue_sink(entry: Dict[str, Any], filename: str = filename):
+                        write_issue({"source": filename, **entry})
+                
+                # With --output, only the issues the report shows are kept
+                results = test_file(tester, filename, args, issue_sink, max_kept_issues=10 if args.output else None)
+                if results is not None:
+                    all_results[filename] = results
+        
+        # Generate comprehensive report
+        if all_results:
+            print("\n=== GENERATING COMPREHENSIVE REPORT ===")
+            
+            # Combine all results
+            total_questions = sum(r['total_questions'] for r in all_results.values())
+            total_passed = sum(r['passed'] for r in all_results.values())
+            total_failed = sum(r['failed'] for r in all_results.values())
+            
+            combined_report = f"""
 === COMPREHENSIVE CONTENT QUALITY REPORT ===
 Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
@@ -396,24 +942,24 @@ Total Failed: {total_failed} ({(total_failed/total_questions)*100:.1f}%)
 
 === FILE-BY-FILE RESULTS ===
 """
+            
+            for filename, results in all_results.items():
+                report = tester.generate_test_report(results)
+                combined_report += f"\n{'='*50}\n{filename.upper()}\n{'='*50}{report}\n"
+            
+            # Save combined report
+            with open("comprehensive_test_report.txt", 'w') as f:
+                f.write(combined_report)
+            
+            print("Comprehensive test report saved to comprehensive_test_report.txt")
+            
+            # Save individual results; the concurrent mode saved each as it finished
+            if not args.concurrent:
+                for filename, results in all_results.items():
+                    tester.save_test_results(results, f"test_results_{result_file_stem(filename)}.json")
         
-        for filename, results in all_results.items():
-            report = tester.generate_test_report(results)
-            combined_report += f"\n{'='*50}\n{filename.upper()}\n{'='*50}{report}\n"
-        
-        # Save combined report
-        with open("comprehensive_test_report.txt", 'w') as f:
-            f.write(combined_report)
-        
-        print("Comprehensive test report saved to comprehensive_test_report.txt")
-        
-        # Save individual results
-        for filename, results in all_results.items():
-            safe_filename = filename.replace("/", "_").replace(".", "_")
-            tester.save_test_results(results, f"test_results_{safe_filename}.json")
-    
-    else:
-        print("No test files found or loaded successfully")
+        else:
+            print("No test files found or loaded successfully")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
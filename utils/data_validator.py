@@ -4,10 +4,143 @@ Data Validation and Enhancement Script
 Validates and enhances existing medical data for completeness and accuracy
 """
 
+import argparse
 import json
 import re
 from datetime import datetime
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional
+
+from js_data_loader import load_js_array, add_cache_arguments, apply_cache_arguments
+from mapped_bank import MappedQuestionBank
+from question_io import (DEFAULT_QUESTIONS_PATH, STDIO_PATH, is_jsonl_path, iter_question_file, question_export_name,
+                         status_to_stderr, write_jsonl)
+from difficulty_engine import DifficultyRuleSet, shared_engine
+from result_cache import QuestionResultCache, default_result_cache_path
+
+# Bump when validation logic changes so incremental result caches are invalidated
+VALIDATION_RULES_VERSION = 2
+
+class TerminologyStandardizer:
+    """Rewrites abbreviations to their full terms in a single regex pass
+    
+    Produces the same text as applying one case-insensitive whole-word
+    re.sub per abbreviation in map order. That equivalence needs the
+    abbreviations not to overlap each other and the full terms not to
+    contain any abbreviation; for maps where that does not hold, the
+    standardizer falls back to one precompiled pattern per abbreviation.
+    """
+    
+    def __init__(self, standardization_map: Dict[str, Dict[str, str]], single_pass: bool = True):
+        self.replacements = []
+        for terms in standardization_map.values():
+            self.replacements.extend(terms.items())
+        
+        self.sequential_patterns = [
+            (re.compile(rf'\b{re.escape(abbrev)}\b', re.IGNORECASE), full_term)
+            for abbrev, full_term in self.replacements
+        ]
+        
+        # Alternatives in map order, so the earliest abbreviation wins ties as it would sequentially
+        self.lookup = {}
+        for abbrev, full_term in self.replacements:
+            self.lookup.setdefault(abbrev.casefold(), full_term)
+        self.pattern = None
+        if self.replacements:
+            alternation = "|".join(re.escape(abbrev) for abbrev, _ in self.replacements)
+            self.pattern = re.compile(rf'\b(?:{alternation})\b', re.IGNORECASE)
+        
+        self.single_pass = single_pass and self.pattern is not None and self._is_order_independent()
+    
+    def _is_order_independent(self) -> bool:
+        """Check that one pass gives the same result as sequential substitution
+        
+        Single-pass and sequential results can only differ on text where two
+        abbreviations overlap, or where a full term runs into an abbreviation
+        next to it. Every such text is built from the map and compared.
+        """
+        pairs = [(abbrev.casefold(), full_term.casefold()) for abbrev, full_term in self.replacements]
+        candidates = []
+        for first, first_full in pairs:
+            for second, _ in pairs:
+                if first == second:
+                    continue
+                if second in first:
+                    candidates.append(first)
+                for n in range(1, len(second)):
+                    if first.endswith(second[:n]):
+                        candidates.append(first + second[n:])
+                    if first_full.endswith(second[:n]):
+                        candidates.append(first + second[n:])
+                    if first_full.startswith(second[-n:]):
+                        candidates.append(second[:-n] + first)
+        
+        for text in candidates:
+            if self.pattern.sub(self._replace, text) != self._standardize_sequentially(text):
+                return False
+        return not any(self.pattern.search(full_term) for _, full_term in self.replacements)
+    
+    def _standardize_sequentially(self, text: str) -> str:
+        """Apply one precompiled pattern per abbreviation, in map order"""
+        for pattern, full_term in self.sequential_patterns:
+            text = pattern.sub(full_term, text)
+        return text
+    
+    def _replace(self, match: "re.Match") -> str:
+        """Full term for a matched abbreviation"""
+        return self.lookup[match.group(0).casefold()]
+    
+    def standardize(self, text: str) -> str:
+        """Replace every abbreviation in text with its full term"""
+        if self.single_pass:
+            return self.pattern.sub(self._replace, text)
+        return self._standardize_sequentially(text)
+
+class KeywordCountDifficultyRules(DifficultyRuleSet):
+    """Difficulty from counts of indicator keywords in the question and explanation"""
+    
+    name = "validator"
+    
+    def __init__(self):
+        # Advanced indicators
+        self.advanced_keywords = [
+            "resistance", "mechanism", "complicated", "multiple", "failure",
+            "inadequate", "insufficient", "complex", "parenchymal", "cerebritis"
+        ]
+        
+        # Intermediate indicators
+        self.intermediate_keywords = [
+            "clinical", "consideration", "duration", "culture", "susceptibility",
+            "switch", "transition", "monitoring", "guided"
+        ]
+        
+        # Beginner indicators
+        self.beginner_keywords = [
+            "common", "typical", "standard", "first-line", "empiric",
+            "recommended", "what is", "which of"
+        ]
+    
+    def config(self) -> Any:
+        """Keyword lists the classification depends on"""
+        return [self.advanced_keywords, self.intermediate_keywords, self.beginner_keywords]
+    
+    def classify(self, question: Dict[str, Any]) -> str:
+        """Return the difficulty level of one question"""
+        question_text = question.get("question", "").lower()
+        explanation = question.get("explanation", "").lower()
+        
+        # Count keyword occurrences
+        advanced_count = sum(1 for kw in self.advanced_keywords if kw in question_text or kw in explanation)
+        intermediate_count = sum(1 for kw in self.intermediate_keywords if kw in question_text or kw in explanation)
+        beginner_count = sum(1 for kw in self.beginner_keywords if kw in question_text or kw in explanation)
+        
+        if advanced_count >= 2:
+            return "advanced"
+        elif intermediate_count >= 2:
+            return "intermediate"
+        elif beginner_count >= 1:
+            return "beginner"
+        else:
+            return "intermediate"  # Default
 
 class DataValidator:
     def __init__(self):
@@ -75,6 +208,17 @@ class DataValidator:
                 "QID": "four times daily"
             }
         }
+        self.terminology_standardizer = TerminologyStandardizer(self.standardization_map)
+        
+        # Difficulty inference runs through the shared engine; any registered rule set can be used
+        self.difficulty_engine = shared_engine
+        self.difficulty_rules = KeywordCountDifficultyRules()
+        self.difficulty_engine.register(self.difficulty_rules)
+        self.difficulty_rule_set = self.difficulty_rules.name
+        
+        # Records seen and records whose validation changed a field, across iter_validated_questions runs
+        self.validated_records = 0
+        self.modified_records = 0
         
         # Medical data completeness checks
         self.completeness_checks = {
@@ -84,68 +228,131 @@ class DataValidator:
             "monitoring_parameters": ["levels", "toxicity", "efficacy"]
         }
     
-    def validate_quiz_questions(self, questions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
-        """Validate quiz questions for completeness and quality"""
-        validated_questions = []
+    def validate_quiz_questions(self, questions: List[Dict[str, Any]],
+                                result_cache: Optional[QuestionResultCache] = None,
+                                copy_on_write: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Validate quiz questions for completeness and quality
+        
+        With a result_cache, questions whose content is unchanged since the cached
+        run reuse their stored result and only new or edited questions are
+        validated; the output is the same as a full run.
+        
+        With copy_on_write, questions that need no changes are returned as the
+        original objects instead of copies; see iter_validated_questions.
+        """
         issues = []
+        validated_questions = list(self.iter_validated_questions(questions, issues, result_cache, copy_on_write))
         
+        return validated_questions, issues
+    
+    def iter_validated_questions(self, questions: Iterable[Dict[str, Any]], issues: List[str],
+                                 result_cache: Optional[QuestionResultCache] = None,
+                                 copy_on_write: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield each validated question in turn, appending its issues to issues
+        
+        Accepts any iterable, so a stream of questions is validated record by record.
+        Each question is validated into a patch of changed fields; only questions
+        with a non-empty patch are copied when copy_on_write is set, so unchanged
+        questions are yielded as the caller's own (shared) objects. Counts of
+        validated and modified records accumulate in validated_records and
+        modified_records.
+        """
         for i, question in enumerate(questions):
-            question_issues = []
-            enhanced_question = question.copy()
-            
-            # Check required fields
-            for field in self.required_fields["quiz_question"]:
-                if field not in question or not question[field]:
-                    question_issues.append(f"Question {i+1}: Missing or empty field '{field}'")
-            
-            # Validate question length
-            if "question" in question:
-                q_len = len(question["question"])
-                min_len, max_len = self.validation_rules["question_length"]
-                if q_len < min_len or q_len > max_len:
-                    question_issues.append(f"Question {i+1}: Question length {q_len} outside range {min_len}-{max_len}")
-            
-            # Validate explanation length
-            if "explanation" in question:
-                exp_len = len(question["explanation"])
-                min_len, max_len = self.validation_rules["explanation_length"]
-                if exp_len < min_len or exp_len > max_len:
-                    question_issues.append(f"Question {i+1}: Explanation length {exp_len} outside range {min_len}-{max_len}")
-            
-            # Validate options count
-            if "options" in question:
-                opt_count = len(question["options"])
-                min_count, max_count = self.validation_rules["options_count"]
-                if opt_count < min_count or opt_count > max_count:
-                    question_issues.append(f"Question {i+1}: Options count {opt_count} outside range {min_count}-{max_count}")
-            
-            # Validate correct answer index
-            if "correct" in question and "options" in question:
-                if question["correct"] >= len(question["options"]):
-                    question_issues.append(f"Question {i+1}: Correct answer index {question['correct']} out of range")
+            if result_cache is None:
+                patch, question_issues = self.validate_question_patch(question)
+            else:
+                key, result = result_cache.lookup(question)
+                if result is None:
+                    result = self.validate_question_patch(question)
+                    result_cache.store(key, result)
+                patch, question_issues = result
             
-            # Standardize category
-            if "category" in question:
-                original_category = question["category"]
-                standardized_category = self.standardize_category(original_category)
-                if standardized_category != original_category:
-                    enhanced_question["category"] = standardized_category
-                    question_issues.append(f"Question {i+1}: Category standardized from '{original_category}' to '{standardized_category}'")
+            self.validated_records += 1
+            if patch:
+                self.modified_records += 1
             
-            # Enhance question with medical terminology standardization
-            enhanced_question = self.standardize_medical_terminology(enhanced_question)
-            
-            # Add missing fields if possible
-            if "difficulty" not in enhanced_question:
-                enhanced_question["difficulty"] = self.infer_difficulty(enhanced_question)
-            
-            if "conditionId" not in enhanced_question:
-                enhanced_question["conditionId"] = self.generate_condition_id(enhanced_question)
-            
-            validated_questions.append(enhanced_question)
-            issues.extend(question_issues)
-        
-        return validated_questions, issues
+            issues.extend(f"Question {i+1}: {issue}" for issue in question_issues)
+            yield {**question, **patch} if patch or not copy_on_write else question
+    
+    def validate_question(self, question: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """Validate and enhance a single question
+        
+        Returns the enhanced question and its issues, without the
+        "Question N:" prefix added by validate_quiz_questions.
+        """
+        patch, question_issues = self.validate_question_patch(question)
+        return {**question, **patch}, question_issues
+    
+    def validate_question_patch(self, question: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """Validate a single question, returning only the fields enhancement changes or adds
+        
+        The patch layers over the original: {**question, **patch} is the
+        question validate_question returns, and an empty patch means the
+        question needs no changes.
+        """
+        question_issues = []
+        patch = {}
+        
+        # Check required fields
+        for field in self.required_fields["quiz_question"]:
+            if field not in question or not question[field]:
+                question_issues.append(f"Missing or empty field '{field}'")
+        
+        # Validate question length
+        if "question" in question:
+            q_len = len(question["question"])
+            min_len, max_len = self.validation_rules["question_length"]
+            if q_len < min_len or q_len > max_len:
+                question_issues.append(f"Question length {q_len} outside range {min_len}-{max_len}")
+        
+        # Validate explanation length
+        if "explanation" in question:
+            exp_len = len(question["explanation"])
+            min_len, max_len = self.validation_rules["explanation_length"]
+            if exp_len < min_len or exp_len > max_len:
+                question_issues.append(f"Explanation length {exp_len} outside range {min_len}-{max_len}")
+        
+        # Validate options count
+        if "options" in question:
+            opt_count = len(question["options"])
+            min_count, max_count = self.validation_rules["options_count"]
+            if opt_count < min_count or opt_count > max_count:
+                question_issues.append(f"Options count {opt_count} outside range {min_count}-{max_count}")
+        
+        # Validate correct answer index
+        if "correct" in question and "options" in question:
+            if question["correct"] >= len(question["options"]):
+                question_issues.append(f"Correct answer index {question['correct']} out of range")
+        
+        # Standardize category
+        if "category" in question:
+            original_category = question["category"]
+            standardized_category = self.standardize_category(original_category)
+            if standardized_category != original_category:
+                patch["category"] = standardized_category
+                question_issues.append(f"Category standardized from '{original_category}' to '{standardized_category}'")
+        
+        # Enhance question with medical terminology standardization
+        patch.update(self.terminology_patch({**question, **patch} if patch else question))
+        
+        # Add missing fields if possible
+        if "difficulty" not in question:
+            patch["difficulty"] = self.infer_difficulty({**question, **patch} if patch else question)
+        
+        if "conditionId" not in question:
+            patch["conditionId"] = self.generate_condition_id({**question, **patch})
+        
+        return patch, question_issues
+    
+    def cache_rules(self) -> Dict[str, Any]:
+        """Configuration that validation results depend on, for result caches"""
+        return {
+            "version": VALIDATION_RULES_VERSION,
+            "required_fields": self.required_fields,
+            "validation_rules": self.validation_rules,
+            "standardization_map": self.standardization_map,
+            "difficulty_rules": self.difficulty_engine.rules_key(self.difficulty_rule_set)
+        }
     
     def standardize_category(self, category: str) -> str:
         """Standardize category names"""
@@ -179,74 +386,36 @@ class DataValidator:
     
     def standardize_medical_terminology(self, question: Dict[str, Any]) -> Dict[str, Any]:
         """Standardize medical terminology in question text"""
-        enhanced_question = question.copy()
+        return {**question, **self.terminology_patch(question)}
+    
+    def terminology_patch(self, question: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields whose text changes under terminology standardization, with their new values"""
+        patch = {}
+        standardize = self.terminology_standardizer.standardize
         
         # Standardize in question text
-        if "question" in enhanced_question:
-            text = enhanced_question["question"]
-            for category, terms in self.standardization_map.items():
-                for abbrev, full_term in terms.items():
-                    # Case-insensitive replacement
-                    text = re.sub(rf'\b{re.escape(abbrev)}\b', full_term, text, flags=re.IGNORECASE)
-            enhanced_question["question"] = text
+        if "question" in question:
+            text = standardize(question["question"])
+            if text != question["question"]:
+                patch["question"] = text
         
         # Standardize in explanation
-        if "explanation" in enhanced_question:
-            text = enhanced_question["explanation"]
-            for category, terms in self.standardization_map.items():
-                for abbrev, full_term in terms.items():
-                    text = re.sub(rf'\b{re.escape(abbrev)}\b', full_term, text, flags=re.IGNORECASE)
-            enhanced_question["explanation"] = text
+        if "explanation" in question:
+            text = standardize(question["explanation"])
+            if text != question["explanation"]:
+                patch["explanation"] = text
         
         # Standardize in options
-        if "options" in enhanced_question:
-            standardized_options = []
-            for option in enhanced_question["options"]:
-                text = option
-                for category, terms in self.standardization_map.items():
-                    for abbrev, full_term in terms.items():
-                        text = re.sub(rf'\b{re.escape(abbrev)}\b', full_term, text, flags=re.IGNORECASE)
-                standardized_options.append(text)
-            enhanced_question["options"] = standardized_options
-        
-        return enhanced_question
+        if "options" in question:
+            options = [standardize(option) for option in question["options"]]
+            if options != question["options"]:
+                patch["options"] = options
+        
+        return patch
     
     def infer_difficulty(self, question: Dict[str, Any]) -> str:
         """Infer difficulty level from question content"""
-        question_text = question.get("question", "").lower()
-        explanation = question.get("explanation", "").lower()
-        
-        # Advanced indicators
-        advanced_keywords = [
-            "resistance", "mechanism", "complicated", "multiple", "failure",
-            "inadequate", "insufficient", "complex", "parenchymal", "cerebritis"
-        ]
-        
-        # Intermediate indicators
-        intermediate_keywords = [
-            "clinical", "consideration", "duration", "culture", "susceptibility",
-            "switch", "transition", "monitoring", "guided"
-        ]
-        
-        # Beginner indicators
-        beginner_keywords = [
-            "common", "typical", "standard", "first-line", "empiric",
-            "recommended", "what is", "which of"
-        ]
-        
-        # Count keyword occurrences
-        advanced_count = sum(1 for kw in advanced_keywords if kw in question_text or kw in explanation)
-        intermediate_count = sum(1 for kw in intermediate_keywords if kw in question_text or kw in explanation)
-        beginner_count = sum(1 for kw in beginner_keywords if kw in question_text or kw in explanation)
-        
-        if advanced_count >= 2:
-            return "advanced"
-        elif intermediate_count >= 2:
-            return "intermediate"
-        elif beginner_count >= 1:
-            return "beginner"
-        else:
-            return "intermediate"  # Default
+        return self.difficulty_engine.difficulty(question, self.difficulty_rule_set)
     
     def generate_condition_id(self, question: Dict[str, Any]) -> str:
         """Generate a condition ID from question content"""
@@ -363,8 +532,17 @@ Total issues found: {len(issues)}
         
         return report
     
-    def save_validated_data(self, questions: List[Dict[str, Any]], filename: str = "validated_questions.js"):
-        """Save validated questions to JavaScript file"""
+    def save_validated_data(self, questions: Iterable[Dict[str, Any]], filename: str = "validated_questions.js"):
+        """Save validated questions to JavaScript file
+        
+        A .jsonl filename (or "-" for stdout) writes JSON Lines record by record.
+        """
+        if is_jsonl_path(filename):
+            count = write_jsonl(questions, filename)
+            print(f"Validated {count} questions and saved to {filename}")
+            return filename
+        
+        questions = list(questions)
         timestamp = datetime.now().isoformat()
         
         js_content = f"""/**
@@ -390,52 +568,92 @@ export default validatedQuizQuestions;
 
 def main():
     """Main validation function"""
-    validator = DataValidator()
+    parser = argparse.ArgumentParser(description="Validate and enhance quiz questions")
+    parser.add_argument("--input", default=DEFAULT_QUESTIONS_PATH,
+                        help="questions to validate; .jsonl or - (stdin) streams JSON Lines")
+    parser.add_argument("--output", default="validated_questions.js",
+                        help="output file; .jsonl or - (stdout) streams JSON Lines")
+    add_cache_arguments(parser)
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse stored results for questions unchanged since the last incremental run")
+    parser.add_argument("--copy-on-write", action="store_true",
+                        help="pass questions that need no changes through without copying them")
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map the input and decode questions one at a time, for banks larger than RAM")
+    args = parser.parse_args()
+    apply_cache_arguments(args)
     
-    # Load existing questions
-    try:
-        with open("src/data/quizQuestions.js", 'r') as f:
-            content = f.read()
+    with status_to_stderr(args.output):
+        validator = DataValidator()
+        questions_file = args.input
+        
+        if args.mmap and questions_file != STDIO_PATH:
+            # Index the mapped file and decode each record only as it is validated
+            try:
+                questions = MappedQuestionBank(questions_file, question_export_name(questions_file))
+                
+                print(f"Mapped {len(questions)} questions for validation")
+                
+            except Exception as e:
+                print(f"Error loading questions: {e}")
+                return
+        elif is_jsonl_path(questions_file):
+            # Stream records through validation without loading the whole bank
+            questions = iter_question_file(questions_file)
+        else:
+            # Load existing questions
+            try:
+                questions = load_js_array(questions_file, question_export_name(questions_file))
+                
+                print(f"Loaded {len(questions)} questions for validation")
+                
+            except Exception as e:
+                print(f"Error loading questions: {e}")
+                return
+        
+        # Validate questions
+        result_cache = None
+        if args.incremental:
+            result_cache = QuestionResultCache(
+                default_result_cache_path("data_validator", questions_file), validator.cache_rules()
+            )
+        issues = []
         
-        # Extract questions array
-        start_marker = "const quizQuestions = ["
-        end_marker = "];"
-        start_index = content.find(start_marker) + len(start_marker) - 1
-        end_index = content.rfind(end_marker) + 1
+        # The report only needs each question's category and difficulty
+        report_fields = []
         
-        questions_json = content[start_index:end_index]
-        questions = json.loads(questions_json)
+        def record_report_fields(validated: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+            for question in validated:
+                report_fields.append({field: question[field] for field in ("category", "difficulty") if field in question})
+                yield question
         
-        print(f"Loaded {len(questions)} questions for validation")
+        validated_questions = record_report_fields(validator.iter_validated_questions(questions, issues, result_cache, args.copy_on_write))
         
-    except Exception as e:
-        print(f"Error loading questions: {e}")
-        return
-    
-    # Validate questions
-    validated_questions, issues = validator.validate_quiz_questions(questions)
-    
-    # Generate report
-    report = validator.generate_validation_report(validated_questions, issues)
-    
-    # Save report
-    with open("validation_report.txt", 'w') as f:
-        f.write(report)
-    
-    # Save validated questions
-    output_file = validator.save_validated_data(validated_questions)
-    
-    # Print summary
-    print("\n=== VALIDATION SUMMARY ===")
-    print(f"Questions processed: {len(validated_questions)}")
-    print(f"Issues found: {len(issues)}")
-    print(f"Validation report: validation_report.txt")
-    print(f"Validated questions: {output_file}")
-    
-    if issues:
-        print("\nTop 5 issues found:")
-        for issue in issues[:5]:
-            print(f"  • {issue}")
+        # Save validated questions
+        output_file = validator.save_validated_data(validated_questions, args.output)
+        if result_cache is not None:
+            result_cache.save()
+            print(f"Incremental run: {result_cache.misses} questions validated, {result_cache.hits} reused")
+        
+        # Generate report
+        report = validator.generate_validation_report(report_fields, issues)
+        
+        # Save report
+        with open("validation_report.txt", 'w') as f:
+            f.write(report)
+        
+        # Print summary
+        print("\n=== VALIDATION SUMMARY ===")
+        print(f"Questions processed: {len(report_fields)}")
+        print(f"Issues found: {len(issues)}")
+        print(f"Records modified: {validator.modified_records} of {validator.validated_records}")
+        print(f"Validation report: validation_report.txt")
+        print(f"Validated questions: {output_file}")
+        
+        if issues:
+            print("\nTop 5 issues found:")
+            for issue in issues[:5]:
+                print(f"  • {issue}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,12 +4,35 @@ Difficulty Level Classifier for Existing Quiz Questions
 Analyzes existing quiz questions and categorizes them by difficulty level
 """
 
+import argparse
 import re
 import json
+from array import array
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterable, Iterator
 
-class DifficultyClassifier:
+from content_rules import TermMatcher
+from data_validator import KeywordCountDifficultyRules
+from difficulty_engine import DifficultyRuleSet, shared_engine
+from js_data_loader import load_js_array, add_cache_arguments, apply_cache_arguments
+from question_io import (DEFAULT_QUESTIONS_PATH, batched, is_jsonl_path, iter_question_file, question_export_name,
+                         status_to_stderr, write_jsonl)
+from result_cache import content_fingerprint
+
+# Score slots accumulated by the weighted matcher, each in an 8-bit field of one integer
+ADVANCED_SCORE, INTERMEDIATE_SCORE, BEGINNER_SCORE, COMPLEX_CONDITION, BASIC_CONDITION = range(5)
+SLOT_BITS = 8
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+# Packed score layout: three 4-bit saturating scores, two condition flags, 2-bit category class
+SCORE_MAX = 15
+COMPLEX_FLAG = 1 << 12
+BASIC_FLAG = 1 << 13
+CATEGORY_SHIFT = 14
+
+class DifficultyClassifier(DifficultyRuleSet):
+    name = "classifier"
+    
     def __init__(self):
         # Keywords that indicate different difficulty levels
         self.beginner_keywords = [
@@ -66,12 +89,38 @@ class DifficultyClassifier:
             "pneumonia",
             "uti"
         ]
+        
+        # Compiled matchers and decision table, keyed by the config() they were built from
+        self._scoring_key = None
+        self._scoring_tables = None
+        
+        # Classification runs through the shared engine, which memoizes results per question
+        self.difficulty_engine = shared_engine
+        self.difficulty_engine.register(self)
+    
+    def __getstate__(self):
+        # Scoring tables are rebuilt on demand; don't ship them to worker processes
+        state = self.__dict__.copy()
+        state["_scoring_key"] = None
+        state["_scoring_tables"] = None
+        return state
+    
+    def config(self) -> Any:
+        """Keyword lists the classification depends on"""
+        return [self.beginner_keywords, self.intermediate_keywords, self.advanced_keywords,
+                self.complex_conditions, self.basic_conditions]
     
     def analyze_question_complexity(self, question: str, explanation: str, category: str) -> str:
         """Analyze a question and return its difficulty level"""
-        question_lower = question.lower()
-        explanation_lower = explanation.lower()
-        category_lower = category.lower()
+        return self.difficulty_engine.difficulty(
+            {"question": question, "explanation": explanation, "category": category}, self.name
+        )
+    
+    def classify(self, question: Dict[str, Any]) -> str:
+        """Score one question's keywords and return its difficulty level"""
+        question_lower = question.get("question", "").lower()
+        explanation_lower = question.get("explanation", "").lower()
+        category_lower = question.get("category", "").lower()
         
         # Check for advanced keywords
         advanced_score = 0
@@ -117,7 +166,23 @@ class DifficultyClassifier:
         if "consider" in question_lower:
             intermediate_score += 1
         
-        # Decision logic
+        return self.decide_difficulty(advanced_score, intermediate_score, beginner_score,
+                                      complex_condition_found, basic_condition_found,
+                                      self.category_class(category_lower))
+    
+    def category_class(self, category_lower: str) -> int:
+        """Fallback difficulty of a category: 0 beginner, 1 intermediate, 2 advanced"""
+        if category_lower in ["central nervous system", "bone/joint", "bloodstream infection"]:
+            return 2
+        elif category_lower in ["skin and soft tissue", "respiratory", "genitourinary"]:
+            return 1
+        else:
+            return 0
+    
+    def decide_difficulty(self, advanced_score: int, intermediate_score: int, beginner_score: int,
+                          complex_condition_found: bool, basic_condition_found: bool,
+                          category_class: int) -> str:
+        """Apply the difficulty thresholds to a question's scores"""
         if advanced_score >= 2 or complex_condition_found:
             return "advanced"
         elif intermediate_score >= 2 or (intermediate_score >= 1 and not basic_condition_found):
@@ -126,73 +191,193 @@ class DifficultyClassifier:
             return "beginner"
         else:
             # Default based on category
-            if category_lower in ["central nervous system", "bone/joint", "bloodstream infection"]:
-                return "advanced"
-            elif category_lower in ["skin and soft tissue", "respiratory", "genitourinary"]:
-                return "intermediate"
-            else:
-                return "beginner"
+            return ["beginner", "intermediate", "advanced"][category_class]
     
-    def classify_existing_questions(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Add difficulty levels to existing questions"""
-        classified_questions = []
+    def build_weighted_matcher(self) -> Dict[str, List[Tuple[str, int]]]:
+        """Compile every keyword list into one weighted term list per search scope
         
-        difficulty_stats = {"beginner": 0, "intermediate": 0, "advanced": 0}
+        Each distinct term is checked once, and its weights for every score slot
+        are packed into one integer so a question's scores are a single sum.
+        Scopes are where the term must appear: "either" the question or the
+        explanation, only the "question", or only the "explanation".
+        """
+        weights = {"either": {}, "question": {}, "explanation": {}}
+        slot_totals = [0] * (BASIC_CONDITION + 1)
+        
+        def add(scope: str, terms: List[str], slot: int, weight: int):
+            for term in terms:
+                weights[scope][term] = weights[scope].get(term, 0) + (weight << (slot * SLOT_BITS))
+                slot_totals[slot] += weight
+        
+        add("either", self.advanced_keywords, ADVANCED_SCORE, 2)
+        add("either", self.intermediate_keywords, INTERMEDIATE_SCORE, 1)
+        add("either", self.beginner_keywords, BEGINNER_SCORE, 1)
+        add("either", self.complex_conditions, COMPLEX_CONDITION, 1)
+        add("either", self.basic_conditions, BASIC_CONDITION, 1)
         
+        # Additional complexity indicators
+        add("explanation", ["specific choice and duration"], ADVANCED_SCORE, 2)
+        add("explanation", ["guided by culture", "depending on"], INTERMEDIATE_SCORE, 1)
+        add("explanation", ["empiric recommendations"], BEGINNER_SCORE, 1)
+        add("question", ["consider"], INTERMEDIATE_SCORE, 1)
+        
+        # A slot's largest possible sum must not carry into the next slot
+        if max(slot_totals) > SLOT_MASK:
+            raise ValueError("Keyword weights overflow the packed score fields")
+        
+        return {scope: list(scope_weights.items()) for scope, scope_weights in weights.items()}
+    
+    def scoring_tables(self) -> Tuple[TermMatcher, Dict[str, Dict[str, int]], List[str]]:
+        """Term matcher over every keyword, packed weights per term, and the decision table
+        
+        A term's weight when found in the question and when found in the
+        explanation each include its "either" weight, which is stored separately
+        so a term found in both is counted once. Built on first use and reused
+        until config() changes, so many small batches cost the same as one large one.
+        """
+        key = content_fingerprint(self.config())
+        if key != self._scoring_key:
+            scopes = {scope: dict(scope_terms) for scope, scope_terms in self.build_weighted_matcher().items()}
+            terms = sorted(set().union(*scopes.values()))
+            either = {term: scopes["either"].get(term, 0) for term in terms}
+            weights = {
+                "either": either,
+                "question": {term: either[term] + scopes["question"].get(term, 0) for term in terms},
+                "explanation": {term: either[term] + scopes["explanation"].get(term, 0) for term in terms}
+            }
+            self._scoring_tables = (TermMatcher(terms), weights, self.decision_table())
+            self._scoring_key = key
+        return self._scoring_tables
+    
+    def score_questions(self, questions: List[Dict[str, Any]]) -> array:
+        """Score every question with one weighted matcher, packed into 16 bits each
+        
+        Each entry holds the advanced, intermediate and beginner scores (saturated
+        at 15), the complex and basic condition flags and the category class.
+        The question and explanation are each scanned once for every keyword.
+        """
+        matcher, weights, _ = self.scoring_tables()
+        find = matcher.find
+        either_weight = weights["either"].__getitem__
+        question_weight = weights["question"].__getitem__
+        explanation_weight = weights["explanation"].__getitem__
+        
+        # Banks repeat stems and explanations, and few distinct sums and categories
+        # occur, so each text pair is scanned once and packed forms are memoized
+        text_totals = {}
+        packed_totals = {}
+        category_bits = {}
+        
+        scores = array("H")
         for question in questions:
-            # Create a copy of the question
-            new_question = question.copy()
+            texts = (question.get("question", ""), question.get("explanation", ""))
+            totals = text_totals.get(texts)
+            if totals is None:
+                in_question = find(texts[0].lower())
+                in_explanation = find(texts[1].lower())
+                totals = sum(map(question_weight, in_question)) + sum(map(explanation_weight, in_explanation))
+                if not in_question.isdisjoint(in_explanation):
+                    totals -= sum(map(either_weight, in_question & in_explanation))
+                text_totals[texts] = totals
             
-            # Determine difficulty
-            difficulty = self.analyze_question_complexity(
-                question.get("question", ""),
-                question.get("explanation", ""),
-                question.get("category", "")
-            )
+            packed = packed_totals.get(totals)
+            if packed is None:
+                packed = packed_totals[totals] = self.pack_scores(totals)
             
-            # Add difficulty level
-            new_question["difficulty"] = difficulty
-            difficulty_stats[difficulty] += 1
+            category = question.get("category", "")
+            bits = category_bits.get(category)
+            if bits is None:
+                bits = category_bits[category] = self.category_class(category.lower()) << CATEGORY_SHIFT
             
-            classified_questions.append(new_question)
+            scores.append(packed | bits)
+        
+        return scores
+    
+    def pack_scores(self, totals: int) -> int:
+        """Saturate the slot sums from the weighted matcher into the 16-bit score layout"""
+        packed = (min(totals & SLOT_MASK, SCORE_MAX)
+                  | min(totals >> (INTERMEDIATE_SCORE * SLOT_BITS) & SLOT_MASK, SCORE_MAX) << 4
+                  | min(totals >> (BEGINNER_SCORE * SLOT_BITS) & SLOT_MASK, SCORE_MAX) << 8)
+        if totals >> (COMPLEX_CONDITION * SLOT_BITS) & SLOT_MASK:
+            packed |= COMPLEX_FLAG
+        if totals >> (BASIC_CONDITION * SLOT_BITS) & SLOT_MASK:
+            packed |= BASIC_FLAG
+        return packed
+    
+    def decision_table(self) -> List[str]:
+        """Difficulty for every possible packed score, so thresholds apply as one lookup"""
+        return [
+            self.decide_difficulty(packed & SCORE_MAX, packed >> 4 & SCORE_MAX, packed >> 8 & SCORE_MAX,
+                                   bool(packed & COMPLEX_FLAG), bool(packed & BASIC_FLAG),
+                                   packed >> CATEGORY_SHIFT)
+            if packed >> CATEGORY_SHIFT < 3 else None
+            for packed in range(1 << 16)
+        ]
+    
+    def classify_scores(self, scores: array) -> List[str]:
+        """Apply the thresholds to a whole score array at once"""
+        return list(map(self.scoring_tables()[2].__getitem__, scores))
+    
+    def classify_batch(self, questions: List[Dict[str, Any]]) -> List[str]:
+        """Score and threshold a whole batch at once"""
+        return self.classify_scores(self.score_questions(questions))
+    
+    def classify_questions(self, questions: List[Dict[str, Any]]) -> List[str]:
+        """Classify a batch of questions, returning one difficulty level per question
+        
+        Goes through the shared engine, so only questions it has not already
+        classified under the current keywords are scored.
+        """
+        self.difficulty_engine.register(self)
+        return self.difficulty_engine.difficulties(questions, self.name)
+    
+    def classify_existing_questions(self, questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add difficulty levels to existing questions"""
+        difficulty_stats = {"beginner": 0, "intermediate": 0, "advanced": 0}
+        
+        # Determine difficulty for the whole batch
+        classified_questions = list(self.iter_classified_questions(questions, difficulty_stats, len(questions) or 1))
         
         return classified_questions, difficulty_stats
     
+    def iter_classified_questions(self, questions: Iterable[Dict[str, Any]], difficulty_stats: Dict[str, int],
+                                  batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield a copy of each question with its difficulty level, classifying in batches
+        
+        Accepts any iterable, so a stream of questions is classified with
+        bounded memory; difficulty_stats is updated as questions are yielded.
+        """
+        for batch in batched(questions, batch_size):
+            for question, difficulty in zip(batch, self.classify_questions(batch)):
+                # Create a copy of the question
+                new_question = question.copy()
+                
+                # Add difficulty level
+                new_question["difficulty"] = difficulty
+                difficulty_stats[difficulty] += 1
+                
+                yield new_question
+    
     def load_existing_questions(self, filepath: str) -> List[Dict[str, Any]]:
         """Load existing questions from JavaScript file"""
         try:
-            with open(filepath, 'r') as f:
-                content = f.read()
-            
-            # Extract the JavaScript array
-            # Find the start of the array
-            start_marker = "const quizQuestions = ["
-            end_marker = "];"
-            
-            start_index = content.find(start_marker)
-            if start_index == -1:
-                raise ValueError("Could not find quiz questions array")
-            
-            start_index += len(start_marker) - 1  # Include the opening bracket
-            end_index = content.rfind(end_marker)
-            
-            if end_index == -1:
-                raise ValueError("Could not find end of quiz questions array")
-            
-            # Extract the JSON array
-            json_content = content[start_index:end_index + 1]
-            
-            # Parse the JSON
-            questions = json.loads(json_content)
-            
-            return questions
+            return load_js_array(filepath, question_export_name(filepath))
             
         except Exception as e:
             print(f"Error loading questions: {e}")
             return []
     
-    def save_classified_questions(self, questions: List[Dict[str, Any]], output_file: str):
-        """Save classified questions to a JavaScript file"""
+    def save_classified_questions(self, questions: Iterable[Dict[str, Any]], output_file: str):
+        """Save classified questions to a JavaScript file
+        
+        A .jsonl output_file (or "-" for stdout) writes JSON Lines record by record.
+        """
+        if is_jsonl_path(output_file):
+            count = write_jsonl(questions, output_file)
+            print(f"Classified {count} questions and saved to {output_file}")
+            return output_file
+        
+        questions = list(questions)
         timestamp = datetime.now().isoformat()
         
         js_content = f"""/**
@@ -218,35 +403,70 @@ export default quizQuestionsWithDifficulty;
 
 def main():
     """Main function to classify existing questions"""
-    classifier = DifficultyClassifier()
-    
-    # Load existing questions
-    existing_questions_file = "src/data/quizQuestions.js"
-    questions = classifier.load_existing_questions(existing_questions_file)
+    parser = argparse.ArgumentParser(description="Classify existing quiz questions by difficulty")
+    parser.add_argument("--input", default=DEFAULT_QUESTIONS_PATH,
+                        help="questions to classify; .jsonl or - (stdin) streams JSON Lines")
+    parser.add_argument("--output", default="src/data/quizQuestionsWithDifficulty.js",
+                        help="output file; .jsonl or - (stdout) streams JSON Lines")
+    parser.add_argument("--compare", action="store_true",
+                        help="Also classify with the data validator's heuristic and report where they differ")
+    add_cache_arguments(parser)
+    args = parser.parse_args()
+    apply_cache_arguments(args)
     
-    if not questions:
-        print("No questions found. Please check the file path.")
-        return
-    
-    print(f"Loaded {len(questions)} existing questions")
-    
-    # Classify questions
-    classified_questions, difficulty_stats = classifier.classify_existing_questions(questions)
-    
-    # Save classified questions
-    output_file = "src/data/quizQuestionsWithDifficulty.js"
-    classifier.save_classified_questions(classified_questions, output_file)
-    
-    # Print summary
-    print("\n=== Difficulty Classification Summary ===")
-    print(f"Total questions classified: {len(classified_questions)}")
-    print("\nDifficulty distribution:")
-    for difficulty, count in difficulty_stats.items():
-        percentage = (count / len(classified_questions)) * 100
-        print(f"  {difficulty.capitalize()}: {count} questions ({percentage:.1f}%)")
-    
-    print(f"\nOutput file: {output_file}")
-    print("Questions ready for difficulty-based filtering!")
+    with status_to_stderr(args.output):
+        classifier = DifficultyClassifier()
+        
+        if is_jsonl_path(args.input):
+            # Stream records through classification without loading the whole bank
+            questions = None
+            difficulty_stats = {"beginner": 0, "intermediate": 0, "advanced": 0}
+            classified_questions = classifier.iter_classified_questions(iter_question_file(args.input), difficulty_stats)
+        else:
+            # Load existing questions
+            questions = classifier.load_existing_questions(args.input)
+            
+            if not questions:
+                print("No questions found. Please check the file path.")
+                return
+            
+            print(f"Loaded {len(questions)} existing questions")
+            
+            # Classify questions
+            classified_questions, difficulty_stats = classifier.classify_existing_questions(questions)
+        
+        # Save classified questions
+        output_file = classifier.save_classified_questions(classified_questions, args.output)
+        
+        total_classified = sum(difficulty_stats.values())
+        if not total_classified:
+            print("No questions found. Please check the file path.")
+            return
+        
+        # Print summary
+        print("\n=== Difficulty Classification Summary ===")
+        print(f"Total questions classified: {total_classified}")
+        print("\nDifficulty distribution:")
+        for difficulty, count in difficulty_stats.items():
+            percentage = (count / total_classified) * 100
+            print(f"  {difficulty.capitalize()}: {count} questions ({percentage:.1f}%)")
+        
+        if args.compare and questions is None:
+            print("\nSkipping heuristic comparison: it needs the whole bank, not a JSON Lines stream")
+        elif args.compare:
+            classifier.difficulty_engine.register(KeywordCountDifficultyRules())
+            comparison = classifier.difficulty_engine.compare(questions, [classifier.name, KeywordCountDifficultyRules.name])
+            
+            print("\n=== Difficulty Heuristic Comparison ===")
+            for difficulty in ["beginner", "intermediate", "advanced"]:
+                counts = "  ".join(f"{name}: {comparison['distributions'][name].get(difficulty, 0):>4}"
+                                   for name in comparison["rule_sets"])
+                print(f"  {difficulty.capitalize():<13}{counts}")
+            print(f"  Agreement: {comparison['agreement_rate']:.1f}% "
+                  f"({len(comparison['disagreements'])} questions classified differently)")
+        
+        print(f"\nOutput file: {output_file}")
+        print("Questions ready for difficulty-based filtering!")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
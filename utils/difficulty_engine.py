@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Shared Difficulty Engine
+Runs pluggable difficulty heuristics and memoizes each question's level by content fingerprint
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+from result_cache import content_fingerprint
+
+# Default number of memoized (rule set, question) results kept per engine
+DEFAULT_MEMO_SIZE = 100000
+
+def difficulty_fingerprint(question: Dict[str, Any]) -> bytes:
+    """Hash of the fields difficulty heuristics read: question, explanation and category"""
+    text = "\0".join((question.get("question", ""), question.get("explanation", ""), question.get("category", "")))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+class DifficultyRuleSet:
+    """A difficulty heuristic the engine can run
+
+    Subclasses set a name, implement classify() and return everything the
+    result depends on from config(), so changed rules get fresh memo entries.
+    classify_batch() can be overridden with a faster whole-batch path.
+    """
+
+    name = ""
+
+    def config(self) -> Any:
+        """Rule configuration that classification results depend on"""
+        return None
+
+    def classify(self, question: Dict[str, Any]) -> str:
+        """Return the difficulty level of one question"""
+        raise NotImplementedError
+
+    def classify_batch(self, questions: List[Dict[str, Any]]) -> List[str]:
+        """Return the difficulty level of each question"""
+        return [self.classify(question) for question in questions]
+
+class DifficultyEngine:
+    """Registry of difficulty rule sets with an LRU memo of their results"""
+
+    def __init__(self, max_entries: int = DEFAULT_MEMO_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._rule_sets: Dict[str, Any] = {}
+        self._memo: "OrderedDict[Any, str]" = OrderedDict()
+
+    def register(self, rule_set: DifficultyRuleSet):
+        """Make a rule set available by name, replacing any rule set with the same name
+
+        Call again after changing a registered rule set's keywords; results
+        memoized under the old rules are then never returned.
+        """
+        rules_key = content_fingerprint([rule_set.name, rule_set.config()])
+        self._rule_sets[rule_set.name] = (rule_set, rules_key)
+
+    def rule_set_names(self) -> List[str]:
+        """Names of the registered rule sets"""
+        return sorted(self._rule_sets)
+
+    def rules_key(self, name: str) -> str:
+        """Fingerprint of a registered rule set's name and configuration"""
+        return self._lookup(name)[1]
+
+    def _lookup(self, name: str) -> Any:
+        """Registered rule set and its rules key"""
+        if name not in self._rule_sets:
+            raise KeyError(f"No difficulty rule set registered as '{name}' (have: {', '.join(self.rule_set_names())})")
+        return self._rule_sets[name]
+
+    def difficulty(self, question: Dict[str, Any], rule_set: str) -> str:
+        """Difficulty level of one question under the named rule set"""
+        return self.difficulties([question], rule_set)[0]
+
+    def difficulties(self, questions: List[Dict[str, Any]], rule_set: str) -> List[str]:
+        """Difficulty levels of a batch of questions, classifying only unmemoized ones"""
+        rules, rules_key = self._lookup(rule_set)
+        memo = self._memo
+
+        results: List[Optional[str]] = []
+        missing = []
+        for i, question in enumerate(questions):
+            key = (rules_key, difficulty_fingerprint(question))
+            difficulty = memo.get(key)
+            if difficulty is None:
+                missing.append((i, key))
+            else:
+                memo.move_to_end(key)
+            results.append(difficulty)
+
+        self.hits += len(questions) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            computed = rules.classify_batch([questions[i] for i, _ in missing])
+            for (i, key), difficulty in zip(missing, computed):
+                results[i] = difficulty
+                memo[key] = difficulty
+            # Evict the least recently used entries past the bound
+            while len(memo) > self.max_entries:
+                memo.popitem(last=False)
+
+        return results
+
+    def compare(self, questions: List[Dict[str, Any]], rule_sets: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Classify questions under several rule sets and summarize where they disagree"""
+        names = rule_sets or self.rule_set_names()
+        levels = {name: self.difficulties(questions, name) for name in names}
+
+        distributions = {}
+        for name, difficulties in levels.items():
+            counts = {}
+            for difficulty in difficulties:
+                counts[difficulty] = counts.get(difficulty, 0) + 1
+            distributions[name] = counts
+
+        disagreements = []
+        for i in range(len(questions)):
+            row = {name: levels[name][i] for name in names}
+            if len(set(row.values())) > 1:
+                disagreements.append({"question_index": i + 1, "difficulties": row})
+
+        return {
+            "total_questions": len(questions),
+            "rule_sets": names,
+            "distributions": distributions,
+            "agreement_rate": (1 - len(disagreements) / len(questions)) * 100 if questions else 100.0,
+            "disagreements": disagreements
+        }
+
+    def clear(self):
+        """Forget every memoized result and reset the hit and miss counters"""
+        self._memo.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def cache_info(self) -> Dict[str, int]:
+        """Memo statistics"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._memo), "max_entries": self.max_entries}
+
+# Engine shared by every script loaded in one process, so a pipeline scores each question once
+shared_engine = DifficultyEngine()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Guideline-Driven Quiz Question Generator
+Samples questions and distractors from RBO_JSON through inverted pathogen, antibiotic and category indexes
+"""
+
+import itertools
+import random
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+
+from guideline_store import DEFAULT_JSON_PATH, GuidelineStore, load_guideline_store
+
+# Distractors per question; every question has four options
+NUM_DISTRACTORS = 3
+
+# Consecutive duplicates iter_questions tolerates before giving up
+MAX_DUPLICATE_ATTEMPTS = 1000
+
+class GuidelineQuestionGenerator:
+    """Generates quiz questions from guideline conditions
+
+    All sampling tables are built once from the store's inverted indexes:
+    each question type holds a flat list of (subject, answer) entries and,
+    per subject, a precomputed pool of distractors that are known not to be
+    correct. Generating a question is then one uniform draw of a type, one
+    of an entry and one sample of three distractors, independent of how
+    many conditions, pathogens or antibiotics the data holds.
+
+    Distractor pools prefer answers from the same organ system, which are
+    plausible but wrong, and fall back to the whole guideline when a system
+    is too small to supply three.
+    """
+
+    def __init__(self, store: Optional[GuidelineStore] = None, path: str = DEFAULT_JSON_PATH):
+        self.store = store if store is not None else load_guideline_store(path)
+        conditions = self.store.conditions
+
+        system_conditions = {}
+        for condition in conditions:
+            system_conditions.setdefault(condition["system"], []).append(condition)
+
+        def pool(excluded: set, preferred: List[str], everything: List[str]) -> List[str]:
+            candidates = [value for value in dict.fromkeys(preferred) if value not in excluded]
+            if len(candidates) < NUM_DISTRACTORS:
+                candidates = [value for value in everything if value not in excluded]
+            return candidates
+
+        all_pathogens = self.store.pathogens()
+        all_antibiotics = self.store.antibiotics()
+        all_names = [condition["name"] for condition in conditions]
+
+        # Condition → pathogen: distractors are pathogens of other conditions in the same system
+        self.pathogen_entries = []
+        self.pathogen_pools = {}
+        for condition in conditions:
+            siblings = system_conditions[condition["system"]]
+            candidates = pool(set(condition["pathogens"]),
+                              [name for sibling in siblings for name in sibling["pathogens"]], all_pathogens)
+            if len(candidates) >= NUM_DISTRACTORS:
+                self.pathogen_pools[condition["id"]] = candidates
+                self.pathogen_entries.extend((condition, name) for name in condition["pathogens"])
+
+        # Condition → antibiotic: distractors are antibiotics the condition's therapy never mentions
+        self.therapy_entries = []
+        self.therapy_pools = {}
+        for condition in conditions:
+            siblings = system_conditions[condition["system"]]
+            candidates = pool(set(condition["antibiotics"]),
+                              [name for sibling in siblings for name in sibling["antibiotics"]], all_antibiotics)
+            if len(candidates) >= NUM_DISTRACTORS:
+                self.therapy_pools[condition["id"]] = candidates
+                self.therapy_entries.extend((condition, name) for name in condition["antibiotics"])
+
+        # Pathogen → conditions and antibiotic → conditions: distractors are conditions outside the index entry
+        self.pathogen_condition_entries, self.pathogen_condition_pools = self._reverse_tables(
+            self.store.by_pathogen, all_pathogens, all_names
+        )
+        self.antibiotic_condition_entries, self.antibiotic_condition_pools = self._reverse_tables(
+            self.store.by_antibiotic, all_antibiotics, all_names
+        )
+
+        # Category → conditions: distractors are conditions listed under other systems
+        self.category_entries = []
+        self.category_pools = {}
+        for system, members in system_conditions.items():
+            candidates = pool({condition["name"] for condition in members}, [], all_names)
+            if len(candidates) >= NUM_DISTRACTORS:
+                self.category_pools[system] = candidates
+                self.category_entries.extend((system, condition) for condition in members)
+
+        self.question_types: List[Tuple[List[Any], Callable[[Any, random.Random], Dict[str, Any]]]] = [
+            (entries, build) for entries, build in [
+                (self.pathogen_entries, self._pathogen_question),
+                (self.therapy_entries, self._therapy_question),
+                (self.pathogen_condition_entries, self._pathogen_condition_question),
+                (self.antibiotic_condition_entries, self._antibiotic_condition_question),
+                (self.category_entries, self._category_question)
+            ] if entries
+        ]
+
+    @staticmethod
+    def _reverse_tables(index: Dict[str, List[Dict[str, Any]]], names: List[str],
+                        all_names: List[str]) -> Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, List[str]]]:
+        """Entries and distractor pools for questions asking which condition a name belongs to"""
+        entries = []
+        pools = {}
+        for name in names:
+            conditions = index[name.lower()]
+            linked = {condition["name"] for condition in conditions}
+            candidates = [other for other in all_names if other not in linked]
+            if len(candidates) >= NUM_DISTRACTORS:
+                pools[name] = candidates
+                entries.extend((name, condition) for condition in conditions)
+        return entries, pools
+
+    @staticmethod
+    def _options(correct: str, distractors: List[str], rng: random.Random) -> Tuple[List[str], int]:
+        """Four options with the correct answer at a random position"""
+        options = rng.sample(distractors, NUM_DISTRACTORS)
+        position = rng.randrange(NUM_DISTRACTORS + 1)
+        options.insert(position, correct)
+        return options, position
+
+    @staticmethod
+    def _therapy_summary(condition: Dict[str, Any], antibiotic: str) -> str:
+        """Therapy lines of a condition that mention an antibiotic"""
+        lines = [
+            f"{entry['condition']}: {entry['therapy']}" if entry["condition"] else entry["therapy"]
+            for entry in condition["therapies"]
+            if antibiotic.lower() in entry["therapy"].lower()
+        ]
+        return "; ".join(lines) or antibiotic
+
+    def _pathogen_question(self, entry: Tuple[Dict[str, Any], str], rng: random.Random) -> Dict[str, Any]:
+        condition, pathogen = entry
+        options, correct = self._options(pathogen, self.pathogen_pools[condition["id"]], rng)
+        return {
+            "question": f"Which of the following is a common pathogen causing {condition['name']}?",
+            "options": options,
+            "correct": correct,
+            "explanation": f"{pathogen} is a common pathogen causing {condition['name']}.",
+            "category": condition["system"],
+            "difficulty": "beginner",
+            "conditionId": condition["id"]
+        }
+
+    def _therapy_question(self, entry: Tuple[Dict[str, Any], str], rng: random.Random) -> Dict[str, Any]:
+        condition, antibiotic = entry
+        options, correct = self._options(antibiotic, self.therapy_pools[condition["id"]], rng)
+        return {
+            "question": f"Which antibiotic is part of the recommended empiric therapy for {condition['name']}?",
+            "options": options,
+            "correct": correct,
+            "explanation": f"Recommended empiric therapy for {condition['name']}: {self._therapy_summary(condition, antibiotic)}.",
+            "category": condition["system"],
+            "difficulty": "intermediate",
+            "conditionId": condition["id"]
+        }
+
+    def _pathogen_condition_question(self, entry: Tuple[str, Dict[str, Any]], rng: random.Random) -> Dict[str, Any]:
+        pathogen, condition = entry
+        options, correct = self._options(condition["name"], self.pathogen_condition_pools[pathogen], rng)
+        return {
+            "question": f"{pathogen} is a common pathogen in which of the following conditions?",
+            "options": options,
+            "correct": correct,
+            "explanation": f"{pathogen} is a common pathogen in {condition['name']} ({condition['system']}).",
+            "category": condition["system"],
+            "difficulty": "advanced",
+            "conditionId": condition["id"]
+        }
+
+    def _antibiotic_condition_question(self, entry: Tuple[str, Dict[str, Any]], rng: random.Random) -> Dict[str, Any]:
+        antibiotic, condition = entry
+        options, correct = self._options(condition["name"], self.antibiotic_condition_pools[antibiotic], rng)
+        return {
+            "question": f"{antibiotic} is part of the recommended empiric therapy for which of the following conditions?",
+            "options": options,
+            "correct": correct,
+            "explanation": f"Recommended empiric therapy for {condition['name']}: {self._therapy_summary(condition, antibiotic)}.",
+            "category": condition["system"],
+            "difficulty": "advanced",
+            "conditionId": condition["id"]
+        }
+
+    def _category_question(self, entry: Tuple[str, Dict[str, Any]], rng: random.Random) -> Dict[str, Any]:
+        system, condition = entry
+        options, correct = self._options(condition["name"], self.category_pools[system], rng)
+        return {
+            "question": f"Which of the following conditions is covered under {system} in the guidelines?",
+            "options": options,
+            "correct": correct,
+            "explanation": f"{condition['name']} is covered under {system}.",
+            "category": system,
+            "difficulty": "beginner",
+            "conditionId": condition["id"]
+        }
+
+    def generate_question(self, rng: Optional[random.Random] = None) -> Dict[str, Any]:
+        """Generate one question of a uniformly chosen type"""
+        rng = rng or random
+        entries, build = rng.choice(self.question_types)
+        return build(rng.choice(entries), rng)
+
+    def iter_questions(self, num_questions: int, rng: Optional[random.Random] = None,
+                       unique_index: Optional[Any] = None) -> Iterator[Dict[str, Any]]:
+        """Yield generated questions one at a time
+
+        A unique_index (e.g. quiz_generator.QuestionUniquenessIndex) drops
+        duplicates; generation stops early after MAX_DUPLICATE_ATTEMPTS
+        consecutive duplicates.
+        """
+        remaining = num_questions
+        duplicate_streak = 0
+        while remaining > 0:
+            question = self.generate_question(rng)
+            if unique_index is not None and not unique_index.add(question):
+                duplicate_streak += 1
+                if duplicate_streak >= MAX_DUPLICATE_ATTEMPTS:
+                    print(f"Question space exhausted after {num_questions - remaining} unique questions")
+                    return
+                continue
+            duplicate_streak = 0
+            remaining -= 1
+            yield question
+
+    def generate_questions(self, num_questions: int = 25, rng: Optional[random.Random] = None,
+                           unique_index: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Generate a specified number of quiz questions"""
+        return list(self.iter_questions(num_questions, rng, unique_index))
+
+    def sampling_space(self) -> Dict[str, int]:
+        """Number of (subject, answer) entries behind each question type"""
+        return {build.__name__.strip("_"): len(entries) for entries, build in self.question_types}
+
+def main():
+    """Print a few sample guideline questions"""
+    generator = GuidelineQuestionGenerator()
+    print(f"Sampling space: {generator.sampling_space()}")
+    for question in itertools.islice(generator.iter_questions(5, random.Random(0)), 5):
+        print(f"\n{question['question']}")
+        for i, option in enumerate(question["options"]):
+            print(f"  {'*' if i == question['correct'] else ' '} {option}")
+
+if __name__ == "__main__":
+    main()
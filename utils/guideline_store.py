@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Guideline Store for RBO_CSV and RBO_JSON
+Streams the guideline tables into conditions indexed by system, condition, pathogen and antibiotic
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+# Guideline tables at the repository root, relative to where the scripts run
+DEFAULT_CSV_PATH = "RBO_CSV"
+DEFAULT_JSON_PATH = "RBO_JSON"
+
+# Normalized column keys, in file order
+COLUMNS = ["system", "condition", "pathogens", "therapy", "duration", "notes", "resources"]
+
+# Condition cells longer than this continue the previous condition's description
+MAX_CONDITION_NAME_WORDS = 8
+
+# PDF-extraction artifacts: "intra- abdominal", "Ampicillin/ sulbactam"
+BROKEN_HYPHEN_PATTERN = re.compile(r"(\w)([-/]) (?=[a-z])")
+
+# Citation markers left in RBO_JSON by its export: "[cite: 1, 7]" inside strings, "[cite_start ]" between them
+CITATION_PATTERN = re.compile(r"\s*\[cite: [\d, ]+\]")
+CITE_START_PATTERN = re.compile(r"\[cite_start\s*\]")
+
+# Top-level objects of RBO_JSON, one per condition, and the commas its export dropped between values
+JSON_RECORD_SEPARATOR = re.compile(r"\n    \},?\s*\n(?=    \{|\])")
+JSON_MISSING_COMMA_PATTERN = re.compile(r'(["}\]])(\s*\n\s*)(?=["{\[])')
+JSON_ID_PATTERN = re.compile(r'"id": "([^"]*)"')
+
+# "Bloodstream Infection in Nonneonates *uncomplicated" → system and footnoted qualifier
+SYSTEM_QUALIFIER_PATTERN = re.compile(r"^(.*?)\s*\*(\w+)")
+
+# Unquoted fragments that continue the cell before them
+CONTINUATION_FRAGMENT_PATTERN = re.compile(r"^(?:[a-z]|(?:OR|AND|or|and) )")
+
+# Genus names, recognized by common bacterial genus endings
+GENUS = r"[A-Z][a-z]+(?:coccus|cocci|ella|bacter|bacterales|monas|philus|eria|ichia|bacterium|plasma|teus|ydia|atia)\b"
+PATHOGEN_PATTERN = re.compile(rf"\b({GENUS})(?:\s+(species|(?!including\b|in\b|if\b)[a-z]{{3,}}))?")
+
+# Pathogens named by acronym or group in the guideline text
+PATHOGEN_ALIASES = {
+    "GBS": "Group B Streptococcus",
+    "HSV": "Herpes simplex virus",
+    "Anaerobes": "Anaerobes",
+    "MRSA": "Staphylococcus aureus",
+    "MSSA": "Staphylococcus aureus"
+}
+PATHOGEN_ALIAS_PATTERN = re.compile(r"\b(" + "|".join(PATHOGEN_ALIASES) + r")\b")
+
+# Antibiotics, recognized by drug-class stems, with β-lactamase inhibitor combinations kept whole
+DRUG_STEMS = (r"cillin|mycin|micin|floxacin|penem|cycline|zolid|azole|xime|axone|zolin|alexin|dinir|taroline|"
+              r"epime|idime|ovir|planin|fampin")
+INHIBITORS = r"sulbactam|tazobactam|clavulanate"
+ANTIBIOTIC_PATTERN = re.compile(
+    rf"\b(TMP[-/]SMX|Trimethoprim-sulfamethoxazole|[A-Za-z]+(?:{DRUG_STEMS})(?:[-/](?:{INHIBITORS}))?)\b", re.IGNORECASE
+)
+
+# Abbreviations resolved to the canonical antibiotic name
+ANTIBIOTIC_ALIASES = {
+    "tmp-smx": "Trimethoprim-sulfamethoxazole",
+    "tmp/smx": "Trimethoprim-sulfamethoxazole"
+}
+
+# In-memory store cache: abspath → (mtime_ns, size, store)
+_store_cache: Dict[str, Tuple[int, int, "GuidelineStore"]] = {}
+
+def clean_text(text: str) -> str:
+    """Collapse padding and line breaks and rejoin words split by extraction"""
+    return BROKEN_HYPHEN_PATTERN.sub(r"\1\2", " ".join(text.split()))
+
+def _paren_depth(text: str) -> int:
+    return text.count("(") - text.count(")")
+
+def repair_row(fields: List[str], width: int = len(COLUMNS)) -> List[str]:
+    """Rejoin cells that unquoted commas split into extra fields
+
+    Fragments are merged back, while the row is too wide, in order of
+    confidence: unbalanced parentheses, fragments that start lowercase or
+    with a connective, surplus leading empty cells, and finally adjacent
+    short cells (e.g. "Ear" + "Nose, and Throat").
+    """
+    fields = [clean_text(field) for field in fields]
+
+    def merge(i: int):
+        fields[i - 1:i + 1] = [f"{fields[i - 1]}, {fields[i]}" if fields[i - 1] else fields[i]]
+
+    i = 1
+    while len(fields) > width and i < len(fields):
+        if fields[i] and (_paren_depth(fields[i - 1]) > 0 or _paren_depth(fields[i]) < 0):
+            merge(i)
+        else:
+            i += 1
+
+    i = 1
+    while len(fields) > width and i < len(fields):
+        if fields[i - 1] and CONTINUATION_FRAGMENT_PATTERN.match(fields[i]):
+            merge(i)
+        else:
+            i += 1
+
+    while len(fields) > width and not fields[0] and not fields[1]:
+        del fields[0]
+
+    i = 1
+    while len(fields) > width and i < len(fields):
+        if fields[i - 1] and fields[i] and len(fields[i - 1].split()) + len(fields[i].split()) <= 4:
+            merge(i)
+        else:
+            i += 1
+
+    return (fields + [""] * width)[:width]
+
+def iter_csv_rows(path: str = DEFAULT_CSV_PATH) -> Iterator[Dict[str, str]]:
+    """Stream the table's rows as dicts keyed by COLUMNS, with cells cleaned and repaired"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, skipinitialspace=True)
+        header = next(reader, None)
+        if header is None:
+            return
+        for fields in reader:
+            if any(field.strip() for field in fields):
+                yield dict(zip(COLUMNS, repair_row(fields)))
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+def _new_condition(system: str, name: str, description: str) -> Dict[str, Any]:
+    return {
+        "id": _slug(f"{name} {system}" if system.lower() not in name.lower() else name),
+        "system": system,
+        "name": name,
+        "description": description,
+        "pathogen_text": [],
+        "therapies": [],
+        "durations": [],
+        "notes": [],
+        "resources": [],
+        "pathogens": [],
+        "antibiotics": []
+    }
+
+def iter_conditions(path: str = DEFAULT_CSV_PATH) -> Iterator[Dict[str, Any]]:
+    """Stream conditions, folding each continuation row into the condition it belongs to
+
+    A row starts a new condition when its Condition cell holds a name; rows
+    with an empty Condition cell (or a long one continuing the description)
+    add their pathogens, therapy, duration, notes and resources to the
+    current condition. Each condition is yielded once the next one starts.
+    """
+    current = None
+    system = ""
+
+    for row in iter_csv_rows(path):
+        row_system, qualifier = row["system"], None
+        match = SYSTEM_QUALIFIER_PATTERN.match(row_system)
+        if match:
+            row_system, qualifier = match.group(1), match.group(2)
+
+        condition_cell = row["condition"]
+        is_footnote = condition_cell.startswith("*")
+        is_description = is_footnote or len(condition_cell.split()) > MAX_CONDITION_NAME_WORDS
+        starts_condition = current is None or (condition_cell and (not is_description or qualifier))
+
+        if starts_condition:
+            if current is not None:
+                yield current
+            if row_system:
+                system = row_system
+            if qualifier:
+                name = f"{qualifier.capitalize()} {system.lower()}"
+            else:
+                name = condition_cell
+            current = _new_condition(system, name, condition_cell.lstrip("*") if is_description else "")
+        elif is_description and condition_cell:
+            current["description"] = f"{current['description']}. {condition_cell}" if current["description"] else condition_cell
+
+        if row["pathogens"]:
+            current["pathogen_text"].append(row["pathogens"])
+        if row["therapy"]:
+            current["therapies"].append({"condition": row["pathogens"] or None, "therapy": row["therapy"]})
+        for field, key in (("duration", "durations"), ("notes", "notes"), ("resources", "resources")):
+            if row[field]:
+                current[key].append(row[field])
+
+    if current is not None:
+        yield current
+
+def iter_json_records(path: str = DEFAULT_JSON_PATH) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """Yield (id, record) for each condition object in RBO_JSON, repairing its export damage
+
+    The file is not valid JSON as a whole, so each top-level object is
+    parsed on its own after removing "[cite_start ]" markers and restoring
+    dropped commas. Objects that still do not parse are yielded as (id, None).
+    """
+    with open(path, encoding="utf-8") as f:
+        text = CITE_START_PATTERN.sub("", f.read())
+
+    for chunk in JSON_RECORD_SEPARATOR.split(text):
+        chunk = chunk.strip().lstrip("[").strip()
+        if not chunk.startswith("{"):
+            continue
+        match = JSON_ID_PATTERN.search(chunk)
+        record_id = match.group(1) if match else ""
+        try:
+            record = json.loads(JSON_MISSING_COMMA_PATTERN.sub(r"\1,\2", chunk.rstrip(",}") + "\n}"))
+        except json.JSONDecodeError:
+            record = None
+        yield record_id, record
+
+def condition_from_json(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an RBO_JSON condition object into the store's condition layout"""
+    def strip(values: List[Any]) -> List[str]:
+        return list(dict.fromkeys(clean_text(CITATION_PATTERN.sub("", value)) for value in values if isinstance(value, str)))
+
+    condition = _new_condition(record.get("category", ""), clean_text(record.get("name", "")),
+                               clean_text(CITATION_PATTERN.sub("", record.get("description") or "")))
+    condition["id"] = record.get("id") or condition["id"]
+    condition["pathogen_text"] = strip(record.get("commonPathogens", []))
+    condition["therapies"] = [
+        {"condition": entry.get("condition"), "therapy": clean_text(CITATION_PATTERN.sub("", entry.get("therapy") or ""))}
+        for entry in record.get("empiricAntibioticTherapy", [])
+    ]
+    condition["durations"] = strip(record.get("antibioticDuration", []))
+    condition["notes"] = strip(record.get("notes", []))
+    condition["resources"] = strip(record.get("keyResources", []))
+    return condition
+
+def iter_json_conditions(path: str = DEFAULT_JSON_PATH, csv_path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield RBO_JSON conditions, rebuilding unparseable objects from RBO_CSV
+
+    A damaged object is replaced by the CSV condition whose id starts with
+    the object's id, keeping the JSON id so conditionId values still match.
+    """
+    if csv_path is None:
+        csv_path = os.path.join(os.path.dirname(path), DEFAULT_CSV_PATH)
+
+    for record_id, record in iter_json_records(path):
+        if record is not None:
+            yield condition_from_json(record)
+            continue
+
+        fallback = None
+        if record_id and os.path.exists(csv_path):
+            fallback = next((condition for condition in load_guideline_store(csv_path).conditions
+                             if condition["id"].startswith(record_id)), None)
+        if fallback is None:
+            print(f"Warning: skipping unreadable condition '{record_id}' in {path}")
+            continue
+        print(f"Warning: condition '{record_id}' in {path} is damaged; using its {csv_path} entry")
+        yield {**fallback, "id": record_id, "pathogens": [], "antibiotics": []}
+
+def extract_antibiotics(text: str) -> List[str]:
+    """Canonical antibiotic names mentioned in a therapy text, in order of first mention"""
+    found = []
+    for name in ANTIBIOTIC_PATTERN.findall(text):
+        canonical = ANTIBIOTIC_ALIASES.get(name.lower())
+        if canonical is None:
+            canonical = name[0].upper() + name[1:].lower().replace("/", "-")
+        if canonical not in found:
+            found.append(canonical)
+    return found
+
+class GuidelineStore:
+    """Normalized guideline conditions with lookup indexes
+
+    Index keys are case-insensitive. Pathogen queries also accept the
+    abbreviated forms used in the guideline text (e.g. "S aureus").
+    """
+
+    def __init__(self, conditions: List[Dict[str, Any]]):
+        self.conditions = conditions
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_system: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_condition: Dict[str, Dict[str, Any]] = {}
+        self.by_pathogen: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_antibiotic: Dict[str, List[Dict[str, Any]]] = {}
+        self.pathogen_abbreviations: Dict[str, str] = {}
+        self._build_indexes()
+
+    @classmethod
+    def from_csv(cls, path: str = DEFAULT_CSV_PATH) -> "GuidelineStore":
+        """Parse a guideline CSV into a store"""
+        return cls(list(iter_conditions(path)))
+
+    @classmethod
+    def from_json(cls, path: str = DEFAULT_JSON_PATH, csv_path: Optional[str] = None) -> "GuidelineStore":
+        """Parse RBO_JSON into a store"""
+        return cls(list(iter_json_conditions(path, csv_path)))
+
+    def _build_indexes(self):
+        """Resolve pathogen and antibiotic names and index every condition"""
+        # Full binomials anywhere in the table let abbreviations like "S aureus" be resolved
+        binomials = {}
+        for condition in self.conditions:
+            for text in condition["pathogen_text"] + [condition["description"]]:
+                for genus, species in PATHOGEN_PATTERN.findall(text):
+                    if species and species != "species":
+                        binomials.setdefault((genus[0], species), f"{genus} {species}")
+        for (initial, species), name in binomials.items():
+            self.pathogen_abbreviations[f"{initial} {species}".lower()] = name
+            self.pathogen_abbreviations[f"{initial}{species}".lower()] = name
+        species_names = sorted({species for _, species in binomials}, key=len, reverse=True)
+        abbreviation_pattern = re.compile(r"\b([A-Z]) ?(" + "|".join(map(re.escape, species_names)) + r")\b") if species_names else None
+
+        for condition in self.conditions:
+            pathogens = []
+            for text in condition["pathogen_text"]:
+                found = [(m.start(), f"{m.group(1)} {m.group(2)}" if m.group(2) else m.group(1))
+                         for m in PATHOGEN_PATTERN.finditer(text)]
+                found += [(m.start(), PATHOGEN_ALIASES[m.group(1)]) for m in PATHOGEN_ALIAS_PATTERN.finditer(text)]
+                if abbreviation_pattern is not None:
+                    found += [(m.start(), binomials.get((m.group(1), m.group(2)))) for m in abbreviation_pattern.finditer(text)]
+                for _, name in sorted(found, key=lambda item: item[0]):
+                    if name and name not in pathogens:
+                        pathogens.append(name)
+            condition["pathogens"] = pathogens
+
+            antibiotics = []
+            for entry in condition["therapies"]:
+                for name in extract_antibiotics(entry["therapy"]):
+                    if name not in antibiotics:
+                        antibiotics.append(name)
+            condition["antibiotics"] = antibiotics
+
+            self.by_id[condition["id"]] = condition
+            self.by_system.setdefault(condition["system"].lower(), []).append(condition)
+            self.by_condition[condition["name"].lower()] = condition
+            for name in pathogens:
+                self.by_pathogen.setdefault(name.lower(), []).append(condition)
+            for name in antibiotics:
+                self.by_antibiotic.setdefault(name.lower(), []).append(condition)
+
+    def systems(self) -> List[str]:
+        """Organ systems in table order"""
+        return list(dict.fromkeys(condition["system"] for condition in self.conditions))
+
+    def pathogens(self) -> List[str]:
+        """Every indexed pathogen name"""
+        return sorted({name for condition in self.conditions for name in condition["pathogens"]})
+
+    def antibiotics(self) -> List[str]:
+        """Every indexed antibiotic name"""
+        return sorted({name for condition in self.conditions for name in condition["antibiotics"]})
+
+    def condition(self, key: str) -> Optional[Dict[str, Any]]:
+        """Condition by id or name"""
+        return self.by_id.get(key) or self.by_condition.get(key.lower())
+
+    def conditions_for_system(self, system: str) -> List[Dict[str, Any]]:
+        """Conditions listed under an organ system"""
+        return self.by_system.get(system.lower(), [])
+
+    def conditions_with_pathogen(self, pathogen: str) -> List[Dict[str, Any]]:
+        """Conditions whose common pathogens include this one"""
+        name = self.pathogen_abbreviations.get(clean_text(pathogen).lower(), pathogen)
+        return self.by_pathogen.get(name.lower(), [])
+
+    def conditions_treated_with(self, antibiotic: str) -> List[Dict[str, Any]]:
+        """Conditions whose empiric therapy mentions this antibiotic"""
+        name = ANTIBIOTIC_ALIASES.get(antibiotic.lower(), antibiotic)
+        return self.by_antibiotic.get(name.lower(), [])
+
+def is_json_path(path: str) -> bool:
+    """Whether a guideline file holds RBO_JSON rather than the CSV table"""
+    with open(path, encoding="utf-8") as f:
+        return f.read(64).lstrip().startswith("[")
+
+def load_guideline_store(path: str = DEFAULT_CSV_PATH) -> GuidelineStore:
+    """Parse a guideline CSV or RBO_JSON file once per process, reusing the store until the file changes"""
+    abspath = os.path.abspath(path)
+    stat = os.stat(abspath)
+    cached = _store_cache.get(abspath)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    store = GuidelineStore.from_json(abspath) if is_json_path(abspath) else GuidelineStore.from_csv(abspath)
+    _store_cache[abspath] = (stat.st_mtime_ns, stat.st_size, store)
+    return store
+
+def main():
+    """Summarize the guideline table"""
+    parser = argparse.ArgumentParser(description="Parse the RBO_CSV or RBO_JSON guideline data and summarize its indexes")
+    parser.add_argument("path", nargs="?", default=DEFAULT_CSV_PATH, help="guideline CSV or RBO_JSON file to parse")
+    parser.add_argument("--pathogen", help="list conditions caused by this pathogen")
+    parser.add_argument("--antibiotic", help="list conditions treated with this antibiotic")
+    args = parser.parse_args()
+
+    try:
+        store = load_guideline_store(args.path)
+    except Exception as e:
+        print(f"Error loading guidelines from {args.path}: {e}")
+        return
+
+    print(f"Loaded {len(store.conditions)} conditions across {len(store.systems())} systems")
+    for system in store.systems():
+        names = ", ".join(condition["name"] for condition in store.conditions_for_system(system))
+        print(f"  {system}: {names}")
+    print(f"Indexed {len(store.pathogens())} pathogens and {len(store.antibiotics())} antibiotics")
+
+    if args.pathogen:
+        print(f"\nConditions with {args.pathogen}:")
+        for condition in store.conditions_with_pathogen(args.pathogen):
+            print(f"  {condition['system']}: {condition['name']}")
+    if args.antibiotic:
+        print(f"\nConditions treated with {args.antibiotic}:")
+        for condition in store.conditions_treated_with(args.antibiotic):
+            print(f"  {condition['system']}: {condition['name']}")
+
+if __name__ == "__main__":
+    main()
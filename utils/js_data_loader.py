@@ -0,0 +1,332 @@
+"""
+JavaScript Data Module Loader
+Reads the array and object literals exported by src/data/*.js modules for the utils scripts
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+# Declarations that introduce an exported literal; comments and strings are
+# matched first so commented-out code is never mistaken for a declaration
+DECLARATION_PATTERN = re.compile(r"""
+    //[^\n]*
+  | /\*.*?\*/
+  | "(?:[^"\\\n]|\\.)*"
+  | '(?:[^'\\\n]|\\.)*'
+  | (?:(?:export\s+)?(?:const|let|var)\s+(?P<name>[A-Za-z_$][\w$]*)\s*=|export\s+default)\s*(?P<opener>[\[{])
+""", re.S | re.X)
+
+# Structural tokens inside a literal: strings, comments, brackets and commas.
+# A lone quote or "/*" is a string or comment that continues past the scanned text.
+STRUCTURE_PATTERN = re.compile(r"""
+    "(?:[^"\\\n]|\\.)*"
+  | '(?:[^'\\\n]|\\.)*'
+  | `(?:[^`\\]|\\.)*`
+  | //[^\n]*
+  | /\*.*?\*/
+  | [\[\]{},]
+  | ["'`]
+  | /\*
+""", re.S | re.X)
+
+# Pass 1 of JS -> JSON: drop comments and rewrite single-quoted/template strings
+COMMENT_OR_STRING_PATTERN = re.compile(r"""
+    "(?:[^"\\\n]|\\.)*"
+  | '(?P<single>(?:[^'\\\n]|\\.)*)'
+  | `(?P<template>(?:[^`\\]|\\.)*)`
+  | //[^\n]*
+  | /\*.*?\*/
+""", re.S | re.X)
+
+# Pass 2 of JS -> JSON: drop trailing commas and quote bare or numeric keys
+COMMA_OR_KEY_PATTERN = re.compile(r"""
+    "(?:[^"\\\n]|\\.)*"
+  | ,(?P<closer>\s*[\]}])
+  | (?P<before>[{,]\s*)(?P<key>[A-Za-z_$][\w$]*|\d+)(?P<after>\s*:)
+""", re.X)
+
+JS_ESCAPE_PATTERN = re.compile(r'\\(.)|["\n\t]', re.S)
+JSON_ESCAPES = {'"': '\\"', "\n": "\\n", "\t": "\\t"}
+
+# Marker for array slots that hold no element
+_EMPTY = object()
+
+# Parsed literals keyed by (path, name), valid while the file's mtime and size match
+_parse_cache: Dict[Tuple[str, Optional[str]], Tuple[int, int, Any]] = {}
+
+# Bump when parsing changes so stale on-disk entries are ignored
+CACHE_FORMAT_VERSION = 1
+
+# On-disk parse cache; the directory can be moved with QUIZ_DATA_CACHE_DIR
+_cache_settings = {
+    "enabled": True,
+    "dir": os.environ.get(
+        "QUIZ_DATA_CACHE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "js_data")
+    ),
+    "max_bytes": 256 * 1024 * 1024
+}
+
+def _to_json_string(content: str) -> str:
+    """Re-quote the body of a single-quoted or template JS string as a JSON string"""
+    def escape(match):
+        if match.group(1) is not None:
+            return match.group(1) if match.group(1) in "'`" else match.group(0)
+        return JSON_ESCAPES[match.group(0)]
+    return '"' + JS_ESCAPE_PATTERN.sub(escape, content) + '"'
+
+def _strip_comments_and_requote(match) -> str:
+    text = match.group(0)
+    if match.group("single") is not None:
+        return _to_json_string(match.group("single"))
+    if match.group("template") is not None:
+        return _to_json_string(match.group("template"))
+    if text.startswith("/"):
+        return " "
+    return text
+
+def _fix_commas_and_keys(match) -> str:
+    if match.group("closer") is not None:
+        return match.group("closer")
+    if match.group("key") is not None:
+        return f'{match.group("before")}"{match.group("key")}"{match.group("after")}'
+    return match.group(0)
+
+def parse_js_literal(text: str) -> Any:
+    """Parse a JS object/array literal that may use comments, trailing commas or bare keys
+
+    Plain JSON takes the json.loads fast path; anything else is rewritten to
+    JSON first, leaving string contents untouched.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    text = COMMENT_OR_STRING_PATTERN.sub(_strip_comments_and_requote, text)
+    text = COMMA_OR_KEY_PATTERN.sub(_fix_commas_and_keys, text)
+    return json.loads(text)
+
+def _parse_element(text: str) -> Any:
+    """Parse one array element; whitespace or comments after a trailing comma give _EMPTY"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    text = COMMENT_OR_STRING_PATTERN.sub(_strip_comments_and_requote, text)
+    if not text.strip():
+        return _EMPTY
+    return json.loads(COMMA_OR_KEY_PATTERN.sub(_fix_commas_and_keys, text))
+
+def _iter_literal_parts(path: str, name: Optional[str], chunk_size: int) -> Iterator[Tuple[str, str]]:
+    """Yield (opener, text) for the parts of an exported literal, reading in chunks
+
+    For an array each top-level element is yielded as soon as it is complete;
+    an object is yielded once as the text between its braces.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        eof = False
+
+        # Locate the declaration, only trusting text up to the last complete line
+        declaration = None
+        while declaration is None:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            limit = len(buffer) if eof else buffer.rfind("\n") + 1
+            for match in DECLARATION_PATTERN.finditer(buffer, 0, limit):
+                if match.group("opener") and (name is None or match.group("name") == name):
+                    declaration = match
+                    break
+            if declaration is None and eof:
+                target = f"'{name}'" if name else "array or object"
+                raise ValueError(f"No exported {target} literal found in {path}")
+
+        opener = declaration.group("opener")
+        split_elements = opener == "["
+        buffer = buffer[declaration.end():]
+        part_start = 0
+        scan_pos = 0
+        depth = 0
+
+        while True:
+            limit = len(buffer) if eof else buffer.rfind("\n") + 1
+            for match in STRUCTURE_PATTERN.finditer(buffer, scan_pos, max(limit, scan_pos)):
+                token = match.group(0)
+                if token == "[" or token == "{":
+                    depth += 1
+                elif token == "]" or token == "}":
+                    if depth == 0:
+                        text = buffer[part_start:match.start()]
+                        if text.strip() or not split_elements:
+                            yield opener, text
+                        return
+                    depth -= 1
+                elif token == ",":
+                    if depth == 0 and split_elements:
+                        yield opener, buffer[part_start:match.start()]
+                        part_start = match.end()
+                elif len(token) == 1 or token == "/*":
+                    # Unterminated string or comment: wait for more text
+                    if eof:
+                        raise ValueError(f"Unterminated string or comment in {path}")
+                    scan_pos = match.start()
+                    break
+            else:
+                scan_pos = max(limit, scan_pos)
+
+            if eof:
+                raise ValueError(f"Unterminated literal in {path}")
+
+            # Keep only the unfinished part, then read more
+            buffer = buffer[part_start:]
+            scan_pos -= part_start
+            part_start = 0
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+
+def iter_js_array(path: str, name: Optional[str] = None, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """Stream the elements of an array exported by a JS module, one at a time
+
+    name selects the declared variable (e.g. "quizQuestions"); by default the
+    first array or object literal declared in the file is used.
+    """
+    for opener, text in _iter_literal_parts(path, name, chunk_size):
+        if opener != "[":
+            raise ValueError(f"Exported literal in {path} is not an array")
+        value = _parse_element(text)
+        if value is not _EMPTY:
+            yield value
+
+def _parse_export(path: str, name: Optional[str]) -> Any:
+    """Parse an exported array or object from scratch"""
+    parts = list(_iter_literal_parts(path, name, 1 << 20))
+    if parts and parts[0][0] == "{":
+        return parse_js_literal("{" + parts[0][1] + "}")
+    return [element for element in map(_parse_element, (text for _, text in parts)) if element is not _EMPTY]
+
+def configure_cache(enabled: bool = True, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+    """Set process-wide cache behaviour for load_js_export"""
+    _cache_settings["enabled"] = enabled
+    if cache_dir is not None:
+        _cache_settings["dir"] = cache_dir
+    if max_bytes is not None:
+        _cache_settings["max_bytes"] = max_bytes
+
+def clear_cache():
+    """Drop the in-process cache and delete every on-disk cache entry"""
+    _parse_cache.clear()
+    cache_dir = _cache_settings["dir"]
+    if os.path.isdir(cache_dir):
+        for entry in os.listdir(cache_dir):
+            if entry.endswith(".pickle"):
+                os.remove(os.path.join(cache_dir, entry))
+
+def add_cache_arguments(parser: argparse.ArgumentParser):
+    """Add the shared --no-cache / --clear-cache flags to a script's argument parser"""
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse data files from scratch without reading or writing the parse cache")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="delete cached parse results before running")
+
+def apply_cache_arguments(args: argparse.Namespace):
+    """Apply the flags added by add_cache_arguments"""
+    if args.clear_cache:
+        clear_cache()
+    configure_cache(enabled=not args.no_cache)
+
+def _content_hash(path: str) -> str:
+    """Hash a file's bytes in chunks, so the check costs one streaming read"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _disk_cache_path(content_hash: str, name: Optional[str]) -> str:
+    label = name or "_default"
+    return os.path.join(_cache_settings["dir"], f"{content_hash}-{label}-v{CACHE_FORMAT_VERSION}.pickle")
+
+def _read_disk_cache(cache_path: str) -> Any:
+    """Return a cached value, or _EMPTY on a miss or unreadable entry"""
+    try:
+        with open(cache_path, "rb") as f:
+            value = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return _EMPTY
+    # Touch the entry so eviction is least-recently-used
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass
+    return value
+
+def _write_disk_cache(cache_path: str, value: Any):
+    """Atomically store a value, then evict old entries beyond the size budget"""
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not write parse cache {cache_path}: {e}")
+        return
+
+    entries = []
+    for entry in os.listdir(cache_dir):
+        if entry.endswith(".pickle"):
+            entry_path = os.path.join(cache_dir, entry)
+            stat = os.stat(entry_path)
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry_path in sorted(entries):
+        if total <= _cache_settings["max_bytes"] or entry_path == cache_path:
+            continue
+        os.remove(entry_path)
+        total -= size
+
+def load_js_export(path: str, name: Optional[str] = None, use_cache: Optional[bool] = None) -> Any:
+    """Load an array or object exported by a JS module
+
+    Two cache layers skip parsing for unchanged files. The in-process layer is
+    keyed on the file's mtime and size. The on-disk layer is a pickle per
+    content hash under the cache directory, with least-recently-used entries
+    evicted beyond the size budget. use_cache=False bypasses both; the
+    default follows configure_cache. Cached values are shared, so callers
+    should copy before mutating.
+    """
+    if use_cache is None:
+        use_cache = _cache_settings["enabled"]
+    if not use_cache:
+        return _parse_export(path, name)
+
+    key = (os.path.abspath(path), name)
+    stat = os.stat(path)
+    cached = _parse_cache.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    cache_path = _disk_cache_path(_content_hash(path), name)
+    value = _read_disk_cache(cache_path)
+    if value is _EMPTY:
+        value = _parse_export(path, name)
+        _write_disk_cache(cache_path, value)
+
+    _parse_cache[key] = (stat.st_mtime_ns, stat.st_size, value)
+    return value
+
+def load_js_array(path: str, name: Optional[str] = None, use_cache: Optional[bool] = None) -> List[Any]:
+    """Load an exported array as a list (a fresh list; elements are shared with the cache)"""
+    value = load_js_export(path, name, use_cache)
+    if not isinstance(value, list):
+        raise ValueError(f"Exported literal in {path} is not an array")
+    return list(value)
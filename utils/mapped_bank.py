@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Question Banks
+Indexes the records of a JSON Lines file or JS data module in place and decodes them on access
+"""
+
+import json
+import mmap
+import os
+import re
+from array import array
+from collections.abc import Sequence
+from typing import List, Dict, Any, Iterator, Optional, Union
+
+from js_data_loader import DECLARATION_PATTERN, STRUCTURE_PATTERN, _EMPTY, _parse_element
+from question_io import STDIO_PATH, is_jsonl_path
+
+# Non-blank lines of a JSON Lines file
+JSONL_RECORD_PATTERN = re.compile(rb"[^\n]*\S[^\n]*")
+
+# An array element that is a plain JSON object whose values are strings, numbers or flat arrays,
+# matched in one step; anything else (comments, quoting, deeper nesting) falls back to token scanning.
+# Runs of plain bytes are matched through a lookahead and backreference, which cannot backtrack into
+# them, so elements that do not match fail in linear time.
+STRING = rb'"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+FLAT_OBJECT_PATTERN = re.compile(
+    rb"\s*\{(?:(?=([^{}\[\]\"'`/]+))\1|" + STRING
+    + rb"|\[(?:(?=([^{}\[\]\"'`/]+))\2|" + STRING + rb")*\])*\}"
+)
+
+# Any non-whitespace byte, for telling empty array slots from bare literals
+NON_SPACE_PATTERN = re.compile(rb"\S")
+
+def _bytes_pattern(pattern: "re.Pattern") -> "re.Pattern":
+    """Compile a JS loader pattern for scanning UTF-8 bytes
+
+    The patterns only match ASCII delimiters, and UTF-8 never reuses ASCII
+    bytes inside multi-byte characters, so byte offsets line up with records.
+    """
+    return re.compile(pattern.pattern.encode("ascii"), pattern.flags & ~re.UNICODE)
+
+DECLARATION_BYTES_PATTERN = _bytes_pattern(DECLARATION_PATTERN)
+STRUCTURE_BYTES_PATTERN = _bytes_pattern(STRUCTURE_PATTERN)
+
+class MappedQuestionBank(Sequence):
+    """Random-access view of the questions in a file, backed by mmap
+
+    Opening the bank scans the mapped file once for record boundaries,
+    keeping only two offset arrays (16 bytes per record); the file's text is
+    never read into Python objects. Indexing decodes just that record, so
+    memory stays flat whatever the file size and the OS pages text in and
+    out as records are touched.
+
+    JS data modules are scanned with the same declaration and structure
+    patterns js_data_loader uses, so comments, strings containing brackets
+    and trailing commas are handled the same way.
+    """
+
+    def __init__(self, path: str, name: Optional[str] = None):
+        if path == STDIO_PATH:
+            raise ValueError("stdin cannot be memory-mapped")
+        self.path = path
+        self.jsonl = is_jsonl_path(path)
+        self.starts = array("Q")
+        self.ends = array("Q")
+        self._file = open(path, "rb")
+        self._map = None
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.jsonl:
+                self._index_jsonl()
+            else:
+                self._index_js_array(name)
+        elif not self.jsonl:
+            raise ValueError(f"No exported array literal found in {path}")
+
+    def _index_jsonl(self):
+        """Record the span of every non-blank line"""
+        for match in JSONL_RECORD_PATTERN.finditer(self._map):
+            self.starts.append(match.start())
+            self.ends.append(match.end())
+
+    def _index_js_array(self, name: Optional[str]):
+        """Record the span of every top-level element of the exported array"""
+        data = self._map
+        wanted = name.encode("utf-8") if name else None
+        declaration = None
+        for match in DECLARATION_BYTES_PATTERN.finditer(data):
+            if match.group("opener") and (wanted is None or match.group("name") == wanted):
+                declaration = match
+                break
+        if declaration is None:
+            target = f"'{name}'" if name else "array or object"
+            raise ValueError(f"No exported {target} literal found in {self.path}")
+        if declaration.group("opener") != b"[":
+            raise ValueError(f"Exported literal in {self.path} is not an array")
+
+        depth = 0
+        part_start = previous_end = pos = declaration.end()
+        content = False
+        while True:
+            if depth == 0 and not content:
+                flat = FLAT_OBJECT_PATTERN.match(data, pos)
+                if flat is not None:
+                    content = True
+                    previous_end = pos = flat.end()
+            match = STRUCTURE_BYTES_PATTERN.search(data, pos)
+            if match is None:
+                raise ValueError(f"Unterminated literal in {self.path}")
+            pos = match.end()
+            token = match.group(0)
+            if depth == 0 and not content and NON_SPACE_PATTERN.search(data, previous_end, match.start()):
+                content = True
+            previous_end = match.end()
+
+            if token == b"[" or token == b"{":
+                depth += 1
+                content = True
+            elif token == b"]" or token == b"}":
+                if depth == 0:
+                    if content:
+                        self.starts.append(part_start)
+                        self.ends.append(match.start())
+                    return
+                depth -= 1
+            elif token == b",":
+                if depth == 0:
+                    if content:
+                        self.starts.append(part_start)
+                        self.ends.append(match.start())
+                    part_start = match.end()
+                    content = False
+            elif len(token) == 1 or token == b"/*":
+                raise ValueError(f"Unterminated string or comment in {self.path}")
+            elif not token.startswith((b"//", b"/*")):
+                content = True
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def record_text(self, i: int) -> bytes:
+        """Raw bytes of record i"""
+        return self._map[self.starts[i]:self.ends[i]]
+
+    def _decode(self, i: int) -> Any:
+        text = self.record_text(i)
+        if self.jsonl:
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{self.path}: record {i + 1}: invalid JSON record: {e}") from e
+        value = _parse_element(text.decode("utf-8"))
+        return None if value is _EMPTY else value
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(i, slice):
+            return [self._decode(j) for j in range(*i.indices(len(self)))]
+        if not -len(self) <= i < len(self):
+            raise IndexError("question index out of range")
+        return self._decode(i % len(self))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self._decode(i)
+
+    def close(self):
+        """Release the mapping and the file"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "MappedQuestionBank":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_mapped_questions(path: str, name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the questions of a mapped bank in order, closing the mapping when done"""
+    with MappedQuestionBank(path, name) as bank:
+        yield from bank
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Question Stream I/O
+Reads and writes question banks as JSON Lines or JS data modules, one record at a time
+"""
+
+import glob
+import json
+import os
+import sys
+from contextlib import contextmanager, redirect_stdout
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from js_data_loader import iter_js_array
+
+# Path meaning stdin for inputs and stdout for outputs
+STDIO_PATH = "-"
+
+# File extensions treated as JSON Lines
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+# Bundled question bank the scripts read by default, and the variable it exports
+DEFAULT_QUESTIONS_PATH = "src/data/quizQuestions.js"
+DEFAULT_QUESTIONS_NAME = "quizQuestions"
+
+# Stream that carries records while status messages are redirected to stderr
+_record_stdout = None
+
+T = TypeVar("T")
+
+def is_jsonl_path(path: str) -> bool:
+    """Whether a path is read and written as JSON Lines"""
+    return path == STDIO_PATH or path.lower().endswith(JSONL_EXTENSIONS)
+
+def expand_input_paths(patterns: Iterable[str]) -> List[str]:
+    """Expand glob patterns (** included) into input paths, keeping order and dropping repeats
+
+    Patterns that match nothing are kept as given, so a missing file is still
+    reported by whatever reads it; - (stdin) is never expanded.
+    """
+    paths = []
+    for pattern in patterns:
+        is_pattern = pattern != STDIO_PATH and any(char in pattern for char in "*?[")
+        matches = sorted(glob.glob(pattern, recursive=True)) if is_pattern else []
+        paths.extend(matches or [pattern])
+    return list(dict.fromkeys(paths))
+
+def question_export_name(path: str) -> Optional[str]:
+    """Variable to read questions from in a JS input
+
+    The bundled bank exports several literals, so its questions are read from
+    quizQuestions; any other module (e.g. quiz_generator output) uses its
+    first exported array.
+    """
+    if os.path.normpath(path) == os.path.normpath(DEFAULT_QUESTIONS_PATH):
+        return DEFAULT_QUESTIONS_NAME
+    return None
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield one record per non-blank line of a JSON Lines file or stdin"""
+    f = sys.stdin if path == STDIO_PATH else open(path, encoding="utf-8")
+    try:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON record: {e}") from e
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def iter_question_file(path: str, name: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield questions from a JSON Lines file, stdin, or the exported array of a JS data module"""
+    if is_jsonl_path(path):
+        return iter_jsonl(path)
+    return iter_js_array(path, name)
+
+@contextmanager
+def line_writer(path: str) -> Iterator[Callable[[str], None]]:
+    """Open a JSON Lines output and yield a function that writes one already-encoded record"""
+    if path == STDIO_PATH:
+        f = _record_stdout or sys.stdout
+    else:
+        f = open(path, "w", encoding="utf-8")
+
+    def write(line: str):
+        f.write(line)
+        f.write("\n")
+
+    try:
+        yield write
+    finally:
+        if path == STDIO_PATH:
+            f.flush()
+        else:
+            f.close()
+
+@contextmanager
+def jsonl_writer(path: str) -> Iterator[Callable[[Dict[str, Any]], None]]:
+    """Open a JSON Lines output and yield a function that writes one record"""
+    with line_writer(path) as write_line:
+        yield lambda record: write_line(json.dumps(record, ensure_ascii=False))
+
+def write_jsonl(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """Write records as JSON Lines, returning how many were written"""
+    count = 0
+    with jsonl_writer(path) as write:
+        for record in records:
+            write(record)
+            count += 1
+    return count
+
+def batched(items: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """Group an iterable into lists of at most batch_size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+@contextmanager
+def status_to_stderr(output_path: Optional[str]):
+    """Keep stdout for records when the output is stdout, sending status prints to stderr"""
+    global _record_stdout
+    if output_path != STDIO_PATH:
+        yield
+        return
+
+    _record_stdout = sys.stdout
+    try:
+        with redirect_stdout(sys.stderr):
+            yield
+    finally:
+        _record_stdout = None
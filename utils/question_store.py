@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Compact Question Store
+Holds question banks as typed columns over shared string tables instead of one dict per question
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
+
+from question_io import iter_question_file
+
+# Text fields stored as ids into the shared string table
+TEXT_FIELDS = ("question", "explanation")
+
+# Low-cardinality fields stored as 16-bit codes into their own small tables
+CODED_FIELDS = ("category", "difficulty", "conditionId")
+
+# Largest code a coded field can hold; values past it are kept as extras
+MAX_CODE = 0xFFFF
+
+class StringTable:
+    """Interns strings so each distinct value is stored once and referenced by index"""
+
+    __slots__ = ("strings", "index")
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        """Index of a string, adding it on first sight"""
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+
+    def __getitem__(self, i: int) -> str:
+        return self.strings[i]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the table and its strings"""
+        return (sys.getsizeof(self.strings) + sys.getsizeof(self.index)
+                + sum(sys.getsizeof(value) for value in self.strings))
+
+class QuestionRecord(Mapping):
+    """Read-only dict-like view of one stored question, decoding fields on access"""
+
+    __slots__ = ("store", "i")
+
+    def __init__(self, store: "CompactQuestionStore", i: int):
+        self.store = store
+        self.i = i
+
+    def __getitem__(self, field: str) -> Any:
+        return self.store.field(self.i, field)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.layouts[self.store.layout_codes[self.i]])
+
+    def __len__(self) -> int:
+        return len(self.store.layouts[self.store.layout_codes[self.i]])
+
+    def __contains__(self, field: object) -> bool:
+        return field in self.store.layouts[self.store.layout_codes[self.i]]
+
+class CompactQuestionStore:
+    """Columnar question bank
+
+    Question and explanation text and every option string live in one shared
+    string table; category, difficulty and conditionId are 16-bit codes into
+    small per-field tables. Options are a run of string ids addressed through
+    an offsets array, so a question costs a few array slots instead of a dict,
+    a list and its own copies of strings repeated across the bank.
+
+    Each question's key order is interned as a layout, and fields that do not
+    fit a column (unknown keys, non-string text, non-int answers) are kept
+    per question in extras, so questions round-trip exactly through
+    __getitem__.
+    """
+
+    def __init__(self, questions: Iterable[Dict[str, Any]] = ()):
+        self.strings = StringTable()
+        self.code_tables = {field: StringTable() for field in CODED_FIELDS}
+        self.columns = {field: array("I") for field in TEXT_FIELDS}
+        self.columns.update({field: array("H") for field in CODED_FIELDS})
+        self.correct = array("i")
+        self.option_offsets = array("I", [0])
+        self.option_ids = array("I")
+        self.layouts: List[Tuple[str, ...]] = []
+        self._layout_index: Dict[Tuple[str, ...], int] = {}
+        self.layout_codes = array("I")
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        self.extend(questions)
+
+    @classmethod
+    def from_file(cls, path: str) -> "CompactQuestionStore":
+        """Load a JSON Lines file or JS data module into a store"""
+        return cls(iter_question_file(path))
+
+    def append(self, question: Dict[str, Any]):
+        """Add one question"""
+        i = len(self.correct)
+        extras = {}
+
+        layout = tuple(question)
+        code = self._layout_index.get(layout)
+        if code is None:
+            code = self._layout_index[layout] = len(self.layouts)
+            self.layouts.append(layout)
+        self.layout_codes.append(code)
+
+        for field in TEXT_FIELDS:
+            value = question.get(field)
+            if isinstance(value, str):
+                self.columns[field].append(self.strings.intern(value))
+            else:
+                self.columns[field].append(0)
+                if field in question:
+                    extras[field] = value
+
+        for field in CODED_FIELDS:
+            value = question.get(field)
+            if isinstance(value, str) and (value in self.code_tables[field].index or len(self.code_tables[field]) <= MAX_CODE):
+                self.columns[field].append(self.code_tables[field].intern(value))
+            else:
+                self.columns[field].append(0)
+                if field in question:
+                    extras[field] = value
+
+        correct = question.get("correct")
+        if type(correct) is int and -2 ** 31 <= correct < 2 ** 31:
+            self.correct.append(correct)
+        else:
+            self.correct.append(-1)
+            if "correct" in question:
+                extras["correct"] = correct
+
+        options = question.get("options")
+        if isinstance(options, list) and all(isinstance(option, str) for option in options):
+            intern = self.strings.intern
+            self.option_ids.extend(intern(option) for option in options)
+        elif "options" in question:
+            extras["options"] = options
+        self.option_offsets.append(len(self.option_ids))
+
+        for field in layout:
+            if field not in TEXT_FIELDS and field not in CODED_FIELDS and field not in ("correct", "options"):
+                extras[field] = question[field]
+        if extras:
+            self.extras[i] = extras
+
+    def extend(self, questions: Iterable[Dict[str, Any]]):
+        """Add several questions"""
+        for question in questions:
+            self.append(question)
+
+    def __len__(self) -> int:
+        return len(self.correct)
+
+    def options(self, i: int) -> List[str]:
+        """Option strings of question i"""
+        extras = self.extras.get(i)
+        if extras is not None and "options" in extras:
+            return extras["options"]
+        strings = self.strings.strings
+        return [strings[j] for j in self.option_ids[self.option_offsets[i]:self.option_offsets[i + 1]]]
+
+    def _index(self, i: int) -> int:
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError("question index out of range")
+        return i % n
+
+    def field(self, i: int, field: str) -> Any:
+        """One field of question i, raising KeyError if the question lacks it"""
+        if field not in self.layouts[self.layout_codes[i]]:
+            raise KeyError(field)
+        extras = self.extras.get(i)
+        if extras is not None and field in extras:
+            return extras[field]
+        if field in TEXT_FIELDS:
+            return self.strings[self.columns[field][i]]
+        if field in CODED_FIELDS:
+            return self.code_tables[field][self.columns[field][i]]
+        if field == "correct":
+            return self.correct[i]
+        return self.options(i)
+
+    def record(self, i: int) -> QuestionRecord:
+        """Slotted mapping view of question i that decodes fields lazily"""
+        return QuestionRecord(self, self._index(i))
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        """Question i rebuilt as a dict with its original key order"""
+        i = self._index(i)
+        return {field: self.field(i, field) for field in self.layouts[self.layout_codes[i]]}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def value_counts(self, field: str) -> Dict[str, int]:
+        """Count questions per value of a coded field straight from its code column"""
+        has_field = [field in layout for layout in self.layouts]
+        counts = [0] * max(1, len(self.code_tables[field]))
+        for layout_code, code in zip(self.layout_codes, self.columns[field]):
+            if has_field[layout_code]:
+                counts[code] += 1
+        for i, extras in self.extras.items():
+            if field in extras:
+                counts[self.columns[field][i]] -= 1
+        table = self.code_tables[field]
+        return {table[code]: count for code, count in enumerate(counts) if count}
+
+    def nbytes(self) -> Dict[str, int]:
+        """Approximate memory held by each part of the store"""
+        arrays = [self.correct, self.option_offsets, self.option_ids, self.layout_codes, *self.columns.values()]
+        return {
+            "columns": sum(sys.getsizeof(column) for column in arrays),
+            "strings": self.strings.nbytes(),
+            "code_tables": sum(table.nbytes() for table in self.code_tables.values()),
+            "extras": sys.getsizeof(self.extras) + sum(sys.getsizeof(extras) for extras in self.extras.values())
+        }
+
+def dict_bank_nbytes(questions: List[Dict[str, Any]]) -> int:
+    """Approximate memory of a list of question dicts, counting shared objects once"""
+    seen = set()
+    total = 0
+    stack: List[Any] = [questions]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+    return total
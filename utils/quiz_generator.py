@@ -4,12 +4,183 @@ Antibiotic Learning App - Quiz Question Generator
 Generates new quiz questions based on existing medical data patterns
 """
 
+import argparse
+import gc
+import hashlib
+import itertools
 import json
+import math
 import random
+import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any
+from json.encoder import encode_basestring, encode_basestring_ascii
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional
 import os
 
+try:
+    import numpy as np
+except ImportError:  # optional; bulk sampling falls back to the random module
+    np = None
+
+from guideline_generator import GuidelineQuestionGenerator
+from guideline_store import DEFAULT_JSON_PATH
+from question_io import is_jsonl_path, line_writer, status_to_stderr, write_jsonl
+
+# Width reserved in the file header for a question count patched in after streaming
+TOTAL_PLACEHOLDER_WIDTH = 20
+
+# Consecutive duplicates generate_questions tolerates before giving up
+MAX_DUPLICATE_ATTEMPTS = 1000
+
+@contextmanager
+def paused_gc():
+    """Suspend cyclic garbage collection while building large acyclic structures
+    
+    Generated question dicts hold no reference cycles, so collector passes
+    triggered by their allocation only rescan everything built so far.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+# Patient age and sex in generated stems; ignored when fingerprinting questions
+DEMOGRAPHICS_PATTERN = re.compile(r"\bA \d+-year-old (?:male|female)\b")
+
+def question_fingerprint(question: Dict[str, Any]) -> bytes:
+    """Canonical 16-byte fingerprint of a question
+    
+    Covers question type, correct answer, the unordered option set and the
+    stem with patient demographics removed, so reshuffled options or a
+    different age do not make a question unique.
+    """
+    options = question.get("options", [])
+    correct = question.get("correct", -1)
+    correct_answer = options[correct] if 0 <= correct < len(options) else ""
+    stem = DEMOGRAPHICS_PATTERN.sub("A patient", question.get("question", ""))
+    key = "\x1f".join([
+        question.get("category", ""),
+        question.get("conditionId", ""),
+        correct_answer,
+        "\x1e".join(sorted(options)),
+        stem
+    ])
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+class QuestionUniquenessIndex:
+    """Remembers question fingerprints so duplicates can be rejected during generation
+    
+    By default fingerprints are kept exactly, as 64-bit integers. Passing
+    capacity switches to a fixed-size Bloom filter sized for that many
+    questions at the given false-positive rate; a false positive only causes
+    a unique question to be skipped, never a duplicate to be kept.
+    """
+    
+    def __init__(self, capacity: Optional[int] = None, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.count = 0
+        if capacity is None:
+            self._seen = set()
+        else:
+            self._num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+            self._num_hashes = max(1, round(self._num_bits / capacity * math.log(2)))
+            self._bits = bytearray((self._num_bits + 7) // 8)
+    
+    def add(self, question: Dict[str, Any]) -> bool:
+        """Record a question; return False if it was already present"""
+        digest = question_fingerprint(question)
+        if self.capacity is None:
+            key = int.from_bytes(digest[:8], "little")
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+        else:
+            # Double hashing: bit positions h1 + i*h2 from the two digest halves
+            h1 = int.from_bytes(digest[:8], "little")
+            h2 = int.from_bytes(digest[8:], "little") | 1
+            bits = self._bits
+            positions = [(h1 + i * h2) % self._num_bits for i in range(self._num_hashes)]
+            if all(bits[pos >> 3] & (1 << (pos & 7)) for pos in positions):
+                return False
+            for pos in positions:
+                bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+        return True
+    
+    def __len__(self) -> int:
+        return self.count
+
+class QuestionEncoder:
+    """Encodes generated questions piece by piece, byte for byte as json.dumps would
+    
+    A question's text is its template's encoding with the encoded option list
+    spliced in. Each template and option ordering is encoded once, so a
+    question costs a couple of lookups and a string join.
+    """
+    
+    def __init__(self, jsonl: bool = False):
+        if jsonl:
+            # json.dumps(question, ensure_ascii=False), as question_io.jsonl_writer writes records
+            self.encode_string = encode_basestring
+            self.open, self.separator, self.close = "{", ", ", "}"
+            self.list_open, self.list_separator, self.list_close = "[", ", ", "]"
+        else:
+            # json.dumps(question, indent=2) nested one level, as the JS array in stream_questions_to_file
+            self.encode_string = encode_basestring_ascii
+            self.open, self.separator, self.close = "{\n    ", ",\n    ", "\n  }"
+            self.list_open, self.list_separator, self.list_close = "[\n      ", ",\n      ", "\n    ]"
+        self._items: Dict[Tuple[Tuple[str, Any], ...], str] = {}
+        self._templates: Dict[int, Tuple[Dict[str, Any], str, str]] = {}
+        self._options: Dict[int, Tuple[Tuple[str, ...], str]] = {}
+    
+    def encode_value(self, value: Any) -> str:
+        """JSON for a scalar field value"""
+        if isinstance(value, str):
+            return self.encode_string(value)
+        return json.dumps(value)
+    
+    def _encode_items(self, items: Tuple[Tuple[str, Any], ...]) -> str:
+        """Encoded run of key/value pairs; templates share runs (a stem, an answer and its fields), so runs are memoized"""
+        encoded = self._items.get(items)
+        if encoded is None:
+            encoded = self._items[items] = self.separator.join(
+                [self.encode_value(key) + ": " + self.encode_value(value) for key, value in items]
+            )
+        return encoded
+    
+    def _encode_template(self, template: Dict[str, Any]) -> Tuple[str, str]:
+        """Text before and after the options value of a template's encoding"""
+        items = tuple(template.items())
+        split = list(template).index("options")
+        before = items[:split]
+        after = items[split + 1:]
+        head = self.open + (self._encode_items(before) + self.separator if before else "") + '"options": '
+        tail = (self.separator + self._encode_items(after) if after else "") + self.close
+        return head, tail
+    
+    def encode(self, template: Dict[str, Any], options: Tuple[str, ...]) -> str:
+        """Encoding of the question built from a template and an option ordering"""
+        # Memoized by identity; each entry keeps its object alive so the id cannot be reused
+        _, head, tail = self._templates.get(id(template)) or self._memo_template(template)
+        _, encoded_options = self._options.get(id(options)) or self._memo_options(options)
+        return head + encoded_options + tail
+    
+    def _memo_template(self, template: Dict[str, Any]) -> Tuple[Dict[str, Any], str, str]:
+        entry = self._templates[id(template)] = (template, *self._encode_template(template))
+        return entry
+    
+    def _memo_options(self, options: Tuple[str, ...]) -> Tuple[Tuple[str, ...], str]:
+        encoded = (self.list_open + self.list_separator.join(map(self.encode_value, options)) + self.list_close
+                   if options else "[]")
+        entry = self._options[id(options)] = (options, encoded)
+        return entry
+
 class QuizQuestionGenerator:
     def __init__(self):
         self.antibiotic_data = {
@@ -149,6 +320,21 @@ class QuizQuestionGenerator:
             }
         }
         
+        # Stem building blocks shared by the per-question and bulk generators
+        self.genders = ["male", "female"]
+        self.pathogen_age_range = (20, 80)
+        self.scenario_age_range = (25, 75)
+        self.presenting_symptoms = [
+            "fever and chills",
+            "cough and dyspnea",
+            "dysuria and frequency",
+            "headache and neck stiffness"
+        ]
+        self.infection_types = ["pneumonia", "urinary tract infection", "skin infection", "bloodstream infection"]
+        
+        # Lazily built record table for iter_question_batches
+        self._bulk_records = None
+        
         self.question_templates = [
             {
                 "type": "pathogen_identification",
@@ -182,14 +368,9 @@ class QuizQuestionGenerator:
         pathogen_name = random.choice(list(self.pathogen_data.keys()))
         pathogen = self.pathogen_data[pathogen_name]
         
-        age = random.randint(20, 80)
-        gender = random.choice(["male", "female"])
-        symptoms = random.choice([
-            "fever and chills",
-            "cough and dyspnea",
-            "dysuria and frequency",
-            "headache and neck stiffness"
-        ])
+        age = random.randint(*self.pathogen_age_range)
+        gender = random.choice(self.genders)
+        symptoms = random.choice(self.presenting_symptoms)
         
         question = f"A {age}-year-old {gender} presents with {symptoms}. Gram stain shows {pathogen['gram_stain']} {pathogen['shape']} in {pathogen['arrangement']}. What is the most likely pathogen?"
         
@@ -241,24 +422,13 @@ class QuizQuestionGenerator:
         antibiotic_name = random.choice(list(self.antibiotic_data.keys()))
         antibiotic = self.antibiotic_data[antibiotic_name]
         
-        infection_type = random.choice(["pneumonia", "urinary tract infection", "skin infection", "bloodstream infection"])
+        infection_type = random.choice(self.infection_types)
         
         question = f"A patient with {infection_type} has an isolate resistant to {antibiotic_name}. What is the most likely resistance mechanism?"
         
         # Create options with correct answer and distractors
         correct_mechanism = antibiotic["resistance"]
-        options = [
-            correct_mechanism,
-            "Efflux pumps",
-            "Target modification",
-            "Enzymatic inactivation"
-        ]
-        # Remove duplicates and ensure we have 4 unique options
-        options = list(set(options))
-        if len(options) < 4:
-            additional_options = ["Reduced permeability", "Biofilm formation", "Metabolic bypass"]
-            options.extend([opt for opt in additional_options if opt not in options])
-        options = options[:4]
+        options = self._resistance_options(correct_mechanism)
         random.shuffle(options)
         
         correct_index = options.index(correct_mechanism)
@@ -278,26 +448,15 @@ class QuizQuestionGenerator:
         scenario_type = random.choice(list(self.clinical_scenarios.keys()))
         scenario = self.clinical_scenarios[scenario_type]
         
-        age = random.randint(25, 75)
-        gender = random.choice(["male", "female"])
+        age = random.randint(*self.scenario_age_range)
+        gender = random.choice(self.genders)
         risk_factor = random.choice(scenario["risk_factors"])
         symptoms = random.choice(scenario["symptoms"])
         
         question = f"A {age}-year-old {gender} with {risk_factor} presents with {symptoms}. What is the most appropriate empiric antibiotic therapy?"
         
         # Select appropriate antibiotics based on scenario
-        if scenario_type == "UTI":
-            correct_antibiotic = "Ciprofloxacin"
-            options = ["Ciprofloxacin", "Vancomycin", "Azithromycin", "Clindamycin"]
-        elif scenario_type == "Pneumonia":
-            correct_antibiotic = "Ceftriaxone"
-            options = ["Ceftriaxone", "Gentamicin", "Clindamycin", "Ciprofloxacin"]
-        elif scenario_type == "Meningitis":
-            correct_antibiotic = "Ceftriaxone"
-            options = ["Ceftriaxone", "Azithromycin", "Clindamycin", "Ciprofloxacin"]
-        else:  # Sepsis
-            correct_antibiotic = "Meropenem"
-            options = ["Meropenem", "Azithromycin", "Clindamycin", "Penicillin"]
+        correct_antibiotic, options = self._clinical_scenario_options(scenario_type)
         
         random.shuffle(options)
         correct_index = options.index(correct_antibiotic)
@@ -322,46 +481,78 @@ class QuizQuestionGenerator:
         question = f"A patient receiving {antibiotic_name} develops {side_effect}. What should be the next step in management?"
         
         # Create management options
+        correct_action, options = self._side_effect_options(side_effect)
+        
+        random.shuffle(options)
+        correct_index = options.index(correct_action)
+        
+        return {
+            "question": question,
+            "options": options,
+            "correct": correct_index,
+            "explanation": f"{side_effect} is a known side effect of {antibiotic_name}. Proper management includes assessing severity and considering alternative therapy if needed.",
+            "category": "Side Effects",
+            "difficulty": "intermediate",
+            "conditionId": "side_effects"
+        }
+    
+    def _resistance_options(self, correct_mechanism: str) -> List[str]:
+        """Build the (unshuffled) option list for a resistance question"""
+        options = [
+            correct_mechanism,
+            "Efflux pumps",
+            "Target modification",
+            "Enzymatic inactivation"
+        ]
+        # Remove duplicates and ensure we have 4 unique options
+        options = list(set(options))
+        if len(options) < 4:
+            additional_options = ["Reduced permeability", "Biofilm formation", "Metabolic bypass"]
+            options.extend([opt for opt in additional_options if opt not in options])
+        return options[:4]
+    
+    def _clinical_scenario_options(self, scenario_type: str) -> Tuple[str, List[str]]:
+        """Return the correct empiric antibiotic and option list for a scenario"""
+        if scenario_type == "UTI":
+            return "Ciprofloxacin", ["Ciprofloxacin", "Vancomycin", "Azithromycin", "Clindamycin"]
+        elif scenario_type == "Pneumonia":
+            return "Ceftriaxone", ["Ceftriaxone", "Gentamicin", "Clindamycin", "Ciprofloxacin"]
+        elif scenario_type == "Meningitis":
+            return "Ceftriaxone", ["Ceftriaxone", "Azithromycin", "Clindamycin", "Ciprofloxacin"]
+        else:  # Sepsis
+            return "Meropenem", ["Meropenem", "Azithromycin", "Clindamycin", "Penicillin"]
+    
+    def _side_effect_options(self, side_effect: str) -> Tuple[str, List[str]]:
+        """Return the correct management action and option list for a side effect"""
         if "toxicity" in side_effect.lower():
-            correct_action = "Discontinue the antibiotic and monitor levels"
-            options = [
+            return "Discontinue the antibiotic and monitor levels", [
                 "Discontinue the antibiotic and monitor levels",
                 "Reduce the dose by half",
                 "Continue at same dose",
                 "Increase monitoring frequency only"
             ]
         elif "allergic" in side_effect.lower():
-            correct_action = "Discontinue immediately and consider alternative"
-            options = [
+            return "Discontinue immediately and consider alternative", [
                 "Discontinue immediately and consider alternative",
                 "Reduce the dose",
                 "Add an antihistamine",
                 "Continue with close monitoring"
             ]
         else:
-            correct_action = "Assess severity and consider alternative if severe"
-            options = [
+            return "Assess severity and consider alternative if severe", [
                 "Assess severity and consider alternative if severe",
                 "Continue current therapy",
                 "Increase the dose",
                 "Add supportive therapy only"
             ]
-        
-        random.shuffle(options)
-        correct_index = options.index(correct_action)
-        
-        return {
-            "question": question,
-            "options": options,
-            "correct": correct_index,
-            "explanation": f"{side_effect} is a known side effect of {antibiotic_name}. Proper management includes assessing severity and considering alternative therapy if needed.",
-            "category": "Side Effects",
-            "difficulty": "intermediate",
-            "conditionId": "side_effects"
-        }
     
-    def generate_questions(self, num_questions: int = 25) -> List[Dict[str, Any]]:
-        """Generate a specified number of quiz questions"""
+    def generate_questions(self, num_questions: int = 25,
+                           unique_index: Optional[QuestionUniquenessIndex] = None) -> List[Dict[str, Any]]:
+        """Generate a specified number of quiz questions
+        
+        With a unique_index, duplicates are regenerated; generation stops early
+        if MAX_DUPLICATE_ATTEMPTS consecutive questions are all duplicates.
+        """
         questions = []
         question_types = [
             self.generate_pathogen_identification_question,
@@ -371,73 +562,514 @@ class QuizQuestionGenerator:
             self.generate_side_effects_question
         ]
         
-        for i in range(num_questions):
+        duplicate_streak = 0
+        while len(questions) < num_questions:
             question_generator = random.choice(question_types)
             question = question_generator()
+            if unique_index is not None and not unique_index.add(question):
+                duplicate_streak += 1
+                if duplicate_streak >= MAX_DUPLICATE_ATTEMPTS:
+                    print(f"Question space exhausted after {len(questions)} unique questions")
+                    break
+                continue
+            duplicate_streak = 0
             questions.append(question)
         
         return questions
     
+    def _option_orderings(self, correct: str, distractors: List[str]) -> List[Tuple[Tuple[str, ...], int]]:
+        """Enumerate every shuffled option list for a correct answer and its distractor pool"""
+        orderings = []
+        # Sorted so seeded sampling doesn't depend on set iteration order, which varies per process
+        for chosen in itertools.permutations(sorted(distractors), 3):
+            for position in range(len(chosen) + 1):
+                options = list(chosen)
+                options.insert(position, correct)
+                orderings.append((tuple(options), position))
+        return orderings
+    
+    def _build_bulk_tables(self) -> List[List[List[Tuple[str, Dict[str, Any], list]]]]:
+        """Precompute stems, fixed fields and option orderings for bulk generation
+        
+        Each question type is a list of groups (one per first random choice of the
+        single-question generator), and each group is a list of
+        (question, fixed_fields, option_orderings) entries. Sampling a group, an
+        entry and an ordering uniformly reproduces the distribution of
+        generate_questions.
+        """
+        tables = []
+        
+        # Pathogen identification: grouped by pathogen
+        pathogen_names = list(self.pathogen_data.keys())
+        min_age, max_age = self.pathogen_age_range
+        groups = []
+        for pathogen_name in pathogen_names:
+            pathogen = self.pathogen_data[pathogen_name]
+            fields = {
+                "explanation": f"{pathogen_name} is a {pathogen['gram_stain']} {pathogen['shape']} that commonly causes infections at {', '.join(pathogen['common_sites'])}.",
+                "category": "Pathogen Identification",
+                "difficulty": "beginner",
+                "conditionId": "pathogen_identification"
+            }
+            orderings = self._option_orderings(pathogen_name, [p for p in pathogen_names if p != pathogen_name])
+            groups.append([
+                (f"A {age}-year-old {gender} presents with {symptoms}. Gram stain shows {pathogen['gram_stain']} {pathogen['shape']} in {pathogen['arrangement']}. What is the most likely pathogen?", fields, orderings)
+                for age in range(min_age, max_age + 1)
+                for gender in self.genders
+                for symptoms in self.presenting_symptoms
+            ])
+        tables.append(groups)
+        
+        # Antibiotic mechanism: one stem per antibiotic
+        antibiotic_names = list(self.antibiotic_data.keys())
+        groups = []
+        for antibiotic_name in antibiotic_names:
+            antibiotic = self.antibiotic_data[antibiotic_name]
+            fields = {
+                "explanation": f"{antibiotic_name} is a {antibiotic['class']} that works by {antibiotic['mechanism']}. It is commonly used for {', '.join(antibiotic['common_uses'])}.",
+                "category": "Antibiotic Mechanisms",
+                "difficulty": "intermediate",
+                "conditionId": "antibiotic_mechanism"
+            }
+            orderings = self._option_orderings(antibiotic_name, [a for a in antibiotic_names if a != antibiotic_name])
+            groups.append([(f"Which antibiotic works by {antibiotic['mechanism']}?", fields, orderings)])
+        tables.append(groups)
+        
+        # Resistance: grouped by antibiotic
+        groups = []
+        for antibiotic_name in antibiotic_names:
+            correct_mechanism = self.antibiotic_data[antibiotic_name]["resistance"]
+            fields = {
+                "explanation": f"Resistance to {antibiotic_name} commonly occurs through {correct_mechanism}. This is an important consideration when selecting alternative therapy.",
+                "category": "Antibiotic Resistance",
+                "difficulty": "advanced",
+                "conditionId": "antibiotic_resistance"
+            }
+            options = self._resistance_options(correct_mechanism)
+            orderings = self._option_orderings(correct_mechanism, [opt for opt in options if opt != correct_mechanism])
+            groups.append([
+                (f"A patient with {infection_type} has an isolate resistant to {antibiotic_name}. What is the most likely resistance mechanism?", fields, orderings)
+                for infection_type in self.infection_types
+            ])
+        tables.append(groups)
+        
+        # Clinical scenarios: grouped by scenario
+        min_age, max_age = self.scenario_age_range
+        groups = []
+        for scenario_type, scenario in self.clinical_scenarios.items():
+            correct_antibiotic, options = self._clinical_scenario_options(scenario_type)
+            fields = {
+                "explanation": f"For {scenario_type}, {correct_antibiotic} is the appropriate empiric choice as it covers the most likely pathogens and has good tissue penetration.",
+                "category": "Clinical Scenarios",
+                "difficulty": "intermediate",
+                "conditionId": f"clinical_{scenario_type.lower()}"
+            }
+            orderings = self._option_orderings(correct_antibiotic, [opt for opt in options if opt != correct_antibiotic])
+            groups.append([
+                (f"A {age}-year-old {gender} with {risk_factor} presents with {symptoms}. What is the most appropriate empiric antibiotic therapy?", fields, orderings)
+                for age in range(min_age, max_age + 1)
+                for gender in self.genders
+                for risk_factor in scenario["risk_factors"]
+                for symptoms in scenario["symptoms"]
+            ])
+        tables.append(groups)
+        
+        # Side effects: grouped by antibiotic, one entry per side effect
+        groups = []
+        for antibiotic_name in antibiotic_names:
+            entries = []
+            for side_effect in self.antibiotic_data[antibiotic_name]["side_effects"]:
+                correct_action, options = self._side_effect_options(side_effect)
+                fields = {
+                    "explanation": f"{side_effect} is a known side effect of {antibiotic_name}. Proper management includes assessing severity and considering alternative therapy if needed.",
+                    "category": "Side Effects",
+                    "difficulty": "intermediate",
+                    "conditionId": "side_effects"
+                }
+                orderings = self._option_orderings(correct_action, [opt for opt in options if opt != correct_action])
+                entries.append((f"A patient receiving {antibiotic_name} develops {side_effect}. What should be the next step in management?", fields, orderings))
+            groups.append(entries)
+        tables.append(groups)
+        
+        return tables
+    
+    def _build_bulk_records(self) -> Tuple[List[Dict[str, Any]], List[Tuple[str, ...]], List[int], List[int]]:
+        """Flatten the sampling tables into one record table shared by every question type
+        
+        Every (stem, option ordering) pair becomes a record: a template dict with
+        the question's fields in output order and options left unset, plus the
+        option tuple. Records are repeated in proportion to how likely
+        generate_questions is to produce them, so a uniform draw from a type's
+        slice of the table replaces the group/entry/shuffle choices. Returns the
+        templates, the option tuples, and where each type's slice starts and
+        how long it is.
+        """
+        templates = []
+        options_table = []
+        type_starts = []
+        type_lengths = []
+        for groups in self._build_bulk_tables():
+            denominators = [
+                len(groups) * len(entries) * len(orderings)
+                for entries in groups
+                for _, _, orderings in entries
+            ]
+            scale = math.lcm(*denominators)
+            type_starts.append(len(templates))
+            # Entries of a group share one orderings list, so it is split into repeated columns once
+            columns = {}
+            for entries in groups:
+                for question, fields, orderings in entries:
+                    repeat = scale // (len(groups) * len(entries) * len(orderings))
+                    key = (id(orderings), repeat)
+                    if key not in columns:
+                        columns[key] = ([position for _, position in orderings for _ in range(repeat)],
+                                        [options for options, _ in orderings for _ in range(repeat)])
+                    positions, options_column = columns[key]
+                    # Orderings with the correct answer in the same position share a template
+                    by_position = {
+                        position: {"question": question, "options": None, "correct": position, **fields}
+                        for position in sorted(set(positions))
+                    }
+                    templates.extend(map(by_position.__getitem__, positions))
+                    options_table.extend(options_column)
+            type_lengths.append(len(templates) - type_starts[-1])
+        return templates, options_table, type_starts, type_lengths
+    
+    def _sample_records(self, count: int, rng: Optional[random.Random] = None) -> List[int]:
+        """Draw count record indices: a question type for each question, then a record of that type
+        
+        With NumPy installed, both draws are vectorized using a generator seeded
+        from rng, so a seeded run's questions depend on whether NumPy is present.
+        """
+        if self._bulk_records is None:
+            self._bulk_records = self._build_bulk_records()
+        _, _, type_starts, type_lengths = self._bulk_records
+        rng = rng or random
+        
+        if np is not None:
+            vector_rng = np.random.default_rng(rng.getrandbits(64))
+            types = vector_rng.integers(0, len(type_starts), count)
+            offsets = (vector_rng.random(count) * np.asarray(type_lengths)[types]).astype(np.int64)
+            return (np.asarray(type_starts)[types] + offsets).tolist()
+        
+        uniform = rng.random
+        return [type_starts[t] + int(uniform() * type_lengths[t])
+                for t in rng.choices(range(len(type_starts)), k=count)]
+    
+    def iter_question_batches(self, num_questions: int, batch_size: int = 50000,
+                              rng: Optional[random.Random] = None,
+                              unique_index: Optional[QuestionUniquenessIndex] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches of generated questions using precomputed sampling tables
+        
+        Produces the same schema and distribution as generate_questions, but all
+        stems, explanations and option shuffles are enumerated once up front. Each
+        batch draws all its records at once, then copies each record's template
+        and gives it its own options list.
+        
+        With a unique_index, duplicates are dropped and further batches are drawn
+        until num_questions is reached or a whole batch adds nothing new.
+        """
+        remaining = num_questions
+        while remaining > 0:
+            # Duplicates are dropped, so keep drawing full batches when deduplicating
+            count = batch_size if unique_index is not None else min(batch_size, remaining)
+            
+            sampled = self._sample_records(count, rng)
+            templates, options_table, _, _ = self._bulk_records
+            with paused_gc():
+                batch = list(map(dict.copy, map(templates.__getitem__, sampled)))
+                for question, options in zip(batch, map(options_table.__getitem__, sampled)):
+                    question["options"] = list(options)
+            
+            if unique_index is not None:
+                unique = []
+                for question in batch:
+                    if unique_index.add(question):
+                        unique.append(question)
+                        if len(unique) == remaining:
+                            break
+                if not unique:
+                    print(f"Question space exhausted after {num_questions - remaining} unique questions")
+                    return
+                batch = unique
+            remaining -= len(batch)
+            yield batch
+    
+    def iter_encoded_question_batches(self, num_questions: int, batch_size: int = 50000,
+                                      rng: Optional[random.Random] = None,
+                                      jsonl: bool = False) -> Iterator[Tuple[List[Dict[str, Any]], List[str]]]:
+        """Yield batches of generated questions already encoded for an output file
+        
+        Draws records exactly as iter_question_batches does but never builds the
+        question dicts; each question is joined from its record's encoded pieces
+        (see QuestionEncoder). Yields each batch's templates, for reading fields
+        other than options, with the questions encoded as elements of the JS
+        array stream_questions_to_file writes, or as JSON Lines records when
+        jsonl is true.
+        """
+        encoder = QuestionEncoder(jsonl)
+        remaining = num_questions
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            sampled = self._sample_records(count, rng)
+            templates, options_table, _, _ = self._bulk_records
+            batch_templates = list(map(templates.__getitem__, sampled))
+            yield batch_templates, list(map(encoder.encode, batch_templates, map(options_table.__getitem__, sampled)))
+            remaining -= count
+    
+    def generate_questions_bulk(self, num_questions: int = 25, batch_size: int = 50000,
+                                rng: Optional[random.Random] = None,
+                                unique_index: Optional[QuestionUniquenessIndex] = None) -> List[Dict[str, Any]]:
+        """Generate a large number of quiz questions in batches"""
+        questions = []
+        with paused_gc():
+            for batch in self.iter_question_batches(num_questions, batch_size, rng, unique_index):
+                questions.extend(batch)
+        return questions
+    
+    def iter_questions(self, num_questions: int, batch_size: int = 50000,
+                       rng: Optional[random.Random] = None,
+                       unique_index: Optional[QuestionUniquenessIndex] = None) -> Iterator[Dict[str, Any]]:
+        """Yield generated questions one at a time, building them in batches"""
+        return itertools.chain.from_iterable(
+            self.iter_question_batches(num_questions, batch_size, rng, unique_index)
+        )
+    
+    def __getstate__(self):
+        # Sampling tables are rebuilt on demand; don't ship them to worker processes
+        state = self.__dict__.copy()
+        state["_bulk_records"] = None
+        return state
+    
+    def _chunk_plan(self, num_questions: int, seed: int, chunk_size: int) -> List[Tuple[int, int]]:
+        """Split a run into (count, seed) chunks that depend only on the master seed"""
+        master = random.Random(seed)
+        plan = []
+        for start in range(0, num_questions, chunk_size):
+            plan.append((min(chunk_size, num_questions - start), master.getrandbits(64)))
+        return plan
+    
+    def iter_questions_parallel(self, num_questions: int, seed: int, workers: Optional[int] = None,
+                                chunk_size: int = 50000,
+                                unique_index: Optional[QuestionUniquenessIndex] = None) -> Iterator[Dict[str, Any]]:
+        """Yield questions generated across worker processes, in deterministic order
+        
+        The run is cut into fixed-size chunks, each with its own random.Random
+        seeded from the master seed, so the output is identical for any number
+        of workers. At most two chunks per worker are in flight at once.
+        
+        A unique_index is applied in the parent as chunks arrive, so duplicates
+        are dropped without changing the plan and fewer than num_questions may
+        be yielded.
+        """
+        if unique_index is not None:
+            questions = self.iter_questions_parallel(num_questions, seed, workers, chunk_size)
+            yield from (question for question in questions if unique_index.add(question))
+            return
+        
+        plan = self._chunk_plan(num_questions, seed, chunk_size)
+        workers = workers or os.cpu_count() or 1
+        
+        if workers == 1 or len(plan) <= 1:
+            for count, chunk_seed in plan:
+                yield from self.generate_questions_bulk(count, rng=random.Random(chunk_seed))
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as executor:
+            pending = deque()
+            chunks = iter(plan)
+            for count, chunk_seed in itertools.islice(chunks, 2 * workers):
+                pending.append(executor.submit(_generate_chunk, count, chunk_seed))
+            while pending:
+                questions = pending.popleft().result()
+                for count, chunk_seed in itertools.islice(chunks, 1):
+                    pending.append(executor.submit(_generate_chunk, count, chunk_seed))
+                yield from questions
+    
+    def generate_questions_parallel(self, num_questions: int, seed: int, workers: Optional[int] = None,
+                                    chunk_size: int = 50000,
+                                    unique_index: Optional[QuestionUniquenessIndex] = None) -> List[Dict[str, Any]]:
+        """Generate a reproducible question bank using a pool of worker processes"""
+        with paused_gc():
+            return list(self.iter_questions_parallel(num_questions, seed, workers, chunk_size, unique_index))
+    
     def save_questions_to_file(self, questions: List[Dict[str, Any]], filename: str = "new_quiz_questions.js"):
-        """Save questions to a JavaScript file in the same format as existing data"""
+        """Save questions to a JavaScript file in the same format as existing data
+        
+        A .jsonl filename (or "-" for stdout) writes JSON Lines instead.
+        """
+        return self.stream_questions_to_file(questions, filename, total=len(questions))
+    
+    def stream_questions_to_file(self, questions: Iterable[Dict[str, Any]], filename: str = "new_quiz_questions.js",
+                                 total: Optional[int] = None):
+        """Write questions to a JavaScript file one at a time
+        
+        Accepts any iterable, so banks of arbitrary size are written with
+        constant memory. When total is not known up front, a fixed-width
+        placeholder is written in the header and patched once the count is known.
+        A .jsonl filename (or "-" for stdout) writes one JSON record per line.
+        """
+        if is_jsonl_path(filename):
+            count = write_jsonl(questions, filename)
+            print(f"Generated {count} questions and saved to {filename}")
+            return filename
+        
+        # Match json.dumps(questions, indent=2) element by element
+        encoded = (json.dumps(question, indent=2).replace("\n", "\n  ") for question in questions)
+        return self.write_encoded_questions(encoded, filename, total)
+    
+    def write_encoded_questions(self, encoded: Iterable[str], filename: str = "new_quiz_questions.js",
+                                total: Optional[int] = None):
+        """Write already-encoded questions, as stream_questions_to_file writes questions
+        
+        JS array elements go into the same module layout; for a .jsonl filename
+        (or "-" for stdout) each item is one JSON Lines record.
+        """
+        if is_jsonl_path(filename):
+            count = 0
+            with line_writer(filename) as write:
+                for line in encoded:
+                    write(line)
+                    count += 1
+            print(f"Generated {count} questions and saved to {filename}")
+            return filename
+        
         timestamp = datetime.now().isoformat()
         
-        js_content = f"""/**
+        header_start = f"""/**
  * Additional Quiz Questions Data
  * Generated clinical questions for testing knowledge of infectious diseases and antimicrobial therapy
  * Each question includes options, correct answer index, and detailed explanation
  * 
  * Generated automatically by quiz_generator.py
- * Total questions: {len(questions)}
+ * Total questions: """
+        header_end = f"""
  * Generated on: {timestamp}
  */
 
-const additionalQuizQuestions = {json.dumps(questions, indent=2)};
-
-export default additionalQuizQuestions;
-"""
+const additionalQuizQuestions = """
         
+        count = 0
         with open(filename, 'w') as f:
-            f.write(js_content)
+            f.write(header_start)
+            if total is None:
+                count_position = f.tell()
+                f.write(" " * TOTAL_PLACEHOLDER_WIDTH)
+            else:
+                f.write(str(total))
+            f.write(header_end)
+            
+            for question in encoded:
+                f.write("[\n  " if count == 0 else ",\n  ")
+                f.write(question)
+                count += 1
+            f.write("\n]" if count else "[]")
+            f.write(""";
+
+export default additionalQuizQuestions;
+""")
+            
+            if total is None:
+                f.seek(count_position)
+                f.write(str(count).ljust(TOTAL_PLACEHOLDER_WIDTH))
         
-        print(f"Generated {len(questions)} questions and saved to {filename}")
+        print(f"Generated {count} questions and saved to {filename}")
         return filename
 
+# Per-process generator used by iter_questions_parallel workers
+_worker_generator = None
+
+def _init_worker(generator: QuizQuestionGenerator):
+    """Install the parent's generator in a worker process"""
+    global _worker_generator
+    _worker_generator = generator
+
+def _generate_chunk(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Generate one chunk of questions with its own seeded random.Random"""
+    return _worker_generator.generate_questions_bulk(count, rng=random.Random(seed))
+
 def main():
     """Main function to generate quiz questions"""
-    generator = QuizQuestionGenerator()
-    
-    # Generate 25 new questions
-    new_questions = generator.generate_questions(25)
-    
-    # Save to file
-    output_file = generator.save_questions_to_file(new_questions)
-    
-    # Print summary
-    print("\n=== Quiz Generation Summary ===")
-    print(f"Total questions generated: {len(new_questions)}")
-    
-    # Count by category
-    categories = {}
-    difficulties = {}
+    parser = argparse.ArgumentParser(description="Generate new quiz questions")
+    parser.add_argument("--count", type=int, default=25, help="number of questions to generate")
+    parser.add_argument("--output", default="new_quiz_questions.js",
+                        help="output file; .jsonl or - (stdout) streams JSON Lines")
+    parser.add_argument("--source", choices=["builtin", "guidelines"], default="builtin",
+                        help="question backend: built-in templates or RBO_JSON guideline data")
+    parser.add_argument("--guidelines", default=DEFAULT_JSON_PATH, help="guideline data for --source guidelines")
+    parser.add_argument("--seed", type=int, help="master seed for reproducible generation")
+    parser.add_argument("--workers", type=int,
+                        help="generate built-in questions in this many worker processes; "
+                             "a given --seed yields the same questions for any worker count")
+    parser.add_argument("--unique", action="store_true", help="drop duplicate questions")
+    args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers is not None and args.source == "guidelines":
+        parser.error("--workers only applies to --source builtin")
     
-    for question in new_questions:
-        category = question.get('category', 'Unknown')
-        difficulty = question.get('difficulty', 'Unknown')
+    with status_to_stderr(args.output):
+        generator = QuizQuestionGenerator()
+        if args.source == "guidelines":
+            source = GuidelineQuestionGenerator(path=args.guidelines)
+        else:
+            source = generator
         
-        categories[category] = categories.get(category, 0) + 1
-        difficulties[difficulty] = difficulties.get(difficulty, 0) + 1
-    
-    print("\nQuestions by category:")
-    for category, count in categories.items():
-        print(f"  {category}: {count}")
-    
-    print("\nQuestions by difficulty:")
-    for difficulty, count in difficulties.items():
-        print(f"  {difficulty}: {count}")
-    
-    print(f"\nOutput file: {output_file}")
-    print("Questions ready for integration into the React app!")
+        # Count by category
+        categories = Counter()
+        difficulties = Counter()
+        
+        def count_questions(questions: List[Dict[str, Any]]):
+            categories.update([question.get('category', 'Unknown') for question in questions])
+            difficulties.update([question.get('difficulty', 'Unknown') for question in questions])
+        
+        def tally(questions: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+            for question in questions:
+                count_questions([question])
+                yield question
+        
+        def tally_encoded(batches: Iterable[Tuple[List[Dict[str, Any]], List[str]]]) -> Iterator[str]:
+            for templates, encoded in batches:
+                count_questions(templates)
+                yield from encoded
+        
+        unique_index = QuestionUniquenessIndex() if args.unique else None
+        if source is not generator:
+            rng = random.Random(args.seed) if args.seed is not None else None
+            questions = source.iter_questions(args.count, rng, unique_index)
+        elif args.seed is not None or args.workers is not None:
+            # Chunks are seeded from the master seed, so the bank doesn't depend on the worker count
+            seed = args.seed if args.seed is not None else random.getrandbits(64)
+            print(f"Master seed: {seed}")
+            questions = generator.iter_questions_parallel(args.count, seed, args.workers, unique_index=unique_index)
+        elif unique_index is not None:
+            questions = generator.iter_questions(args.count, unique_index=unique_index)
+        else:
+            questions = None
+        
+        if questions is None:
+            # Bulk path: sampled records are encoded straight to the output without building question dicts
+            batches = generator.iter_encoded_question_batches(args.count, jsonl=is_jsonl_path(args.output))
+            output_file = generator.write_encoded_questions(tally_encoded(batches), args.output, total=args.count)
+        else:
+            # Stream records straight to the output so memory stays bounded
+            output_file = generator.stream_questions_to_file(tally(questions), args.output)
+        
+        # Print summary
+        print("\n=== Quiz Generation Summary ===")
+        print(f"Total questions generated: {sum(categories.values())}")
+        
+        print("\nQuestions by category:")
+        for category, count in categories.items():
+            print(f"  {category}: {count}")
+        
+        print("\nQuestions by difficulty:")
+        for difficulty, count in difficulties.items():
+            print(f"  {difficulty}: {count}")
+        
+        print(f"\nOutput file: {output_file}")
+        print("Questions ready for integration into the React app!")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
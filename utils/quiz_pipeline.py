@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Quiz Content Pipeline
+Runs generate → classify → validate → test in one process or one process per stage, without intermediate files
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+import threading
+import time
+import traceback
+from contextlib import ExitStack
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+from content_tester import ContentTester
+from data_validator import DataValidator
+from difficulty_classifier import DifficultyClassifier
+from question_io import (STDIO_PATH, batched, iter_question_file, jsonl_writer, question_export_name,
+                         status_to_stderr)
+from quiz_generator import QuizQuestionGenerator
+
+# Stages in pipeline order; the last one consumes the stream and returns the test results
+STAGES = ["generate", "classify", "validate", "test"]
+
+# Marker sent downstream after the last batch
+END_OF_STREAM = None
+
+class IssueTally:
+    """Counts validation issues, keeping only the first few for the summary"""
+
+    def __init__(self, keep: int = 5):
+        self.keep = keep
+        self.count = 0
+        self.sample: List[str] = []
+
+    def extend(self, issues: Iterable[str]):
+        for issue in issues:
+            self.count += 1
+            if len(self.sample) < self.keep:
+                self.sample.append(issue)
+
+class QuizPipeline:
+    def __init__(self, count: int = 25, input_file: Optional[str] = None, seed: Optional[int] = None,
+                 batch_size: int = 1000, queue_size: int = 4, output_file: Optional[str] = None):
+        self.count = count
+        self.input_file = input_file
+        self.seed = seed
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.output_file = output_file
+
+        self.generator = QuizQuestionGenerator()
+        self.classifier = DifficultyClassifier()
+        self.validator = DataValidator()
+        self.tester = ContentTester()
+
+        # Per-stage side results, filled in as the stream passes through
+        self.difficulty_stats = {"beginner": 0, "intermediate": 0, "advanced": 0}
+        self.validation_issues = IssueTally()
+
+    def generate(self, records: Optional[Iterable[Dict[str, Any]]] = None) -> Iterator[Dict[str, Any]]:
+        """Source stage: generated questions, or the questions of the input file"""
+        if self.input_file:
+            return iter_question_file(self.input_file, question_export_name(self.input_file))
+        rng = random.Random(self.seed) if self.seed is not None else None
+        return self.generator.iter_questions(self.count, self.batch_size, rng)
+
+    def classify(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Add a difficulty level to every question"""
+        return self.classifier.iter_classified_questions(records, self.difficulty_stats, self.batch_size)
+
+    def validate(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Validate and enhance every question"""
+        return self.validator.iter_validated_questions(records, self.validation_issues)
+
+    def test(self, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Sink stage: test every question, keeping only the issues the report shows"""
+        return self.tester.test_question_stream(records, batch_size=self.batch_size, max_kept_issues=10)
+
+    def stage_output(self, stage: str, records: Optional[Iterable[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+        """Records a non-final stage yields for its input"""
+        return getattr(self, stage)(records)
+
+    def stage_summary(self, stage: str) -> Dict[str, Any]:
+        """Side results of a stage that the final summary reports"""
+        if stage == "classify":
+            return {"difficulty_stats": self.difficulty_stats}
+        if stage == "validate":
+            return {"issue_count": self.validation_issues.count, "issue_sample": self.validation_issues.sample}
+        return {}
+
+    def _write_output(self, records: Iterable[Dict[str, Any]], write) -> Iterator[Dict[str, Any]]:
+        """Pass records through, writing each validated question to the output file"""
+        for record in records:
+            write(record)
+            yield record
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage in this process as chained generators
+
+        Each stage pulls one record at a time from the one before it, so at
+        most a batch per stage is in memory.
+        """
+        stage_time = {stage: 0.0 for stage in STAGES}
+        stage_records = {stage: 0 for stage in STAGES}
+
+        def metered(stage: str, records: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+            # Time spent producing each record, including every upstream stage
+            clock = time.perf_counter
+            while True:
+                start = clock()
+                record = next(records, END_OF_STREAM)
+                stage_time[stage] += clock() - start
+                if record is END_OF_STREAM:
+                    return
+                stage_records[stage] += 1
+                yield record
+
+        start = time.perf_counter()
+        with ExitStack() as outputs:
+            stream = None
+            for stage in STAGES[:-1]:
+                stream = metered(stage, iter(self.stage_output(stage, stream)))
+                if stage == "validate" and self.output_file:
+                    stream = self._write_output(stream, outputs.enter_context(jsonl_writer(self.output_file)))
+            results = self.test(stream)
+        elapsed = time.perf_counter() - start
+
+        # Subtract upstream time to get the time each stage spent on its own work
+        stage_stats = []
+        upstream = 0.0
+        for stage in STAGES[:-1]:
+            stage_stats.append({"stage": stage, "records": stage_records[stage], "seconds": stage_time[stage] - upstream})
+            upstream = stage_time[stage]
+        stage_stats.append({"stage": "test", "records": results["total_questions"], "seconds": elapsed - upstream})
+
+        summary = {}
+        for stage in STAGES:
+            summary.update(self.stage_summary(stage))
+        return self._pipeline_results(results, stage_stats, elapsed, summary, processes=False)
+
+    def run_in_processes(self) -> Dict[str, Any]:
+        """Run generate, classify and validate in their own processes, testing in this one
+
+        Stages exchange batches of batch_size records through queues holding
+        at most queue_size batches, so a slow stage applies back-pressure
+        instead of letting memory grow. Child processes have no standard
+        input, so questions read from stdin are generated by a thread here.
+        """
+        context = multiprocessing.get_context()
+        queues = [context.Queue(maxsize=self.queue_size) for _ in STAGES[:-1]]
+        stats_queue = context.Queue()
+
+        workers = []
+        for i, stage in enumerate(STAGES[:-1]):
+            in_queue = queues[i - 1] if i > 0 else None
+            stage_args = (self, stage, in_queue, queues[i], stats_queue)
+            if stage == "generate" and self.input_file == STDIO_PATH:
+                worker = threading.Thread(target=_run_stage_process, name=f"pipeline-{stage}",
+                                          args=stage_args, daemon=True)
+            else:
+                worker = context.Process(target=_run_stage_process, name=f"pipeline-{stage}", args=stage_args)
+            workers.append(worker)
+        # Fork every process before the thread starts, so no child inherits a lock the thread holds
+        workers.sort(key=lambda worker: isinstance(worker, threading.Thread))
+        for worker in workers:
+            worker.start()
+
+        start = time.perf_counter()
+        try:
+            with ExitStack() as outputs:
+                stream = _iter_queue(queues[-1])
+                if self.output_file:
+                    stream = self._write_output(stream, outputs.enter_context(jsonl_writer(self.output_file)))
+                test_start = time.perf_counter()
+                waited = _WaitClock()
+                results = self.test(waited.wrap(stream))
+                test_seconds = time.perf_counter() - test_start - waited.seconds
+            elapsed = time.perf_counter() - start
+
+            stage_stats = []
+            summary = {}
+            for _ in workers:
+                report = stats_queue.get()
+                if "input_error" in report:
+                    raise ValueError(report["input_error"])
+                if "error" in report:
+                    raise RuntimeError(f"Pipeline stage '{report['stage']}' failed:\n{report['error']}")
+                stage_stats.append({key: report[key] for key in ("stage", "records", "seconds")})
+                summary.update(report["summary"])
+        finally:
+            for worker in workers:
+                worker.join(timeout=5)
+                if worker.is_alive() and not isinstance(worker, threading.Thread):
+                    worker.terminate()
+
+        stage_stats.sort(key=lambda stats: STAGES.index(stats["stage"]))
+        stage_stats.append({"stage": "test", "records": results["total_questions"], "seconds": test_seconds})
+        return self._pipeline_results(results, stage_stats, elapsed, summary, processes=True)
+
+    def _pipeline_results(self, results: Dict[str, Any], stage_stats: List[Dict[str, Any]], elapsed: float,
+                          summary: Dict[str, Any], processes: bool) -> Dict[str, Any]:
+        """Combine the test results with per-stage throughput and side results"""
+        for stats in stage_stats:
+            stats["records_per_second"] = stats["records"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+        return {
+            "test_results": results,
+            "stages": stage_stats,
+            "elapsed_seconds": elapsed,
+            "processes": processes,
+            **summary
+        }
+
+    def generate_throughput_report(self, pipeline_results: Dict[str, Any]) -> str:
+        """Format per-stage throughput as a table"""
+        mode = "one process per stage" if pipeline_results["processes"] else "single process"
+        report = f"\n=== PIPELINE THROUGHPUT ({mode}) ===\n"
+        report += f"  {'Stage':<10}{'Records':>10}{'Seconds':>10}{'Records/s':>12}\n"
+        for stats in pipeline_results["stages"]:
+            report += (f"  {stats['stage']:<10}{stats['records']:>10}{stats['seconds']:>10.2f}"
+                       f"{stats['records_per_second']:>12,.0f}\n")
+        total = pipeline_results["test_results"]["total_questions"]
+        elapsed = pipeline_results["elapsed_seconds"]
+        report += f"  {'total':<10}{total:>10}{elapsed:>10.2f}{(total / elapsed if elapsed else 0):>12,.0f}\n"
+        return report
+
+class _WaitClock:
+    """Measures how long a consumer spends waiting on an iterator"""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def wrap(self, records: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        clock = time.perf_counter
+        while True:
+            start = clock()
+            record = next(records, END_OF_STREAM)
+            self.seconds += clock() - start
+            if record is END_OF_STREAM:
+                return
+            yield record
+
+def _iter_queue(queue) -> Iterator[Dict[str, Any]]:
+    """Yield the records of the batches arriving on a queue until the end marker"""
+    while True:
+        batch = queue.get()
+        if batch is END_OF_STREAM:
+            return
+        if isinstance(batch, dict):
+            # An upstream stage failed; it reports the error on the stats queue
+            return
+        yield from batch
+
+def _run_stage_process(pipeline: QuizPipeline, stage: str, in_queue, out_queue, stats_queue):
+    """Run one non-final stage in a worker process, passing batches between queues"""
+    waited = _WaitClock()
+    put_seconds = 0.0
+    records = 0
+    start = time.perf_counter()
+    try:
+        source = waited.wrap(_iter_queue(in_queue)) if in_queue is not None else None
+        for batch in batched(pipeline.stage_output(stage, source), pipeline.batch_size):
+            records += len(batch)
+            put_start = time.perf_counter()
+            out_queue.put(batch)
+            put_seconds += time.perf_counter() - put_start
+        out_queue.put(END_OF_STREAM)
+        seconds = time.perf_counter() - start - waited.seconds - put_seconds
+        stats_queue.put({"stage": stage, "records": records, "seconds": seconds,
+                         "summary": pipeline.stage_summary(stage)})
+    except (OSError, ValueError) as e:
+        out_queue.put({"error": stage})
+        if stage == "generate" and pipeline.input_file:
+            # Unreadable input: report it like the single-process run does, without a traceback
+            stats_queue.put({"stage": stage, "error": traceback.format_exc(), "input_error": str(e)})
+        else:
+            stats_queue.put({"stage": stage, "error": traceback.format_exc()})
+    except BaseException:
+        out_queue.put({"error": stage})
+        stats_queue.put({"stage": stage, "error": traceback.format_exc()})
+
+def main():
+    """Run the whole content pipeline"""
+    parser = argparse.ArgumentParser(description="Generate, classify, validate and test quiz questions in one pipeline")
+    parser.add_argument("--count", type=int, default=25, help="number of questions to generate")
+    parser.add_argument("--input", help="test questions from this file (.js or .jsonl, - for stdin) instead of generating")
+    parser.add_argument("--seed", type=int, help="seed for reproducible generation")
+    parser.add_argument("--processes", action="store_true", help="run each stage in its own process")
+    parser.add_argument("--batch-size", type=int, default=1000, help="records per batch passed between stages")
+    parser.add_argument("--queue-size", type=int, default=4, help="batches buffered between process stages")
+    parser.add_argument("--output", help="write validated questions as JSON Lines to this file (- for stdout)")
+    parser.add_argument("--report", default="pipeline_test_report.txt", help="file for the content test report")
+    args = parser.parse_args()
+
+    with status_to_stderr(args.output):
+        pipeline = QuizPipeline(args.count, args.input, args.seed, args.batch_size, args.queue_size, args.output)
+
+        try:
+            pipeline_results = pipeline.run_in_processes() if args.processes else pipeline.run()
+        except (OSError, ValueError) as e:
+            if not args.input:
+                raise
+            print(f"Error reading questions from {args.input}: {e}", file=sys.stderr)
+            sys.exit(1)
+        results = pipeline_results["test_results"]
+
+        # Save test report
+        with open(args.report, 'w') as f:
+            f.write(pipeline.tester.generate_test_report(results))
+
+        # Print summary
+        print("\n=== PIPELINE SUMMARY ===")
+        print(f"Questions processed: {results['total_questions']}")
+        print("Difficulty distribution:")
+        for difficulty, count in pipeline_results["difficulty_stats"].items():
+            print(f"  {difficulty.capitalize()}: {count}")
+        print(f"Validation issues: {pipeline_results['issue_count']}")
+        for issue in pipeline_results["issue_sample"]:
+            print(f"  • {issue}")
+        print(f"Content test pass rate: {results['summary']['pass_rate']:.1f}%")
+        print(f"Content test report: {args.report}")
+
+        print(pipeline.generate_throughput_report(pipeline_results))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Incremental Result Cache
+Keeps per-question check results between runs so only new or edited questions are re-checked
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Dict, Any, Optional, Tuple
+
+# Bump when the stored layout changes
+RESULT_CACHE_VERSION = 1
+
+# Default location for result caches, next to the parse cache
+RESULT_CACHE_DIR = os.environ.get(
+    "QUIZ_RESULT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "results")
+)
+
+def content_fingerprint(value: Any) -> str:
+    """Stable hash of a JSON-serializable value, independent of key order"""
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+def default_result_cache_path(tool: str, source_path: str) -> str:
+    """Cache file for one tool's results on one input file"""
+    source_key = content_fingerprint(os.path.abspath(source_path))[:12]
+    return os.path.join(RESULT_CACHE_DIR, f"{tool}-{os.path.basename(source_path)}-{source_key}.pickle")
+
+class QuestionResultCache:
+    """Per-question results keyed by a fingerprint of the question's content
+
+    The cache is tied to a fingerprint of the rules that produced the results;
+    if the rules change, every stored result is discarded. Saving keeps only
+    the entries looked up during this run, so the file tracks the current bank.
+    """
+
+    def __init__(self, path: str, rules: Any):
+        self.path = path
+        self.rules_fingerprint = content_fingerprint([RESULT_CACHE_VERSION, rules])
+        self.hits = 0
+        self.misses = 0
+        self._stored: Dict[str, Any] = {}
+        self._current: Dict[str, Any] = {}
+
+        try:
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+            if saved.get("rules") == self.rules_fingerprint:
+                self._stored = saved["results"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+    def lookup(self, question: Dict[str, Any]) -> Tuple[str, Optional[Any]]:
+        """Return (key, stored result or None) for a question"""
+        key = content_fingerprint(question)
+        result = self._current.get(key)
+        if result is None:
+            result = self._stored.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._current[key] = result
+        return key, result
+
+    def store(self, key: str, result: Any):
+        """Record the result computed for the question with this key"""
+        self._current[key] = result
+
+    def save(self):
+        """Write the results seen in this run, replacing the previous file atomically"""
+        cache_dir = os.path.dirname(self.path) or "."
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({"rules": self.rules_fingerprint, "results": self._current}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.path)
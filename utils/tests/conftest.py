@@ -0,0 +1,41 @@
+"""
+Shared fixtures for the utils script tests
+Puts the scripts on sys.path and loads the app's question bank the way the original scripts did
+"""
+
+import json
+import os
+import sys
+from typing import List, Dict, Any
+
+import pytest
+
+UTILS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(UTILS_DIR)
+QUIZ_QUESTIONS_PATH = os.path.join(REPO_DIR, "src", "data", "quizQuestions.js")
+
+sys.path.insert(0, UTILS_DIR)
+
+def baseline_load_questions(path: str) -> List[Dict[str, Any]]:
+    """Extract the quizQuestions array by its markers, as the scripts did before js_data_loader"""
+    with open(path, 'r') as f:
+        content = f.read()
+    start_marker = "const quizQuestions = ["
+    start_index = content.find(start_marker) + len(start_marker) - 1
+    end_index = content.rfind("];") + 1
+    return json.loads(content[start_index:end_index])
+
+@pytest.fixture(autouse=True)
+def isolated_parse_cache(tmp_path):
+    """Keep js_data_loader's disk cache out of the working tree"""
+    from js_data_loader import configure_cache, _cache_settings, _parse_cache
+    saved = dict(_cache_settings)
+    configure_cache(cache_dir=str(tmp_path / "parse_cache"))
+    _parse_cache.clear()
+    yield
+    _cache_settings.update(saved)
+    _parse_cache.clear()
+
+@pytest.fixture(scope="session")
+def quiz_questions() -> List[Dict[str, Any]]:
+    return baseline_load_questions(QUIZ_QUESTIONS_PATH)
@@ -0,0 +1,44 @@
+"""
+Tests for the hot-path suite's baseline comparison
+A hot path that crashes where the baseline completed must fail the run
+"""
+
+import json
+import sys
+
+import pytest
+
+import benchmarks
+from benchmarks import compare_to_baseline
+
+def entry(throughput=1000.0, p99_us=50.0, peak_rss_mb=100.0, hot_path="test_question_set", questions=1000):
+    return {"hot_path": hot_path, "questions": questions, "throughput": throughput,
+            "p99_us": p99_us, "peak_rss_mb": peak_rss_mb}
+
+def failed(hot_path="test_question_set", questions=1000):
+    return {"hot_path": hot_path, "questions": questions, "error": "ValueError: boom"}
+
+def test_reports_slower_and_larger_results():
+    regressions = compare_to_baseline([entry(throughput=700.0, p99_us=70.0, peak_rss_mb=110.0)], [entry()], 0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("test_question_set @ 1000: throughput")
+    assert compare_to_baseline([entry(throughput=900.0)], [entry()], 0.2) == []
+
+def test_failure_after_baseline_completed_is_a_regression():
+    regressions = compare_to_baseline([failed()], [entry()], 0.2)
+    assert regressions == ["test_question_set @ 1000: failed (ValueError: boom) but completed in the baseline"]
+    # Nothing to compare against when the baseline failed too, or has no entry
+    assert compare_to_baseline([failed()], [failed()], 0.2) == []
+    assert compare_to_baseline([failed(questions=5)], [entry()], 0.2) == []
+
+@pytest.mark.parametrize("save_baseline", [False, True])
+def test_suite_exits_non_zero_when_a_run_fails(tmp_path, monkeypatch, save_baseline):
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps({"results": [entry(questions=5)]}))
+    monkeypatch.setattr(benchmarks, "run_suite", lambda paths, sizes, seed, samples: [failed()])
+    argv = ["benchmarks.py", "--suite", "--results", str(tmp_path / "results.json"),
+            "--baseline", str(baseline_path)]
+    monkeypatch.setattr(sys, "argv", argv + (["--save-baseline"] if save_baseline else []))
+    with pytest.raises(SystemExit) as exit_info:
+        benchmarks.main()
+    assert exit_info.value.code == 1
@@ -0,0 +1,55 @@
+"""
+Tests for the single-pass term matcher used by content_tester
+Compares TermMatcher with the per-term substring checks it replaced
+"""
+
+import random
+
+from content_rules import TermMatcher
+from content_tester import ContentTester
+
+def naive_find(terms, text):
+    return {term for term in terms if term in text}
+
+def test_matches_substring_checks_on_question_bank(quiz_questions):
+    tester = ContentTester()
+    for terms in tester.medical_checks.values():
+        matcher = TermMatcher(terms)
+        for question in quiz_questions:
+            for text in (question["question"].lower(), question["explanation"].lower()):
+                assert matcher.find(text) == naive_find(terms, text)
+
+def test_matches_substring_checks_with_nested_and_overlapping_terms():
+    # Short alphabet so terms nest ("ab" in "abc") and overlap ("abc" / "cab") often
+    rng = random.Random(5)
+    for _ in range(2000):
+        terms = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        text = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 30)))
+        assert TermMatcher(terms).find(text) == naive_find(terms, text), (terms, text)
+
+def test_empty_term_list_finds_nothing():
+    assert TermMatcher([]).find("vancomycin") == set()
+
+def test_medical_term_issues_match_original_checks(quiz_questions):
+    tester = ContentTester()
+    contexts = {
+        "antibiotic_names": (["therapy", "treatment", "antibiotic"],
+                             "Antibiotic '{}' mentioned without proper clinical context"),
+        "pathogen_names": (["pathogen", "bacteria", "organism", "infection"],
+                           "Pathogen '{}' mentioned without proper clinical context"),
+    }
+    for question in quiz_questions:
+        question_text = question["question"].lower()
+        explanation = question["explanation"].lower()
+        expected = []
+        for category, terms in tester.medical_checks.items():
+            if category not in contexts:
+                continue
+            required, message = contexts[category]
+            for term in terms:
+                if (term in question_text or term in explanation) and not any(
+                        context in question_text for context in required):
+                    expected.append(message.format(term))
+        found = [issue for issue in tester.test_medical_accuracy(question)
+                 if "without proper clinical context" in issue]
+        assert sorted(found) == sorted(expected)
@@ -0,0 +1,78 @@
+"""
+Tests for batch difficulty classification
+Batch scoring must give the original per-question keyword scoring's levels
+"""
+
+import random
+
+from difficulty_classifier import DifficultyClassifier
+from quiz_generator import QuizQuestionGenerator
+
+def original_difficulty(classifier, question):
+    """analyze_question_complexity as it was before batch scoring"""
+    question_lower = question.get("question", "").lower()
+    explanation_lower = question.get("explanation", "").lower()
+    category_lower = question.get("category", "").lower()
+    
+    advanced_score = 2 * sum(1 for keyword in classifier.advanced_keywords
+                             if keyword in question_lower or keyword in explanation_lower)
+    intermediate_score = sum(1 for keyword in classifier.intermediate_keywords
+                             if keyword in question_lower or keyword in explanation_lower)
+    beginner_score = sum(1 for keyword in classifier.beginner_keywords
+                         if keyword in question_lower or keyword in explanation_lower)
+    complex_condition_found = any(condition in question_lower or condition in explanation_lower
+                                  for condition in classifier.complex_conditions)
+    basic_condition_found = any(condition in question_lower or condition in explanation_lower
+                                for condition in classifier.basic_conditions)
+    
+    if "specific choice and duration" in explanation_lower:
+        advanced_score += 2
+    if "guided by culture" in explanation_lower:
+        intermediate_score += 1
+    if "empiric recommendations" in explanation_lower:
+        beginner_score += 1
+    if "depending on" in explanation_lower:
+        intermediate_score += 1
+    if "consider" in question_lower:
+        intermediate_score += 1
+    
+    if advanced_score >= 2 or complex_condition_found:
+        return "advanced"
+    elif intermediate_score >= 2 or (intermediate_score >= 1 and not basic_condition_found):
+        return "intermediate"
+    elif beginner_score >= 1 or basic_condition_found:
+        return "beginner"
+    elif category_lower in ["central nervous system", "bone/joint", "bloodstream infection"]:
+        return "advanced"
+    elif category_lower in ["skin and soft tissue", "respiratory", "genitourinary"]:
+        return "intermediate"
+    return "beginner"
+
+def keyword_questions(classifier, count):
+    """Questions built from random runs of keywords, so matches nest, overlap and repeat"""
+    rng = random.Random(8)
+    words = [word for terms in classifier.config() for word in terms]
+    words += ["consider", "depending on", "guided by culture", "empiric recommendations",
+              "specific choice and duration", "therapy", "the"]
+    categories = ["Respiratory", "Central Nervous System", "Other"]
+    
+    def text():
+        return rng.choice(["", " "]).join(rng.choice(words) for _ in range(rng.randint(0, 4)))
+    
+    return [{"question": text(), "explanation": text(), "category": rng.choice(categories)} for _ in range(count)]
+
+def test_batch_matches_original_scoring(quiz_questions):
+    classifier = DifficultyClassifier()
+    bank = quiz_questions + QuizQuestionGenerator().generate_questions(300) + keyword_questions(classifier, 2000)
+    expected = [original_difficulty(classifier, question) for question in bank]
+    assert classifier.classify_batch(bank) == expected
+    assert [classifier.classify(question) for question in bank] == expected
+    assert classifier.classify_questions(bank) == expected
+
+def test_batch_follows_keyword_changes(quiz_questions):
+    classifier = DifficultyClassifier()
+    before = classifier.classify_batch(quiz_questions)
+    classifier.advanced_keywords = classifier.advanced_keywords + ["antibiotic"]
+    expected = [original_difficulty(classifier, question) for question in quiz_questions]
+    assert expected != before
+    assert classifier.classify_batch(quiz_questions) == expected
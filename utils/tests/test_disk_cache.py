@@ -0,0 +1,59 @@
+"""
+Tests for the content-hashed parse cache behind load_js_export
+Cached loads must return what parsing from scratch returns, and follow file changes
+"""
+
+import os
+import shutil
+
+import js_data_loader
+from conftest import QUIZ_QUESTIONS_PATH
+from js_data_loader import clear_cache, load_js_array, load_js_export
+
+def cache_entries():
+    cache_dir = js_data_loader._cache_settings["dir"]
+    return sorted(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else []
+
+def test_cached_loads_match_uncached_parse(quiz_questions):
+    uncached = load_js_array(QUIZ_QUESTIONS_PATH, use_cache=False)
+    assert cache_entries() == []
+    
+    assert load_js_array(QUIZ_QUESTIONS_PATH) == uncached == quiz_questions
+    assert len(cache_entries()) == 1
+    
+    # A fresh process has only the disk layer
+    js_data_loader._parse_cache.clear()
+    assert load_js_array(QUIZ_QUESTIONS_PATH) == uncached
+
+def test_changed_file_is_reparsed(tmp_path):
+    path = str(tmp_path / "data.js")
+    with open(path, "w") as f:
+        f.write("export const values = [1, 2, 3];\n")
+    assert load_js_export(path) == [1, 2, 3]
+    
+    with open(path, "w") as f:
+        f.write("export const values = [4, 5, 6, 7];\n")
+    assert load_js_export(path) == [4, 5, 6, 7]
+    assert len(cache_entries()) == 2
+
+def test_unreadable_entry_falls_back_to_parsing(tmp_path, quiz_questions):
+    path = str(tmp_path / "quizQuestions.js")
+    shutil.copyfile(QUIZ_QUESTIONS_PATH, path)
+    load_js_array(path)
+    entry = os.path.join(js_data_loader._cache_settings["dir"], cache_entries()[0])
+    with open(entry, "wb") as f:
+        f.write(b"not a pickle")
+    js_data_loader._parse_cache.clear()
+    assert load_js_array(path) == quiz_questions
+
+def test_size_budget_evicts_old_entries(tmp_path):
+    js_data_loader.configure_cache(max_bytes=1)
+    for i in range(3):
+        path = str(tmp_path / f"data{i}.js")
+        with open(path, "w") as f:
+            f.write(f"export const values = [{i}];\n")
+        assert load_js_export(path) == [i]
+    assert len(cache_entries()) == 1
+    
+    clear_cache()
+    assert cache_entries() == []
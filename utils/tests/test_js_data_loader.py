@@ -0,0 +1,47 @@
+"""
+Tests for the shared JS data-module loader
+Compares parsed modules with the marker-and-json.loads extraction the scripts used originally
+"""
+
+import json
+
+from conftest import QUIZ_QUESTIONS_PATH
+from js_data_loader import iter_js_array, load_js_array, load_js_export
+from quiz_generator import QuizQuestionGenerator
+
+def test_quiz_questions_match_original_extraction(quiz_questions):
+    assert load_js_array(QUIZ_QUESTIONS_PATH, "quizQuestions") == quiz_questions
+    assert load_js_array(QUIZ_QUESTIONS_PATH) == quiz_questions
+    assert list(iter_js_array(QUIZ_QUESTIONS_PATH, "quizQuestions", chunk_size=256)) == quiz_questions
+
+def test_generated_file_matches_original_extraction(tmp_path):
+    questions = QuizQuestionGenerator().generate_questions(40)
+    path = str(tmp_path / "generated.js")
+    QuizQuestionGenerator().save_questions_to_file(questions, path)
+    
+    # content_tester's original loader
+    with open(path, 'r') as f:
+        content = f.read()
+    start_marker = content.find(" = [") + 3
+    end_marker = content.rfind("];")
+    assert json.loads(content[start_marker:end_marker + 1]) == questions
+    assert load_js_array(path) == questions
+
+def test_js_literal_syntax(tmp_path):
+    path = tmp_path / "module.js"
+    path.write_text("""// const notThis = [1];
+/* export const alsoNotThis = [2]; */
+export const settings = { retries: 3, 'label': 'a "quoted" ] value', };
+export const items = [
+  { id: 1, name: 'Gentamicin', tags: ['aminoglycoside', 'IV',], },  // trailing commas
+  { id: 2, name: "it's [bracketed]" },
+];
+export default items;
+""")
+    assert load_js_export(str(path), "settings") == {"retries": 3, "label": 'a "quoted" ] value'}
+    expected = [
+        {"id": 1, "name": "Gentamicin", "tags": ["aminoglycoside", "IV"]},
+        {"id": 2, "name": "it's [bracketed]"},
+    ]
+    assert load_js_array(str(path), "items") == expected
+    assert list(iter_js_array(str(path), "items", chunk_size=7)) == expected
@@ -0,0 +1,63 @@
+"""
+Tests for the memory-mapped question bank
+Records decoded from the mapping must equal the questions loaded whole
+"""
+
+import json
+import random
+
+import pytest
+
+from conftest import QUIZ_QUESTIONS_PATH
+from mapped_bank import MappedQuestionBank, iter_mapped_questions
+from quiz_generator import QuizQuestionGenerator
+
+def test_js_module_matches_loaded_bank(quiz_questions):
+    with MappedQuestionBank(QUIZ_QUESTIONS_PATH, "quizQuestions") as bank:
+        assert len(bank) == len(quiz_questions)
+        assert list(bank) == quiz_questions
+        for i in random.Random(3).sample(range(len(bank)), 20):
+            assert bank[i] == quiz_questions[i]
+        assert bank[-1] == quiz_questions[-1]
+        assert bank[5:9] == quiz_questions[5:9]
+        with pytest.raises(IndexError):
+            bank[len(bank)]
+
+def test_generated_files_match_written_questions(tmp_path):
+    questions = QuizQuestionGenerator().generate_questions(60)
+    js_path = str(tmp_path / "generated.js")
+    jsonl_path = str(tmp_path / "generated.jsonl")
+    QuizQuestionGenerator().save_questions_to_file(questions, js_path)
+    QuizQuestionGenerator().save_questions_to_file(questions, jsonl_path)
+    assert list(iter_mapped_questions(js_path)) == questions
+    assert list(iter_mapped_questions(jsonl_path)) == questions
+
+def test_js_literal_elements(tmp_path):
+    path = tmp_path / "module.js"
+    path.write_text("""const other = {a: [1, 2]};
+export const items = [
+  // leading comment, ]
+  { id: 1, note: 'comma, bracket ] and brace }' },
+  [1, [2, 3]],
+  "plain",
+];
+""")
+    with MappedQuestionBank(str(path), "items") as bank:
+        assert list(bank) == [{"id": 1, "note": "comma, bracket ] and brace }"}, [1, [2, 3]], "plain"]
+
+def test_rejects_non_array_export(tmp_path):
+    path = tmp_path / "module.js"
+    path.write_text("export const settings = {retries: 3};\n")
+    with pytest.raises(ValueError):
+        MappedQuestionBank(str(path))
+
+def test_empty_jsonl_file(tmp_path):
+    path = tmp_path / "empty.jsonl"
+    path.write_text("")
+    assert list(iter_mapped_questions(str(path))) == []
+
+def test_blank_lines_in_jsonl_are_skipped(tmp_path):
+    records = [{"question": "Q1"}, {"question": "Q2"}]
+    path = tmp_path / "bank.jsonl"
+    path.write_text("\n" + json.dumps(records[0]) + "\n\n" + json.dumps(records[1]) + "\n")
+    assert list(iter_mapped_questions(str(path))) == records
@@ -0,0 +1,55 @@
+"""
+Tests for bank-wide near-duplicate detection
+Compares the MinHash/LSH groups with pairwise calculate_similarity over every question pair
+"""
+
+import random
+
+from content_tester import ContentTester
+
+def pairwise_groups(tester, questions, threshold):
+    """Group questions linked by calculate_similarity >= threshold, comparing every pair"""
+    parent = list(range(len(questions)))
+    
+    def find(x):
+        while parent[x] != x:
+            x = parent[x]
+        return x
+    
+    for i in range(len(questions)):
+        for j in range(i + 1, len(questions)):
+            if tester.calculate_similarity(questions[i]["question"], questions[j]["question"]) >= threshold:
+                parent[find(i)] = find(j)
+    groups = {}
+    for i in range(len(questions)):
+        groups.setdefault(find(i), []).append(i + 1)
+    return sorted(sorted(group) for group in groups.values() if len(group) > 1)
+
+def perturbed_bank(quiz_questions):
+    """The app's questions plus exact copies and copies with one word dropped or appended"""
+    rng = random.Random(11)
+    questions = list(quiz_questions)
+    for question in quiz_questions:
+        words = question["question"].split()
+        edit = rng.randrange(4)
+        if edit == 0:
+            questions.append(dict(question))
+        elif edit == 1 and len(words) > 1:
+            del words[rng.randrange(len(words))]
+            questions.append({**question, "question": " ".join(words)})
+        elif edit == 2:
+            questions.append({**question, "question": question["question"] + " today"})
+    rng.shuffle(questions)
+    return questions
+
+def test_groups_match_pairwise_similarity(quiz_questions):
+    tester = ContentTester()
+    questions = perturbed_bank(quiz_questions)
+    groups = tester.find_near_duplicate_questions(questions)
+    assert groups
+    assert groups == pairwise_groups(tester, questions, 0.8)
+
+def test_distinct_questions_have_no_groups(quiz_questions):
+    tester = ContentTester()
+    assert tester.find_near_duplicate_questions(quiz_questions) == pairwise_groups(tester, quiz_questions, 0.8)
+    assert tester.find_near_duplicate_questions([{"question": ""}, {"question": ""}]) == []
@@ -0,0 +1,48 @@
+"""
+Tests for the columnar question store
+Questions read back from the store must equal the dicts that went in
+"""
+
+import json
+from collections import Counter
+
+from question_store import CompactQuestionStore
+from quiz_generator import QuizQuestionGenerator
+
+def test_round_trips_question_bank(quiz_questions):
+    store = CompactQuestionStore(quiz_questions)
+    assert len(store) == len(quiz_questions)
+    assert list(store) == quiz_questions
+    for i, question in enumerate(quiz_questions):
+        assert list(store[i]) == list(question)  # key order kept
+        assert dict(store.record(i)) == question
+    assert store[-1] == quiz_questions[-1]
+
+def test_round_trips_irregular_questions():
+    questions = [
+        {"question": "Q1", "options": ["a", "b"], "correct": 1, "explanation": "E", "category": "C"},
+        {"correct": "1", "question": "Q2", "options": ["a", "b"]},
+        {"question": None, "options": "not a list", "difficulty": 3, "extra": {"nested": [1]}},
+        {},
+    ]
+    store = CompactQuestionStore(questions)
+    assert list(store) == questions
+
+def test_value_counts_match_counter(quiz_questions):
+    bank = quiz_questions + QuizQuestionGenerator().generate_questions(300)
+    store = CompactQuestionStore(bank)
+    for field in ("category", "difficulty", "conditionId"):
+        expected = Counter(question[field] for question in bank if field in question)
+        assert store.value_counts(field) == dict(expected)
+
+def test_from_jsonl_file(tmp_path, quiz_questions):
+    path = tmp_path / "bank.jsonl"
+    path.write_text("".join(json.dumps(question) + "\n" for question in quiz_questions))
+    assert list(CompactQuestionStore.from_file(str(path))) == quiz_questions
+
+def test_more_key_orders_than_fit_a_16_bit_code():
+    questions = [{"question": f"Q{i}", "options": ["a", "b"], "correct": 0, f"extra{i}": i} for i in range(70000)]
+    store = CompactQuestionStore(questions)
+    assert len(store.layouts) == 70000
+    assert store[69999] == questions[69999]
+    assert list(store) == questions
@@ -0,0 +1,89 @@
+"""
+Tests for bulk question generation
+Bulk and encoded output must be questions the original generator can produce, in the same JSON
+"""
+
+import json
+import random
+from collections import Counter
+
+import pytest
+
+import quiz_generator
+from js_data_loader import load_js_array
+from quiz_generator import QuizQuestionGenerator
+
+@pytest.fixture(scope="module")
+def generator():
+    return QuizQuestionGenerator()
+
+@pytest.fixture(scope="module")
+def possible_records(generator):
+    """Every question the bulk tables can produce, keyed by question text, options and answer"""
+    templates, options_table, _, _ = generator._build_bulk_records()
+    return {(template["question"], options, template["correct"]): template
+            for template, options in zip(templates, options_table)}
+
+def record_key(question):
+    # Some option lists hold two drugs sharing a mechanism, so the answer is part of the key
+    return question["question"], tuple(question["options"]), question["correct"]
+
+def test_bulk_tables_cover_original_generator(generator, possible_records):
+    random.seed(4)
+    for question in generator.generate_questions(3000):
+        template = possible_records[record_key(question)]
+        assert {**template, "options": question["options"]} == question
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_bulk_questions_match_original_distribution(generator, possible_records, monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(quiz_generator, "np", None)
+    elif quiz_generator.np is None:
+        pytest.skip("numpy is not installed")
+    questions = generator.generate_questions_bulk(50000, rng=random.Random(2))
+    assert len(questions) == 50000
+    for question in questions[:2000]:
+        template = possible_records[record_key(question)]
+        assert {**template, "options": question["options"]} == question
+    # Each question is independent of the shared tables
+    assert questions[0]["options"] is not questions[1]["options"]
+    
+    # The original picks a question type uniformly, then the correct answer's position uniformly
+    for counts in (Counter(question["category"] for question in questions),
+                   Counter(question["correct"] for question in questions)):
+        share = 1 / len(counts)
+        assert all(abs(count / len(questions) - share) < 0.02 for count in counts.values())
+
+@pytest.mark.parametrize("jsonl", [False, True])
+def test_encoded_batches_match_json_dumps(generator, jsonl):
+    questions = generator.generate_questions_bulk(3000, batch_size=1000, rng=random.Random(9))
+    encoded = [text for _, texts in generator.iter_encoded_question_batches(
+        3000, batch_size=1000, rng=random.Random(9), jsonl=jsonl) for text in texts]
+    if jsonl:
+        assert encoded == [json.dumps(question, ensure_ascii=False) for question in questions]
+    else:
+        assert encoded == [json.dumps(question, indent=2).replace("\n", "\n  ") for question in questions]
+
+@pytest.mark.parametrize("filename", ["bank.js", "bank.jsonl"])
+def test_encoded_file_matches_streamed_file(generator, tmp_path, filename):
+    questions = generator.generate_questions_bulk(500, rng=random.Random(6))
+    streamed = str(tmp_path / ("streamed_" + filename))
+    encoded = str(tmp_path / ("encoded_" + filename))
+    generator.stream_questions_to_file(questions, streamed)
+    texts = (text for _, batch in generator.iter_encoded_question_batches(
+        500, rng=random.Random(6), jsonl=filename.endswith(".jsonl")) for text in batch)
+    generator.write_encoded_questions(texts, encoded)
+    
+    def without_timestamp(path):
+        with open(path) as f:
+            return [line for line in f if "Generated on:" not in line]
+    
+    assert without_timestamp(encoded) == without_timestamp(streamed)
+    if filename.endswith(".js"):
+        assert load_js_array(encoded) == questions
+
+def test_parallel_output_does_not_depend_on_workers(generator):
+    serial = list(generator.iter_questions_parallel(900, seed=12, workers=1, chunk_size=200))
+    parallel = list(generator.iter_questions_parallel(900, seed=12, workers=2, chunk_size=200))
+    assert len(serial) == 900
+    assert parallel == serial
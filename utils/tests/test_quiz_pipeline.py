@@ -0,0 +1,32 @@
+"""
+Tests for the content pipeline's command line
+Piped questions must reach every stage in both the single-process and the per-stage-process runs
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import UTILS_DIR
+
+PIPELINE_SCRIPT = os.path.join(UTILS_DIR, "quiz_pipeline.py")
+
+def run_pipeline(args, stdin_text, cwd):
+    return subprocess.run([sys.executable, PIPELINE_SCRIPT, *args, "--report", "report.txt"],
+                          input=stdin_text, capture_output=True, text=True, cwd=cwd, timeout=120)
+
+@pytest.mark.parametrize("mode", [[], ["--processes"]])
+def test_stdin_questions_are_all_processed(tmp_path, quiz_questions, mode):
+    stdin_text = "".join(json.dumps(question) + "\n" for question in quiz_questions)
+    result = run_pipeline([*mode, "--input", "-", "--batch-size", "7"], stdin_text, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert f"Questions processed: {len(quiz_questions)}" in result.stdout
+
+@pytest.mark.parametrize("mode", [[], ["--processes"]])
+def test_unreadable_stdin_fails(tmp_path, mode):
+    result = run_pipeline([*mode, "--input", "-"], "{not json\n", tmp_path)
+    assert result.returncode == 1
+    assert "Error reading questions from -" in result.stderr